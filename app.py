@@ -1,28 +1,45 @@
-from transformers import pipeline
-from nlp.chatbot import get_financial_advice
-from finance.analysis import (
-    generate_budget_summary,
-    generate_spending_insights,
-    prepare_chart_data,
-)
-from utils.auth import login_user
-import streamlit as st
-import pandas as pd
-from PIL import Image
-import os
-from dotenv import load_dotenv
-from huggingface_hub import login
-from transformers import pipeline
-
-
-@st.cache_resource
-def load_model():
-    generator = pipeline(
-        "text-generation",
-        model="ibm-granite/granite-3b-instruct",
-        token="HF_API_KEY"
+from utils.startup import first_render, report_once, timed_import
+from utils.metrics import export_configured, observe, snapshot, timer
+
+with timed_import("streamlit"):
+    import streamlit as st
+with timed_import("finance"):
+    from finance.analysis import (
+        generate_budget_summary,
+        generate_spending_insights,
+        prepare_chart_data,
+    )
+    from finance.datasets import DEMO_DATASET, get_dataset_store, shared_dataset
+    from finance.incremental import append_transactions
+    from finance.parallel import load_transaction_files
+    from finance.timeseries import CHART_MAX_POINTS, get_time_pyramid
+with timed_import("nlp"):
+    from nlp.chatbot import get_financial_advice
+    from nlp.executor import DONE, FAILED, POLL_INTERVAL, TIMED_OUT, get_chat_executor
+    from nlp.history import RENDER_WINDOW, ChatHistory
+    from nlp.inference import current_inference_worker, get_inference_worker, start_warm_up
+    from nlp.response_cache import get_response_cache
+with timed_import("utils.auth"):
+    from utils.auth import (
+        create_session,
+        exchange_session,
+        get_user_role,
+        login_user,
+        revoke_session,
+        verify_session,
     )
-    return generator
+
+# The ML stack (dotenv, transformers, torch) is not imported here: nlp.inference
+# loads it on the first chat request that needs a model, or in the background
+# after login when FINBOT_WARMUP=1.
+
+
+def answer_in_background(query: str, user_type: str, context: tuple):
+    # Runs on the chat executor, so a first question that has to load the
+    # model never blocks this script. One batching worker per process serves
+    # every session's prompts; it is None when FINBOT_MODEL is unset.
+    return get_financial_advice(query, user_type, worker=get_inference_worker(),
+                                stream=True, context=context)
 
 
 # Import custom modules for different functionalities
@@ -45,8 +62,35 @@ if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "username" not in st.session_state:
     st.session_state.username = ""
-if "df" not in st.session_state:
-    st.session_state.df = None
+if "role" not in st.session_state:
+    st.session_state.role = None
+if "dataset" not in st.session_state:
+    # The session's frame; spilled to disk when idle or over the memory budget
+    st.session_state.dataset = get_dataset_store().open()
+if "upload_id" not in st.session_state:
+    st.session_state.upload_id = None
+
+# --- SESSION TOKEN ---
+# The signed token in the URL survives new browser sessions. Verifying it is a
+# cached lookup, so it is re-checked on every rerun; the password hash only
+# runs at login. A token that restores a session is exchanged for a new one,
+# so a leaked copy of the URL stops working once the page has loaded.
+_token = st.query_params.get("session")
+if _token and not st.session_state.logged_in:
+    _token = exchange_session(_token)
+    if _token is not None:
+        st.query_params["session"] = _token
+_claims = verify_session(_token)
+if _claims is not None and not st.session_state.logged_in:
+    st.session_state.logged_in = True
+    st.session_state.username = _claims["sub"]
+    st.session_state.user_type = _claims["type"]
+    st.session_state.role = get_user_role(_claims["sub"])
+    st.session_state.page = "Dashboard"
+elif _claims is None and st.session_state.logged_in:
+    # Token expired or was revoked (e.g. logout in another tab)
+    st.session_state.logged_in = False
+    st.session_state.page = "Select User Type"
 
 
 # --- STYLING ---
@@ -59,6 +103,16 @@ def local_css(file_name):
 local_css(".streamlit/style.css")
 
 
+def current_dataset():
+    """Returns the session's transaction frame, or None before an upload."""
+    return st.session_state.dataset.get()
+
+
+def set_dataset(df):
+    """Replaces the session's dataset and drops results cached for the old one."""
+    st.session_state.dataset.set(df)
+
+
 # --- PAGE RENDERING FUNCTIONS ---
 def render_user_type_selection():
     """Displays the initial page for the user to select their demographic."""
@@ -97,7 +151,11 @@ def render_login_page():
             if login_user(username, password):
                 st.session_state.logged_in = True
                 st.session_state.username = username
+                st.session_state.role = get_user_role(username)
                 st.session_state.page = "Dashboard"
+                st.query_params["session"] = create_session(
+                    username, st.session_state.user_type)
+                start_warm_up()
                 st.rerun()
             else:
                 st.error("Invalid username or password")
@@ -120,9 +178,20 @@ def render_dashboard():
 
     # Use a query param to decide which page to show
     page = st.sidebar.radio("Navigation", page_options)
+    # Leaving the chat stops an answer that is still being generated
+    if page != "🏦 Taxes and Investments" and st.session_state.get("chat_job") is not None:
+        finish_chat_job()
 
     st.sidebar.markdown("---")
     if st.sidebar.button("Logout"):
+        revoke_session(st.query_params.get("session"))
+        st.query_params.clear()
+        # Free the session's frame and its spill file now rather than at GC
+        st.session_state.dataset.clear()
+        if st.session_state.get("chat_job") is not None:
+            st.session_state.chat_job.cancel()
+        if "messages" in st.session_state:
+            st.session_state.messages.clear()
         # Reset session state on logout
         for key in st.session_state.keys():
             del st.session_state[key]
@@ -131,14 +200,58 @@ def render_dashboard():
 
     st.title(page)
 
-    if page == "📊 Budget Tracking":
-        render_budget_tracking_page()
-    elif page == "📈 Graphical Representation":
-        render_graphical_representation_page()
-    elif page == "💡 Spending Insights":
-        render_spending_insights_page()
-    elif page == "🏦 Taxes and Investments":
-        render_taxes_and_investments_page()
+    with first_render(page), timer(page, kind="page"):
+        if page == "📊 Budget Tracking":
+            render_budget_tracking_page()
+        elif page == "📈 Graphical Representation":
+            render_graphical_representation_page()
+        elif page == "💡 Spending Insights":
+            render_spending_insights_page()
+        elif page == "🏦 Taxes and Investments":
+            render_taxes_and_investments_page()
+
+    if st.session_state.role == "admin":
+        render_metrics_panel()
+
+
+def render_metrics_panel():
+    """Optional sidebar panel with render and call timings, for admins only."""
+    st.sidebar.markdown("---")
+    if st.sidebar.checkbox("Show performance metrics"):
+        rows = [
+            {
+                "Kind": row["kind"],
+                "Name": row["name"],
+                "Calls": row["count"],
+                "p50 (ms)": row["p50"] * 1000,
+                "p95 (ms)": row["p95"] * 1000,
+                "p99 (ms)": row["p99"] * 1000,
+            }
+            for row in snapshot()
+        ]
+        st.sidebar.dataframe(rows, hide_index=True)
+        # Only report on a model that is already loaded; never load one here
+        if current_inference_worker() is not None:
+            cache = get_response_cache().stats()
+            st.sidebar.caption(
+                f"Response cache: {cache['hit_rate']:.0%} hit rate "
+                f"({cache['hits']} hits, {cache['misses']} misses), "
+                f"{cache['latency_saved_seconds']:.1f}s of generation saved")
+        datasets = get_dataset_store()
+        stats = datasets.stats()
+        st.sidebar.caption(
+            f"Datasets: {stats['resident_bytes'] / 2**20:.1f} MB resident in "
+            f"{stats['sessions']} sessions, {stats['spilled_sessions']} spilled to disk, "
+            f"{stats['shared_bytes'] / 2**20:.1f} MB shared")
+        st.sidebar.dataframe([
+            {
+                "Session": row["session"],
+                "Resident (MB)": row["resident_bytes"] / 2**20,
+                "Spilled (MB)": row["spilled_bytes"] / 2**20,
+                "Shared": row["shared"],
+            }
+            for row in datasets.sessions()
+        ], hide_index=True)
 
 
 def render_budget_tracking_page():
@@ -146,78 +259,117 @@ def render_budget_tracking_page():
     st.header("Upload Your Expense File")
     st.markdown(
         """
-        Upload a CSV file with your recent transactions to get started.  
-        The file should contain at least these columns: `Date`, `Category`, and `Amount`.  
+        Upload CSV files with your recent transactions to get started, e.g. one per account.  
+        Each file should contain at least these columns: `Date`, `Category`, and `Amount`.  
         Or, you can use our **demo file** to explore the app.
         """
     )
 
-    uploaded_file = st.file_uploader(
-        "Choose a CSV file", type="csv", label_visibility="collapsed"
+    uploaded_files = st.file_uploader(
+        "Choose CSV files", type="csv", accept_multiple_files=True,
+        label_visibility="collapsed",
+    )
+    current = current_dataset()
+    append = current is not None and st.checkbox(
+        "Append to existing data",
+        help="Add the new statements to the current data; transactions already present are skipped.",
     )
 
-    # --- Case 1: User uploads a file ---
-    if uploaded_file is not None:
+    # --- Case 1: User uploads one or more files ---
+    # The uploader keeps returning the same files on every rerun; only a new
+    # selection is parsed, everything else is served from the result cache.
+    upload_id = tuple(f.file_id for f in uploaded_files)
+    if uploaded_files and upload_id != st.session_state.upload_id:
         try:
-            df = pd.read_csv(uploaded_file)
-            required_cols = {"Date", "Category", "Amount"}
-            if not required_cols.issubset(df.columns):
-                st.error(
-                    f"CSV must contain the following columns: {', '.join(required_cols)}"
-                )
+            # Parse once into a typed frame that the analysis pages reuse as-is;
+            # several exports are parsed in parallel and merged
+            df, skipped = load_transaction_files(uploaded_files)
+            if append:
+                # Only the new rows are aggregated; totals for the existing
+                # data are carried over instead of being recomputed
+                df, added, already_present = append_transactions(current, df)
+                skipped += already_present
+                set_dataset(df)
+                st.success(f"Added {added} new transactions ({skipped} already present).")
             else:
-                st.session_state.df = df
-                st.success("File uploaded successfully!")
+                set_dataset(df)
+                if len(uploaded_files) > 1:
+                    st.success(f"{len(uploaded_files)} files uploaded successfully! "
+                               f"{skipped} duplicate transactions across files were skipped.")
+                else:
+                    st.success("File uploaded successfully!")
+            st.session_state.upload_id = upload_id
+        except ValueError as e:
+            st.error(str(e))
         except Exception as e:
             st.error(f"An error occurred while processing the file: {e}")
 
     # --- Case 2: No file uploaded → Use demo file ---
-    elif st.button("Use Demo File"):
+    elif not uploaded_files and st.button("Use Demo File"):
         try:
-            df = pd.read_csv("data/expense_data_1.csv")
-            st.session_state.df = df
+            # Parsed once per process and shared read-only by every session
+            set_dataset(shared_dataset(DEMO_DATASET))
             st.success("Demo file loaded successfully!")
         except Exception as e:
             st.error(f"Could not load demo file: {e}")
 
     # --- Display results if dataframe is available ---
-    if st.session_state.df is not None:
+    df = current_dataset()
+    if df is not None:
         st.markdown("---")
         st.subheader("Budget Summary")
-        summary = generate_budget_summary(st.session_state.df)
+        summary = generate_budget_summary(df)
         for key, value in summary.items():
             st.metric(label=key.replace("_", " ").title(), value=value)
 
         st.subheader("Recent Transactions")
-        st.dataframe(st.session_state.df.tail())
+        st.dataframe(df.tail())
 
 
 def render_graphical_representation_page():
     """Displays charts and graphs based on the uploaded data."""
-    if st.session_state.df is None:
+    df = current_dataset()
+    if df is None:
         st.warning(
             "Please upload your expense file on the 'Budget Tracking' page first.")
         return
 
     st.subheader("Spending by Category")
-    category_chart_data = prepare_chart_data(st.session_state.df, "Category")
+    category_chart_data = prepare_chart_data(df, "Category")
     st.bar_chart(category_chart_data, x="Category", y="Amount")
 
     st.subheader("Spending Over Time")
-    time_chart_data = prepare_chart_data(st.session_state.df, "Date")
+    pyramid = get_time_pyramid(df)
+    if not len(pyramid):
+        st.info("No dated transactions to chart.")
+        return
+    first_day, last_day = pyramid.first_day.date(), pyramid.last_day.date()
+    selected = st.date_input(
+        "Date range", value=(first_day, last_day),
+        min_value=first_day, max_value=last_day,
+    )
+    # While a range is being picked the widget returns only its start
+    start, end = (selected if len(selected) == 2 else (selected[0], last_day))
+
+    # The resolution follows the range and the payload is capped at
+    # CHART_MAX_POINTS, however many transactions there are
+    time_chart_data = prepare_chart_data(
+        df, "Date", start=start, end=end, max_points=CHART_MAX_POINTS)
     st.line_chart(time_chart_data, x="Date", y="Amount")
+    labels = {"day": "Daily", "week": "Weekly", "month": "Monthly", "year": "Yearly"}
+    st.caption(f"{labels[time_chart_data.attrs['resolution']]} totals")
 
 
 def render_spending_insights_page():
     """Provides actionable insights based on spending habits."""
-    if st.session_state.df is None:
+    df = current_dataset()
+    if df is None:
         st.warning(
             "Please upload your expense file on the 'Budget Tracking' page first.")
         return
 
     st.subheader("Actionable Spending Insights")
-    insights = generate_spending_insights(
-        st.session_state.df, st.session_state.user_type)
+    insights = generate_spending_insights(df, st.session_state.user_type)
     for insight in insights:
         st.info(insight)
 
@@ -229,40 +381,110 @@ def render_taxes_and_investments_page():
         "Ask questions about savings, tax strategies, or investment options. Our AI, powered by IBM Granite, will provide guidance tailored to you."
     )
 
-    # Initialize chat history
+    # Initialize chat history: recent messages in memory, older ones archived
     if "messages" not in st.session_state:
-        st.session_state.messages = []
-
-    # Display chat messages from history on app rerun
-    for message in st.session_state.messages:
+        st.session_state.messages = ChatHistory()
+        st.session_state.chat_window = RENDER_WINDOW
+    history = st.session_state.messages
+
+    # Only the latest window of messages is rendered on each rerun
+    if len(history) > st.session_state.chat_window:
+        if st.button("Load earlier messages"):
+            st.session_state.chat_window += RENDER_WINDOW
+    for message in history.recent(st.session_state.chat_window):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            if message.get("total_time") is not None:
+                render_latency_caption(message)
 
     # React to user input
     if prompt := st.chat_input("What would you like to ask?"):
+        # A new question replaces an answer that is still being generated
+        if st.session_state.get("chat_job") is not None:
+            finish_chat_job()
+            # Show the interrupted answer above the new question
+            message = history.recent(1)[0]
+            with st.chat_message("assistant"):
+                st.markdown(message["content"])
+
         # Display user message in chat message container
         st.chat_message("user").markdown(prompt)
-        # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
 
-        # Get AI response
-        with st.spinner("FinBot is thinking..."):
-            response = get_financial_advice(prompt, st.session_state.user_type)
+        # The answer is produced on the shared chat executor so that this
+        # script never blocks on the model; the model sees the earlier turns
+        # that fit its context budget
+        try:
+            st.session_state.chat_job = get_chat_executor().submit(
+                prompt, answer_in_background, prompt, st.session_state.user_type,
+                history.context())
+        except RuntimeError as e:
+            st.error(str(e))
+        else:
+            # Add user message to chat history
+            history.append({"role": "user", "content": prompt})
+
+    if st.session_state.get("chat_job") is not None:
+        render_chat_job()
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def render_chat_job():
+    """Shows the answer being generated, refreshing until it is complete."""
+    job = st.session_state.get("chat_job")
+    if job is None:
+        return
+    with st.chat_message("assistant"):
+        st.markdown(job.text or "Thinking…")
+        stop = not job.done and st.button("Stop generating")
+    if stop or job.done:
+        finish_chat_job()
+        # Rerun the whole page to render the answer from history and end polling
+        st.rerun()
 
-        # Display assistant response in chat message container
-        with st.chat_message("assistant"):
-            st.markdown(response)
 
-        # Add assistant response to chat history
-        st.session_state.messages.append(
-            {"role": "assistant", "content": response})
+# Shown under answers that did not complete
+STOPPED_NOTES = {
+    TIMED_OUT: "_The answer took too long and was stopped._",
+    FAILED: "_Sorry, something went wrong while answering._",
+}
+
+
+def finish_chat_job():
+    """Moves the session's chat job into the history, stopping it if needed."""
+    job = st.session_state.chat_job
+    st.session_state.chat_job = None
+    if job.status == DONE:
+        message = {"role": "assistant", "content": job.text, **job.metrics()}
+        observe("time_to_first_token", message["time_to_first_token"], kind="chat")
+        observe("response_time", message["total_time"], kind="chat")
+    else:
+        status = job.status
+        job.cancel()
+        note = STOPPED_NOTES.get(status, "_Stopped._")
+        message = {"role": "assistant", "content": f"{job.text}\n\n{note}".lstrip()}
+    # Add assistant response (with its latency figures) to chat history
+    st.session_state.messages.append(message)
+
+
+def render_latency_caption(message):
+    """Shows time-to-first-token and total generation time under a reply."""
+    st.caption(
+        f"First token in {message['time_to_first_token']:.2f}s · "
+        f"complete in {message['total_time']:.2f}s"
+    )
 
 
 # --- MAIN ROUTER ---
 # This logic determines which page to show based on the session state.
-if st.session_state.page == "Select User Type":
-    render_user_type_selection()
-elif st.session_state.page == "Login":
-    render_login_page()
-elif st.session_state.page == "Dashboard":
-    render_dashboard()
+with first_render(st.session_state.page), timer(st.session_state.page, kind="page"):
+    if st.session_state.page == "Select User Type":
+        render_user_type_selection()
+    elif st.session_state.page == "Login":
+        render_login_page()
+    elif st.session_state.page == "Dashboard":
+        render_dashboard()
+
+# Set FINBOT_STARTUP_REPORT=1 to print cold-start timings once per process
+report_once()
+# FINBOT_METRICS_PORT / FINBOT_METRICS_FILE export timings in Prometheus format
+export_configured()
@@ -0,0 +1,153 @@
+"""
+Scaling benchmark for finance/analysis.py and finance/budget.py.
+
+Times CSV ingestion and each analysis function on synthetic data of several
+sizes, reporting throughput and peak memory. Results are saved as JSON; with
+--baseline, the run fails if any timing regressed by more than --threshold.
+
+Usage:
+    python -m benchmarks.bench_analysis --sizes 1k,100k,1m --output bench.json
+    python -m benchmarks.bench_analysis --baseline bench.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import write_transactions_csv
+from finance import analysis, budget
+from finance.ingest import clear_derived, load_transactions
+
+_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    """Parses sizes such as `1k`, `250k` or `10m`."""
+    text = text.strip().lower()
+    if text[-1] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _measure(func, repeat: int) -> tuple:
+    """Returns (best seconds over `repeat` calls, peak traced bytes of one call)."""
+    best = float("inf")
+    for _ in range(repeat):
+        # Aggregates are memoized per frame; clear them so every run
+        # measures the full computation rather than a lookup
+        clear_derived()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    # Memory is traced in a separate call: tracemalloc slows allocation down
+    clear_derived()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes: list, repeat: int, workdir: str) -> list:
+    """Runs every operation at every size and returns result rows."""
+    results = []
+    for size in sizes:
+        path = write_transactions_csv(os.path.join(workdir, f"tx_{size}.csv"), size)
+        df = load_transactions(path)
+        # Analysis functions are timed uncached: the result cache would turn
+        # every repeat into a dictionary lookup
+        operations = {
+            "ingest_csv": lambda: load_transactions(path),
+            "generate_budget_summary": lambda: budget.generate_budget_summary.uncached(df),
+            "generate_spending_insights": lambda: budget.generate_spending_insights.uncached(
+                df, "Professional"),
+            "prepare_chart_data[Category]": lambda: budget.prepare_chart_data.uncached(
+                df, "Category"),
+            "prepare_chart_data[Date]": lambda: budget.prepare_chart_data.uncached(df, "Date"),
+            "analysis.prepare_chart_data[Date]": lambda: analysis.prepare_chart_data.uncached(
+                df, "Date"),
+            "analysis.prepare_chart_data[Date,500pts]": lambda: (
+                analysis.prepare_chart_data.uncached(df, "Date", max_points=500)),
+        }
+        for name, func in operations.items():
+            seconds, peak = _measure(func, repeat)
+            results.append({
+                "size": size,
+                "operation": name,
+                "seconds": seconds,
+                "rows_per_second": size / seconds if seconds else None,
+                "peak_bytes": peak,
+            })
+            print(f"{size:>10,} {name:<36} {seconds * 1000:>10.2f} ms "
+                  f"{size / seconds:>14,.0f} rows/s {peak / 2 ** 20:>9.1f} MiB",
+                  flush=True)
+        os.remove(path)
+    return results
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Returns descriptions of operations slower than baseline by > threshold."""
+    previous = {(r["size"], r["operation"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for row in results:
+        before = previous.get((row["size"], row["operation"]))
+        if before and row["seconds"] > before * (1 + threshold):
+            regressions.append(
+                f"{row['operation']} @ {row['size']:,} rows: "
+                f"{before * 1000:.2f} ms -> {row['seconds'] * 1000:.2f} ms "
+                f"(+{(row['seconds'] / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the finance analysis functions.")
+    parser.add_argument("--sizes", default="1k,10k,100k,1m",
+                        help="Comma-separated row counts, e.g. 1k,100k,10m")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per operation (best is kept)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown versus baseline, as a fraction")
+    args = parser.parse_args()
+
+    # Read before anything is written: the results must not replace the
+    # baseline they are compared with
+    baseline = None
+    if args.baseline:
+        if os.path.abspath(args.baseline) == os.path.abspath(args.output):
+            parser.error("--baseline and --output must be different files")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run(sizes, args.repeat, workdir)
+
+    report = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("regressions over threshold:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
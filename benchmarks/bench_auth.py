@@ -0,0 +1,74 @@
+"""
+Load test for the SQLite user store: logins/sec and token verifications/sec.
+
+Usage:
+    python -m benchmarks.bench_auth --threads 4 --logins 200 --verifications 200000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from utils import auth, user_store
+
+
+def _run_threads(threads: int, per_thread: int, work) -> float:
+    """Runs `work(i)` `per_thread` times in each of `threads` threads; returns seconds."""
+    def loop():
+        for i in range(per_thread):
+            work(i)
+
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test logins and session tokens.")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=100, help="Logins per thread")
+    parser.add_argument("--verifications", type=int, default=50_000,
+                        help="Token verifications per thread")
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    user_store.use_database(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    for index in range(args.users):
+        auth.create_user(f"user{index}", f"password{index}", "Student")
+
+    def login(i):
+        index = i % args.users
+        assert auth.login_user(f"user{index}", f"password{index}")
+
+    login_seconds = _run_threads(args.threads, args.logins, login)
+    logins = args.threads * args.logins
+
+    tokens = [auth.create_session(f"user{i}", "Student") for i in range(args.users)]
+
+    def verify(i):
+        assert auth.verify_session(tokens[i % len(tokens)]) is not None
+
+    verify_seconds = _run_threads(args.threads, args.verifications, verify)
+    verifications = args.threads * args.verifications
+
+    # Uncached path: signature check plus a revocation lookup in SQLite
+    def verify_uncached(i):
+        assert auth._verify_uncached(tokens[i % len(tokens)]) is not None
+
+    uncached_count = min(args.verifications, 5_000)
+    uncached_seconds = _run_threads(args.threads, uncached_count, verify_uncached)
+
+    print(f"scrypt cost:            N={auth.SCRYPT_N} r={auth.SCRYPT_R} p={auth.SCRYPT_P}")
+    print(f"logins:                 {logins / login_seconds:,.1f}/s "
+          f"({login_seconds / logins * 1000:.1f} ms each, {args.threads} threads)")
+    print(f"token checks (cached):  {verifications / verify_seconds:,.0f}/s")
+    print(f"token checks (cold):    {args.threads * uncached_count / uncached_seconds:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares one-prompt-per-call generation with the batching inference worker.
+
+Usage:
+    python -m benchmarks.bench_inference --clients 32 --prompts 8
+    python -m benchmarks.bench_inference --model sshleifer/tiny-gpt2
+"""
+import argparse
+import threading
+import time
+
+from nlp.chatbot import build_prompt
+from nlp.inference import FakeGenerator, InferenceWorker, PipelineBackend
+
+
+def _run_clients(clients: int, prompts: int, ask) -> float:
+    """Runs `clients` threads that each ask `prompts` questions; returns seconds."""
+    def client(index):
+        for n in range(prompts):
+            ask(build_prompt(f"Question {n} from session {index}", "Student"))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--prompts", type=int, default=4)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--model", help="Small local model to use instead of the fake generator")
+    args = parser.parse_args()
+
+    backend = PipelineBackend(args.model, max_new_tokens=16) if args.model else FakeGenerator()
+    total = args.clients * args.prompts
+
+    # Baseline: a single shared model, one prompt per call
+    model_lock = threading.Lock()
+
+    def ask_serial(prompt):
+        with model_lock:
+            return backend.generate([prompt])[0]
+
+    serial_seconds = _run_clients(args.clients, args.prompts, ask_serial)
+
+    worker = InferenceWorker(
+        backend, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000
+    ).start()
+    batched_seconds = _run_clients(args.clients, args.prompts, worker.generate)
+    metrics = worker.metrics()
+    worker.stop()
+
+    print(f"prompts:          {total}")
+    print(f"serial:           {serial_seconds:.2f}s ({total / serial_seconds:.1f} prompts/s)")
+    print(f"batched:          {batched_seconds:.2f}s ({total / batched_seconds:.1f} prompts/s)")
+    print(f"speedup:          {serial_seconds / batched_seconds:.1f}x")
+    print(f"mean batch size:  {metrics['mean_batch_size']:.1f}")
+    print(f"max queue depth:  {metrics['max_queue_depth']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark for parallel multi-file ingestion.
+
+Writes several synthetic exports (with overlapping transactions between
+neighbouring files) and times `load_transaction_files` with an increasing
+number of worker processes.
+
+Usage:
+    python -m benchmarks.bench_ingest --files 12 --rows 500k --workers 1,2,4,8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_analysis import parse_size
+from benchmarks.synthetic import generate_transactions
+from finance import parallel
+
+
+def write_exports(workdir: str, files: int, rows: int, overlap: float) -> list:
+    """Writes `files` CSVs; each repeats a share of the previous file's rows."""
+    paths = []
+    previous = None
+    for index in range(files):
+        df = generate_transactions(rows, seed=index)
+        if previous is not None and overlap:
+            shared = int(rows * overlap)
+            df.iloc[:shared] = previous.iloc[-shared:].to_numpy()
+        path = os.path.join(workdir, f"export_{index}.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+        previous = df
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel CSV ingestion.")
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--rows", default="200k", help="Rows per file, e.g. 500k")
+    parser.add_argument("--workers", default="1,2,4,8",
+                        help="Comma-separated worker counts to compare")
+    parser.add_argument("--overlap", type=float, default=0.05,
+                        help="Share of each file repeated from the previous one")
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    # Always use the process pool when more than one worker is requested
+    parallel.PARALLEL_MIN_BYTES = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = write_exports(workdir, args.files, rows, args.overlap)
+        total = args.files * rows
+        print(f"{args.files} files x {rows:,} rows on {os.cpu_count()} cores")
+        serial = None
+        for workers in (int(w) for w in args.workers.split(",")):
+            started = time.perf_counter()
+            df, skipped = parallel.load_transaction_files(paths, max_workers=workers)
+            seconds = time.perf_counter() - started
+            serial = serial or seconds
+            print(f"workers={workers:<3} {seconds:>8.2f} s {total / seconds:>14,.0f} rows/s "
+                  f"speedup {serial / seconds:>5.2f}x  kept {len(df):,} skipped {skipped:,}",
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
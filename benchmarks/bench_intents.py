@@ -0,0 +1,90 @@
+"""
+Micro-benchmark for the compiled intent matcher.
+
+Classifies a large synthetic corpus of queries against a few thousand
+synthetic intents and compares it with a chain of substring tests.
+
+Usage:
+    python -m benchmarks.bench_intents --intents 3000 --queries 100000
+"""
+import argparse
+import random
+import time
+
+from nlp.intents import IntentMatcher
+
+
+def make_intents(count: int, rng: random.Random) -> list:
+    """Builds `count` intents with one to three keyword phrases each."""
+    vocabulary = [f"w{i}" for i in range(count * 2)]
+    intents = []
+    for index in range(count):
+        keywords = [
+            " ".join(rng.sample(vocabulary, rng.randint(1, 3)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        intents.append({"name": f"intent_{index}", "priority": rng.randint(0, 10),
+                        "keywords": keywords})
+    return intents
+
+
+def make_queries(count: int, intents: list, rng: random.Random) -> list:
+    """Builds queries of 6-20 words, most of them containing one keyword."""
+    filler = ["how", "do", "i", "my", "the", "best", "way", "to", "for", "money", "this"]
+    queries = []
+    for _ in range(count):
+        words = rng.choices(filler, k=rng.randint(5, 18))
+        if rng.random() < 0.8:
+            words.insert(rng.randrange(len(words)), rng.choice(rng.choice(intents)["keywords"]))
+        queries.append(" ".join(words))
+    return queries
+
+
+def substring_chain(intents: list, query: str):
+    """The previous approach: test every keyword with `in`, in table order."""
+    query = query.lower()
+    for intent in intents:
+        for keyword in intent["keywords"]:
+            if keyword in query:
+                return intent["name"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent classification.")
+    parser.add_argument("--intents", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--baseline-queries", type=int, default=2_000,
+                        help="Queries run through the substring chain (it is slow)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    intents = make_intents(args.intents, rng)
+    queries = make_queries(args.queries, intents, rng)
+
+    started = time.perf_counter()
+    matcher = IntentMatcher(intents)
+    compile_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matched = sum(matcher.classify(query) is not None for query in queries)
+    matcher_seconds = time.perf_counter() - started
+
+    sample = queries[:args.baseline_queries]
+    started = time.perf_counter()
+    for query in sample:
+        substring_chain(intents, query)
+    chain_seconds = time.perf_counter() - started
+
+    matcher_rate = len(queries) / matcher_seconds
+    chain_rate = len(sample) / chain_seconds
+    print(f"intents:          {args.intents}")
+    print(f"compile:          {compile_seconds * 1000:.1f} ms")
+    print(f"matcher:          {matcher_rate:,.0f} queries/s ({matched} matched of {len(queries)})")
+    print(f"substring chain:  {chain_rate:,.0f} queries/s")
+    print(f"speedup:          {matcher_rate / chain_rate:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
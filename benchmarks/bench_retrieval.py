@@ -0,0 +1,77 @@
+"""
+Benchmark for the advice index.
+
+Builds a synthetic knowledge base of the requested size from the shipped
+snippets, then reports index load time and query latency for the flat and
+IVF layouts, plus the IVF recall against the exact (flat) results.
+
+Usage:
+    python -m benchmarks.bench_retrieval --snippets 200000 --queries 50
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from nlp.retrieval import AdviceIndex, HashingEmbedder, build_index, load_snippets
+
+QUERIES = [
+    "how do I start investing", "how can I save money on food", "student loan repayment",
+    "should I itemize deductions", "how big should my emergency fund be",
+    "improve my credit score", "index funds for retirement", "cancel subscriptions",
+]
+
+
+def write_corpus(path: str, size: int, seed: int = 0):
+    """Writes `size` snippets that mix words from the shipped knowledge base."""
+    base = load_snippets()
+    words = " ".join(snippet["text"] for snippet in base).split()
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(size):
+            snippet = base[i % len(base)]
+            f.write(json.dumps({**snippet, "id": f"{snippet['id']}-{i}",
+                                "text": " ".join(rng.sample(words, 25))}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the advice index.")
+    parser.add_argument("--snippets", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder()
+    queries = embedder.embed([QUERIES[i % len(QUERIES)] for i in range(args.queries)])
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = os.path.join(workdir, "kb.jsonl")
+        write_corpus(corpus, args.snippets)
+        results = {}
+        for layout, ivf_min_rows in (("flat", args.snippets + 1), ("ivf", 0)):
+            directory = os.path.join(workdir, layout)
+            started = time.perf_counter()
+            build_index(corpus, directory, embedder, ivf_min_rows=ivf_min_rows)
+            built = time.perf_counter() - started
+
+            started = time.perf_counter()
+            index = AdviceIndex.load(directory)
+            loaded = time.perf_counter() - started
+
+            started = time.perf_counter()
+            results[layout] = [
+                {snippet["id"] for _, snippet in index.search(query, args.k, "Student")}
+                for query in queries
+            ]
+            per_query = (time.perf_counter() - started) / len(queries)
+            print(f"{layout:<5} build {built:>7.2f} s  load {loaded * 1000:>7.2f} ms  "
+                  f"query {per_query * 1000:>7.2f} ms", flush=True)
+
+    recall = sum(len(f & i) for f, i in zip(results["flat"], results["ivf"])) / (
+        args.k * len(queries))
+    print(f"IVF recall@{args.k}: {recall:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark for the vectorized trend and anomaly insights.
+
+Times `generate_trend_insights` per user, and the matrix signals for many
+users stacked into one (users, categories, months) array.
+
+Usage:
+    python -m benchmarks.bench_trends --users 1000 --rows 5k
+"""
+import argparse
+import time
+
+from benchmarks.bench_analysis import parse_size
+from benchmarks.synthetic import generate_transactions
+from finance.aggregates import get_spending_cube
+from finance.ingest import clear_derived, normalize_transactions
+from finance.trends import generate_trend_insights, spending_signals, stack_category_months
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trend insights.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rows", default="5k", help="Transactions per user")
+    parser.add_argument("--months", type=int, default=24)
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    frames = [normalize_transactions(generate_transactions(rows, seed=user))
+              for user in range(args.users)]
+
+    clear_derived()
+    started = time.perf_counter()
+    for df in frames:
+        generate_trend_insights(df, args.months)
+    per_user = (time.perf_counter() - started) / args.users
+    print(f"generate_trend_insights   {per_user * 1000:>8.2f} ms/user (cold, {rows:,} rows)")
+
+    cubes = [get_spending_cube(df) for df in frames]
+    started = time.perf_counter()
+    _, stacked, _ = stack_category_months(cubes, args.months)
+    stacked_at = time.perf_counter()
+    spending_signals(stacked)
+    finished = time.perf_counter()
+    print(f"stack_category_months     {(stacked_at - started) * 1000:>8.2f} ms "
+          f"for {args.users} users {stacked.shape}")
+    print(f"spending_signals (batch)  {(finished - stacked_at) * 1000:>8.2f} ms "
+          f"({(finished - stacked_at) / args.users * 1e6:.1f} µs/user)")
+
+
+if __name__ == "__main__":
+    main()
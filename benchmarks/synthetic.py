@@ -0,0 +1,70 @@
+"""
+Synthetic transaction generator matching the schema of data/expense_data_1.csv.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORIES = [
+    "Food", "Other", "Transportation", "Social Life", "Household", "Apparel",
+    "Education", "Subscriptions", "Health", "Beauty", "Gift", "Travel",
+    "Dining", "Restaurants", "Hotels", "Flights", "Allowance", "Salary",
+]
+ACCOUNTS = ["CUB - online payment", "Cash", "HDFC Credit Card", "SBI Savings", "UPI Wallet"]
+NOTES = ["Brownie", "Dinner", "Metro", "Groceries", "Rent", "Netflix", "Uber",
+         "Coffee", "Books", "Movie", "Electricity", "Phone bill", "Lunch", "Snacks"]
+INCOME_CATEGORIES = {"Allowance", "Salary"}
+
+
+def generate_transactions(rows: int, years: int = 3, seed: int = 0,
+                          start: str = "2020-01-01") -> pd.DataFrame:
+    """
+    Generates a raw transaction frame with skewed categories over several years.
+
+    Category popularity follows a Zipf-like distribution, amounts are
+    log-normal with a per-category scale, and timestamps are uniform over
+    `years` years at minute resolution.
+
+    Args:
+        rows (int): Number of transactions.
+        years (int): Length of the date range.
+        seed (int): Random seed, so runs are reproducible.
+        start (str): First possible transaction date.
+
+    Returns:
+        pd.DataFrame: Columns Date, Account, Category, Subcategory, Note,
+            Income/Expense, Amount and Currency, with Date as ISO text.
+    """
+    rng = np.random.default_rng(seed)
+
+    weights = 1.0 / np.arange(1, len(CATEGORIES) + 1) ** 1.2
+    category_codes = rng.choice(len(CATEGORIES), size=rows, p=weights / weights.sum())
+    categories = np.array(CATEGORIES, dtype=object)[category_codes]
+
+    scales = rng.uniform(3.0, 7.0, size=len(CATEGORIES))
+    amounts = np.round(rng.lognormal(mean=scales[category_codes], sigma=0.8), 2)
+
+    start_minute = np.datetime64(start, "m").astype(np.int64)
+    span = int(years * 365.25 * 24 * 60)
+    minutes = np.sort(start_minute + rng.integers(0, span, size=rows))[::-1]
+    # ISO timestamps format in C; strftime to the demo's m/d/Y style would
+    # dominate generation time at 10M rows
+    dates = np.datetime_as_string(minutes.astype("datetime64[m]"), unit="m")
+
+    is_income = np.isin(categories, list(INCOME_CATEGORIES))
+    return pd.DataFrame({
+        "Date": dates,
+        "Account": np.array(ACCOUNTS, dtype=object)[
+            rng.choice(len(ACCOUNTS), size=rows, p=[0.5, 0.2, 0.15, 0.1, 0.05])],
+        "Category": categories,
+        "Subcategory": "",
+        "Note": np.array(NOTES, dtype=object)[rng.integers(0, len(NOTES), size=rows)],
+        "Income/Expense": np.where(is_income, "Income", "Expense"),
+        "Amount": amounts,
+        "Currency": "INR",
+    })
+
+
+def write_transactions_csv(path: str, rows: int, **kwargs) -> str:
+    """Writes `generate_transactions(rows, **kwargs)` to `path` as CSV."""
+    generate_transactions(rows, **kwargs).to_csv(path, index=False)
+    return path
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+from finance.ingest import get_derived, is_read_only, normalize_transactions, set_derived
+
+
+class SpendingCube:
+    """
+    Pre-aggregated view of a transaction frame, built in a single pass.
+
+    Holds per-category totals/counts, dense per-day and per-month totals and a
+    category x month matrix, so the summary, insight and chart functions can
+    answer in O(categories) or O(periods) instead of rescanning every row.
+    """
+
+    def __init__(self, categories, category_totals, category_counts,
+                 first_month, category_month, month_totals, first_day,
+                 day_totals, total, count):
+        self.categories = categories
+        self.category_totals = category_totals
+        self.category_counts = category_counts
+        self.first_month = first_month
+        self.category_month = category_month
+        self.month_totals = month_totals
+        self.first_day = first_day
+        self.day_totals = day_totals
+        self.total = total
+        self.count = count
+
+    @property
+    def mean(self) -> float:
+        """Average amount per transaction (NaN for an empty dataset)."""
+        return self.total / self.count if self.count else float("nan")
+
+    @property
+    def category_means(self) -> np.ndarray:
+        """Average amount per transaction for each category."""
+        return self.category_totals / self.category_counts
+
+    @property
+    def months(self) -> pd.PeriodIndex:
+        """Monthly periods covered by `month_totals` and `category_month`."""
+        if self.first_month is None:
+            return pd.PeriodIndex([], freq="M")
+        return pd.period_range(self.first_month, periods=len(self.month_totals), freq="M")
+
+    @property
+    def days(self) -> pd.DatetimeIndex:
+        """Calendar days covered by `day_totals`."""
+        if self.first_day is None:
+            return pd.DatetimeIndex([], dtype="datetime64[ns]", freq="D")
+        return pd.date_range(self.first_day, periods=len(self.day_totals), freq="D")
+
+    def has_category(self, category: str) -> bool:
+        """Returns True if at least one transaction is in `category`."""
+        return category in self.categories
+
+    def category_total(self, category: str) -> float:
+        """Total amount spent in `category` (0.0 if it never occurs)."""
+        if category not in self.categories:
+            return 0.0
+        return float(self.category_totals[self.categories.get_loc(category)])
+
+    def top_category(self) -> tuple:
+        """Returns the (category, total) pair with the highest total."""
+        index = int(np.argmax(self.category_totals))
+        return self.categories[index], float(self.category_totals[index])
+
+    def by_category(self) -> pd.DataFrame:
+        """Per-category totals, counts and means, sorted by category name."""
+        return pd.DataFrame({
+            "Category": self.categories,
+            "Amount": self.category_totals,
+            "Count": self.category_counts,
+            "Mean": self.category_means,
+        })
+
+    def by_day(self) -> pd.Series:
+        """Total amount per calendar day, including days with no spending."""
+        return pd.Series(self.day_totals, index=self.days.rename("Date"), name="Amount")
+
+    def by_month(self) -> pd.Series:
+        """Total amount per month, including months with no spending."""
+        return pd.Series(self.month_totals, index=self.months.rename("Date"), name="Amount")
+
+    def category_by_month(self) -> pd.DataFrame:
+        """Category x month matrix of totals as a labelled DataFrame."""
+        return pd.DataFrame(self.category_month, index=self.categories, columns=self.months)
+
+    def merge(self, other: "SpendingCube") -> "SpendingCube":
+        """
+        Combines two cubes, e.g. the history and a newly appended statement.
+
+        Costs O(categories x months + days), independent of how many rows
+        either cube was built from.
+
+        Args:
+            other (SpendingCube): Cube of the additional transactions.
+
+        Returns:
+            SpendingCube: The cube of both datasets together.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+
+        categories = self.categories.union(other.categories)
+        first_month = min(self.first_month, other.first_month)
+        last_month = max(self.first_month + (len(self.month_totals) - 1),
+                         other.first_month + (len(other.month_totals) - 1))
+        n_months = (last_month - first_month).n + 1
+        first_day = min(self.first_day, other.first_day)
+        last_day = max(self.first_day + pd.Timedelta(days=len(self.day_totals) - 1),
+                       other.first_day + pd.Timedelta(days=len(other.day_totals) - 1))
+        n_days = (last_day - first_day).days + 1
+
+        category_month = np.zeros((len(categories), n_months))
+        category_counts = np.zeros(len(categories), dtype=np.int64)
+        month_totals = np.zeros(n_months)
+        day_totals = np.zeros(n_days)
+        for cube in (self, other):
+            rows = categories.get_indexer(cube.categories)
+            month_offset = (cube.first_month - first_month).n
+            months = slice(month_offset, month_offset + len(cube.month_totals))
+            day_offset = (cube.first_day - first_day).days
+            days = slice(day_offset, day_offset + len(cube.day_totals))
+            category_month[rows, months] += cube.category_month
+            category_counts[rows] += cube.category_counts
+            month_totals[months] += cube.month_totals
+            day_totals[days] += cube.day_totals
+
+        return SpendingCube(
+            categories=categories.rename("Category"),
+            category_totals=category_month.sum(axis=1),
+            category_counts=category_counts,
+            first_month=first_month,
+            category_month=category_month,
+            month_totals=month_totals,
+            first_day=first_day,
+            day_totals=day_totals,
+            total=self.total + other.total,
+            count=self.count + other.count,
+        )
+
+
+def build_spending_cube(df: pd.DataFrame) -> SpendingCube:
+    """
+    Aggregates a transaction frame into a `SpendingCube` in one pass.
+
+    Args:
+        df (pd.DataFrame): DataFrame with financial transactions.
+
+    Returns:
+        SpendingCube: The aggregated view of `df`.
+    """
+    df = normalize_transactions(df)
+
+    amounts = df["Amount"].to_numpy(dtype=np.float64)
+    dates = df["Date"].to_numpy(dtype="datetime64[ns]")
+    category = df["Category"].array
+    codes = category.codes
+    n_categories = len(category.categories)
+
+    if len(df):
+        month_index = dates.astype("datetime64[M]").astype(np.int64)
+        day_index = dates.astype("datetime64[D]").astype(np.int64)
+        first_month_index, first_day_index = month_index.min(), day_index.min()
+        month_index -= first_month_index
+        day_index -= first_day_index
+        n_months = int(month_index.max()) + 1
+        n_days = int(day_index.max()) + 1
+        first_month = pd.Period(np.datetime64(int(first_month_index), "M"), freq="M")
+        first_day = pd.Timestamp(np.datetime64(int(first_day_index), "D"))
+    else:
+        month_index = day_index = np.empty(0, dtype=np.int64)
+        n_months = n_days = 0
+        first_month, first_day = None, None
+
+    # A single weighted bincount over (category, month) cells yields the whole
+    # matrix; every other rollup is a reduction of it or of the day counts.
+    has_category = codes >= 0
+    cells = codes[has_category].astype(np.int64) * n_months + month_index[has_category]
+    category_month = np.bincount(
+        cells, weights=amounts[has_category], minlength=n_categories * n_months
+    ).reshape(n_categories, n_months)
+    category_counts = np.bincount(codes[has_category], minlength=n_categories)
+
+    # Only categories that actually occur, mirroring a groupby on the column
+    observed = category_counts > 0
+    category_month = category_month[observed]
+
+    return SpendingCube(
+        categories=pd.Index(category.categories[observed], name="Category"),
+        category_totals=category_month.sum(axis=1),
+        category_counts=category_counts[observed],
+        first_month=first_month,
+        category_month=category_month,
+        month_totals=np.bincount(month_index, weights=amounts, minlength=n_months),
+        first_day=first_day,
+        day_totals=np.bincount(day_index, weights=amounts, minlength=n_days),
+        total=float(amounts.sum()),
+        count=len(df),
+    )
+
+
+def get_spending_cube(df: pd.DataFrame) -> SpendingCube:
+    """
+    Returns the cube for `df`, building it at most once per read-only frame.
+
+    Frames built by `finance.ingest` cannot be edited in place, so their cube
+    is memoized for the frame's lifetime. Other frames, including copies and
+    slices of those, may still be mutated by the caller and are aggregated
+    afresh on every call.
+
+    Args:
+        df (pd.DataFrame): DataFrame with financial transactions.
+
+    Returns:
+        SpendingCube: The aggregated view of `df`.
+    """
+    if not is_read_only(df):
+        return build_spending_cube(df)
+
+    cube = get_derived(df, "cube")
+    if cube is None:
+        cube = build_spending_cube(df)
+        set_derived(df, "cube", cube)
+    return cube
@@ -1,23 +1,33 @@
 import pandas as pd
 
+from finance.aggregates import get_spending_cube
+from finance.cache import cached_analysis
+from finance.timeseries import CHART_MAX_POINTS, get_time_pyramid
+from finance.trends import generate_trend_insights
+from utils.metrics import timed
 
+
+@timed(kind="analysis")
+@cached_analysis
 def generate_budget_summary(df: pd.DataFrame) -> dict:
     """Summarize budget with total, average, and count of transactions."""
+    cube = get_spending_cube(df)
     return {
-        "total_expenses": df["Amount"].sum(),
-        "average_expense": df["Amount"].mean(),
-        "transaction_count": len(df),
+        "total_expenses": cube.total,
+        "average_expense": cube.mean,
+        "transaction_count": cube.count,
     }
 
 
+@timed(kind="analysis")
+@cached_analysis
 def generate_spending_insights(df: pd.DataFrame, user_type: str) -> list[str]:
     """Provide insights based on spending patterns and user type."""
     insights = []
     if df.empty:
         return ["No spending data available yet."]
 
-    top_category = df.groupby("Category")["Amount"].sum().idxmax()
-    top_value = df.groupby("Category")["Amount"].sum().max()
+    top_category, top_value = get_spending_cube(df).top_category()
 
     insights.append(
         f"Your highest spending is in **{top_category}**: {top_value:.2f}."
@@ -30,14 +40,30 @@ def generate_spending_insights(df: pd.DataFrame, user_type: str) -> list[str]:
         insights.append(
             "Look into tax-saving investment options to reduce liabilities.")
 
+    # Changes, anomalies, recurring charges and the trend, from the cube
+    insights.extend(generate_trend_insights(df))
     return insights
 
 
-def prepare_chart_data(df: pd.DataFrame, group_by: str) -> pd.DataFrame:
-    """Aggregate data for charts by category or date."""
+@timed(kind="analysis")
+@cached_analysis
+def prepare_chart_data(df: pd.DataFrame, group_by: str, start=None, end=None,
+                       max_points: int = None) -> pd.DataFrame:
+    """
+    Aggregate data for charts by category or date.
+
+    For dates, passing a range or `max_points` picks the day/week/month/year
+    rollup that fits the range and downsamples to at most `max_points`; the
+    chosen level is stored in `attrs["resolution"]`.
+    """
     if group_by == "Category":
-        return df.groupby("Category")["Amount"].sum().reset_index()
+        return get_spending_cube(df).by_category()[["Category", "Amount"]]
     elif group_by == "Date":
-        df["Date"] = pd.to_datetime(df["Date"])
-        return df.groupby("Date")["Amount"].sum().reset_index()
+        if start is None and end is None and max_points is None:
+            return get_spending_cube(df).by_day().reset_index()
+        series, resolution = get_time_pyramid(df).series(
+            start, end, max_points or CHART_MAX_POINTS)
+        chart_data = series.reset_index()
+        chart_data.attrs["resolution"] = resolution
+        return chart_data
     return df
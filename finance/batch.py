@@ -0,0 +1,267 @@
+"""
+Headless batch run of the budget summary and spending insights.
+
+Processes many users' transaction files with the same analysis functions the
+app uses and writes one JSON line per user. The output file doubles as the
+checkpoint: rerunning the same command skips users that already succeeded.
+
+Usage:
+    python -m finance.batch exports/ --user-type Student --output results.jsonl
+    python -m finance.batch --manifest users.csv --output results.jsonl --workers 8
+
+A manifest is a CSV with `user_id`, `path` and `user_type` columns; relative
+paths are resolved against the manifest's directory. In directory mode every
+`*.csv` file is one user, named after the file.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from finance.analysis import generate_budget_summary, generate_spending_insights
+from finance.ingest import load_transactions
+
+USER_TYPES = ("Student", "Professional")
+
+# Seconds between progress lines on stderr
+PROGRESS_INTERVAL = 5.0
+
+
+def jobs_from_directory(directory: str, user_type: str) -> list:
+    """Returns one job per CSV file in `directory`, all with the same user type."""
+    return [
+        {"user_id": os.path.splitext(name)[0], "path": os.path.join(directory, name),
+         "user_type": user_type}
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(".csv")
+    ]
+
+
+def jobs_from_manifest(manifest: str, default_user_type: str = None) -> list:
+    """
+    Reads jobs from a manifest CSV.
+
+    Args:
+        manifest (str): Path to a CSV with `user_id`, `path` and `user_type`.
+        default_user_type (str): Used where a row leaves `user_type` empty.
+
+    Returns:
+        list: Job dicts with user_id, path and user_type.
+
+    Raises:
+        ValueError: If a row lacks a path or has an unknown user type.
+    """
+    base = os.path.dirname(os.path.abspath(manifest))
+    jobs = []
+    with open(manifest, newline="", encoding="utf-8-sig") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            path = (row.get("path") or "").strip()
+            if not path:
+                raise ValueError(f"{manifest}:{line}: missing path")
+            user_type = (row.get("user_type") or "").strip() or default_user_type
+            if user_type not in USER_TYPES:
+                raise ValueError(f"{manifest}:{line}: unknown user_type {user_type!r}")
+            jobs.append({
+                "user_id": (row.get("user_id") or "").strip()
+                or os.path.splitext(os.path.basename(path))[0],
+                "path": os.path.join(base, path),
+                "user_type": user_type,
+            })
+    return jobs
+
+
+def read_checkpoint(output: str) -> set:
+    """
+    Returns the user ids already completed in `output`.
+
+    A line cut short by a crash is dropped from the file so that appending
+    resumes on a clean line boundary. Failed users are retried, so their
+    error lines are dropped as well; each user has at most one line.
+    """
+    if not os.path.exists(output):
+        return set()
+    done = set()
+    failed = False
+    good_bytes = 0
+    with open(output, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            good_bytes += len(line)
+            if "error" in record:
+                failed = True
+            else:
+                done.add(record["user_id"])
+    if failed:
+        _drop_failures(output, good_bytes)
+    elif good_bytes != os.path.getsize(output):
+        with open(output, "r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+
+def _drop_failures(output: str, good_bytes: int):
+    """Rewrites the first `good_bytes` of `output` without error lines."""
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, temporary = tempfile.mkstemp(prefix=".checkpoint.", suffix=".tmp", dir=directory)
+    try:
+        with open(output, "rb") as source, os.fdopen(fd, "wb") as target:
+            remaining = good_bytes
+            for line in source:
+                if remaining <= 0:
+                    break
+                remaining -= len(line)
+                if "error" not in json.loads(line):
+                    target.write(line)
+        os.replace(temporary, output)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def process_user(job: dict) -> dict:
+    """
+    Runs the analysis for one user; executed in a worker process.
+
+    Returns:
+        dict: The output record, with an `error` key instead of results if
+            the file could not be analysed.
+    """
+    started = time.perf_counter()
+    record = dict(job)
+    try:
+        df = load_transactions(job["path"])
+        # The per-process result cache would only ever miss here
+        record["summary"] = generate_budget_summary.uncached(df)
+        record["insights"] = generate_spending_insights.uncached(df, job["user_type"])
+        record["rows"] = len(df)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["rows"] = 0
+    record["seconds"] = round(time.perf_counter() - started, 6)
+    return record
+
+
+def _jsonable(value):
+    """Converts a record to plain JSON types; NaN and infinities become null."""
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class _Progress:
+    """Prints completed users, throughput and ETA to stderr at intervals."""
+
+    def __init__(self, total: int, interval: float = PROGRESS_INTERVAL):
+        self.total = total
+        self.interval = interval
+        self.done = self.failed = self.rows = 0
+        self.started = self._last = time.perf_counter()
+
+    def update(self, record: dict):
+        self.done += 1
+        self.failed += "error" in record
+        self.rows += record["rows"]
+        now = time.perf_counter()
+        if now - self._last >= self.interval or self.done == self.total:
+            self._last = now
+            print(self.line(), file=sys.stderr, flush=True)
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else float("inf")
+        return (f"{self.done}/{self.total} users ({self.failed} failed) "
+                f"{rate:,.1f} users/s {self.rows / elapsed if elapsed else 0:,.0f} rows/s "
+                f"eta {eta:,.0f}s")
+
+
+def run_batch(jobs: list, output: str, workers: int = None) -> dict:
+    """
+    Analyses every job not already in `output`, appending one line per user.
+
+    Work is spread over `workers` processes with a bounded number of jobs in
+    flight; each finished record is written and flushed immediately, so an
+    interrupted run loses at most the users that were still being processed.
+
+    Args:
+        jobs (list): Job dicts with user_id, path and user_type.
+        output (str): JSON Lines file to append to (and resume from).
+        workers (int): Worker processes; defaults to the number of cores.
+
+    Returns:
+        dict: Counts of processed, failed and skipped users.
+    """
+    done = read_checkpoint(output)
+    pending = [job for job in jobs if job["user_id"] not in done]
+    progress = _Progress(len(pending))
+    workers = workers or os.cpu_count() or 1
+    print(f"{len(pending)} users to process, {len(jobs) - len(pending)} already done, "
+          f"{workers} workers", file=sys.stderr, flush=True)
+
+    with open(output, "a", encoding="utf-8") as out, ProcessPoolExecutor(workers) as pool:
+        queued = iter(pending)
+        in_flight = set()
+        while True:
+            # Keep a few jobs per worker queued instead of submitting them all
+            for job in queued:
+                in_flight.add(pool.submit(process_user, job))
+                if len(in_flight) >= workers * 4:
+                    break
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(_jsonable(record), allow_nan=False) + "\n")
+                progress.update(record)
+            out.flush()
+
+    return {"processed": progress.done, "failed": progress.failed,
+            "skipped": len(jobs) - len(pending)}
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        description="Generate budget summaries and spending insights for many users.")
+    parser.add_argument("directory", nargs="?", help="Directory of per-user CSV files")
+    parser.add_argument("--manifest", help="CSV with user_id, path and user_type columns")
+    parser.add_argument("--user-type", choices=USER_TYPES, default="Student",
+                        help="User type for directory mode and empty manifest cells")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="JSON Lines output; also the resume checkpoint")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: cores)")
+    args = parser.parse_args(argv)
+
+    if bool(args.directory) == bool(args.manifest):
+        parser.error("give either a directory or --manifest")
+    if args.manifest:
+        jobs = jobs_from_manifest(args.manifest, args.user_type)
+    else:
+        jobs = jobs_from_directory(args.directory, args.user_type)
+
+    counts = run_batch(jobs, args.output, args.workers)
+    print(f"processed {counts['processed']} ({counts['failed']} failed), "
+          f"skipped {counts['skipped']} already done -> {args.output}", file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,14 @@
 import pandas as pd
 import numpy as np
 
+from finance.aggregates import get_spending_cube
+from finance.cache import cached_analysis
+from finance.timeseries import CHART_MAX_POINTS, get_time_pyramid
+from utils.metrics import timed
 
+
+@timed(kind="analysis")
+@cached_analysis
 def generate_budget_summary(df: pd.DataFrame) -> dict:
     """
     Generates a high-level summary of the financial data.
@@ -19,14 +26,17 @@ def generate_budget_summary(df: pd.DataFrame) -> dict:
             "Average Transaction": "$0.00"
         }
 
-    total_spending = df['Amount'].sum()
-    total_transactions = len(df)
-    average_transaction = df['Amount'].mean()
-
-    # Identify top spending category
     if 'Category' in df.columns:
-        top_category = df.groupby('Category')['Amount'].sum().idxmax()
+        cube = get_spending_cube(df)
+        total_spending = cube.total
+        total_transactions = cube.count
+        average_transaction = cube.mean
+        # Identify top spending category
+        top_category, _ = cube.top_category()
     else:
+        total_spending = df['Amount'].sum()
+        total_transactions = len(df)
+        average_transaction = df['Amount'].mean()
         top_category = "N/A"
 
     return {
@@ -37,13 +47,20 @@ def generate_budget_summary(df: pd.DataFrame) -> dict:
     }
 
 
-def prepare_chart_data(df: pd.DataFrame, group_by_col: str) -> pd.DataFrame:
+@timed(kind="analysis")
+@cached_analysis
+def prepare_chart_data(df: pd.DataFrame, group_by_col: str, start=None, end=None,
+                       max_points: int = None) -> pd.DataFrame:
     """
     Prepares data for charting by grouping and summing amounts.
 
     Args:
         df (pd.DataFrame): DataFrame with financial transactions.
         group_by_col (str): The column to group by (e.g., 'Category', 'Date').
+        start: Optional first day of the date range to chart.
+        end: Optional last day of the date range to chart.
+        max_points (int): Optional cap on the number of points for 'Date';
+            the resolution (day/week/month/year) is picked from the range.
 
     Returns:
         pd.DataFrame: A DataFrame ready for plotting.
@@ -51,21 +68,32 @@ def prepare_chart_data(df: pd.DataFrame, group_by_col: str) -> pd.DataFrame:
     if df is None or df.empty or group_by_col not in df.columns:
         return pd.DataFrame({'Amount': []})
 
+    if group_by_col == 'Date' and (start is not None or end is not None or max_points):
+        # Served from the precomputed rollups, downsampled to the point budget
+        series, resolution = get_time_pyramid(df).series(
+            start, end, max_points or CHART_MAX_POINTS)
+        chart_data = series.reset_index()
+        chart_data.attrs['resolution'] = resolution
+        return chart_data
+
     if group_by_col == 'Date':
-        # Ensure 'Date' is a datetime object for proper sorting and grouping
-        df['Date'] = pd.to_datetime(df['Date'])
-        # Resample by month to make the chart cleaner if there's a lot of data
-        chart_data = df.set_index('Date').resample(
-            'M')['Amount'].sum().reset_index()
+        # Monthly totals (empty months included) come straight from the cube
+        chart_data = get_spending_cube(df).by_month().reset_index()
         chart_data['Date'] = chart_data['Date'].dt.strftime(
             '%Y-%m')  # Format date for readability
         return chart_data
 
-    # Group by the specified column and sum the amounts
-    chart_data = df.groupby(group_by_col)['Amount'].sum().reset_index()
+    if group_by_col == 'Category':
+        chart_data = get_spending_cube(df).by_category()[['Category', 'Amount']]
+    else:
+        # Group by the specified column and sum the amounts
+        chart_data = df.groupby(group_by_col, observed=True)[
+            'Amount'].sum().reset_index()
     return chart_data.sort_values(by='Amount', ascending=False)
 
 
+@timed(kind="analysis")
+@cached_analysis
 def generate_spending_insights(df: pd.DataFrame, user_type: str) -> list:
     """
     Generates personalized spending insights based on user type.
@@ -82,10 +110,10 @@ def generate_spending_insights(df: pd.DataFrame, user_type: str) -> list:
 
     insights = []
 
-    # General insights
-    top_category = df.groupby('Category')['Amount'].sum().idxmax()
-    top_category_spend = df.groupby('Category')['Amount'].sum().max()
-    total_spend = df['Amount'].sum()
+    # General insights, answered from the pre-aggregated cube
+    cube = get_spending_cube(df)
+    top_category, top_category_spend = cube.top_category()
+    total_spend = cube.total
 
     insights.append(
         f"Your top spending category is **{top_category}**, where you spent ${top_category_spend:,.2f}.")
@@ -95,7 +123,7 @@ def generate_spending_insights(df: pd.DataFrame, user_type: str) -> list:
         if top_category in ["Food", "Dining", "Restaurants"]:
             insights.append(
                 "Insight for Students: A significant portion of your budget goes to food. Consider exploring campus meal plans or cooking at home to save money.")
-        if "Subscriptions" in df['Category'].unique():
+        if cube.has_category("Subscriptions"):
             insights.append(
                 "Insight for Students: Review your subscriptions. Services like Spotify and Netflix often offer student discounts.")
 
@@ -103,9 +131,8 @@ def generate_spending_insights(df: pd.DataFrame, user_type: str) -> list:
         if top_category in ["Travel", "Flights", "Hotels"]:
             insights.append(
                 "Insight for Professionals: Your travel expenses are high. Look into loyalty programs or travel credit cards to maximize rewards on your spending.")
-        if "Transportation" in df['Category'].unique():
-            transport_spend = df[df['Category'] ==
-                                 'Transportation']['Amount'].sum()
+        if cube.has_category("Transportation"):
+            transport_spend = cube.category_total("Transportation")
             if (transport_spend / total_spend) > 0.15:  # If more than 15% of spend is on transport
                 insights.append(
                     "Insight for Professionals: You spend a notable amount on transportation. If you're commuting, consider pre-tax commuter benefits if your employer offers them.")
@@ -0,0 +1,79 @@
+import functools
+import hashlib
+
+import pandas as pd
+
+from finance.ingest import get_derived, is_read_only, set_derived
+from utils.cache import LRUCache
+from utils.metrics import register_collector
+
+# Process-wide cache of analysis results, shared by every session so that
+# navigating between dashboard pages does not recompute anything.
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+
+result_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, max_bytes=RESULT_CACHE_BYTES)
+register_collector(lambda: {
+    f"finbot_result_cache_{name}": value
+    for name, value in result_cache.stats().items()
+})
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Returns a content hash of a transaction frame.
+
+    The hash is computed with vectorized row hashing, so it costs one fast
+    pass over the data. For read-only frames from `finance.ingest` it is
+    computed once and remembered for the frame's lifetime; copies and slices
+    of them can be edited, so theirs is computed on every call.
+
+    Args:
+        df (pd.DataFrame): DataFrame with financial transactions.
+
+    Returns:
+        str: A hex digest identifying the frame's contents.
+    """
+    read_only = is_read_only(df)
+    if read_only:
+        fingerprint = get_derived(df, "fingerprint")
+        if fingerprint is not None:
+            return fingerprint
+
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    digest.update(",".join(map(str, df.columns)).encode())
+    fingerprint = digest.hexdigest()
+
+    if read_only:
+        set_derived(df, "fingerprint", fingerprint)
+    return fingerprint
+
+
+def cached_analysis(func):
+    """
+    Caches an analysis function's result by dataset fingerprint and arguments.
+
+    The wrapped function must take the transaction frame as its first
+    argument. Cached results are shared across sessions and must be treated
+    as read-only by callers.
+    """
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        if df is None:
+            return func(df, *args, **kwargs)
+        key = (func.__module__, func.__qualname__, dataset_fingerprint(df),
+               args, tuple(sorted(kwargs.items())))
+        result = result_cache.get(key)
+        if result is None:
+            result = func(df, *args, **kwargs)
+            result_cache.set(key, result)
+        return result
+
+    wrapper.uncached = func
+    return wrapper
+
+
+def invalidate_fingerprint(fingerprint: str) -> int:
+    """Drops every cached result computed from the dataset with `fingerprint`."""
+    return result_cache.discard_where(lambda key: key[2] == fingerprint)
@@ -0,0 +1,328 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+import pandas as pd
+
+from finance.cache import dataset_fingerprint, invalidate_fingerprint
+from finance.ingest import load_parquet, load_transactions, save_parquet, set_derived
+from utils.metrics import register_collector
+
+# --- CONFIGURATION ---
+DEMO_DATASET = "data/expense_data_1.csv"
+
+_MB = 1024 * 1024
+# Bytes one session's private frame may keep in memory once the session is
+# briefly idle; a larger frame is spilled after LARGE_IDLE_SECONDS.
+SESSION_MEMORY_BUDGET = int(float(os.getenv("FINBOT_SESSION_MEMORY_MB", "64")) * _MB)
+# Bytes all sessions' private frames may keep in memory together; past it the
+# least recently used ones are spilled to disk.
+GLOBAL_MEMORY_BUDGET = int(float(os.getenv("FINBOT_DATASET_MEMORY_MB", "512")) * _MB)
+# Frames of sessions idle for this many seconds are spilled regardless.
+SPILL_IDLE_SECONDS = float(os.getenv("FINBOT_SPILL_IDLE_SECONDS", "600"))
+# Frames over the session budget are spilled after this many idle seconds;
+# while the user keeps interacting the frame and its aggregates stay resident.
+LARGE_IDLE_SECONDS = float(os.getenv("FINBOT_SPILL_LARGE_IDLE_SECONDS", "30"))
+# Parent of the spill directory. Spilled frames hold users' transactions, so
+# each process writes them to its own directory that only its user can read.
+SPILL_DIR = os.getenv("FINBOT_SPILL_DIR") or tempfile.gettempdir()
+
+
+# --- SHARED DATASETS ---
+# Files such as the demo dataset are parsed once per process and the same
+# read-only frame is handed to every session, together with its aggregates.
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_dataset(path: str) -> pd.DataFrame:
+    """
+    Returns the transactions in `path`, parsed once per process.
+
+    Every caller gets the same normalized frame, whose buffers are read-only;
+    it must not be modified. The file is parsed again if it changes on disk.
+
+    Args:
+        path (str): A transaction CSV shipped with the app.
+
+    Returns:
+        pd.DataFrame: A normalized, read-only transaction frame.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _shared_lock:
+        entry = _shared.get(path)
+        if entry is None or entry[0] != version:
+            entry = _shared[path] = (version, load_transactions(path))
+    return entry[1]
+
+
+def _is_shared(df: pd.DataFrame) -> bool:
+    with _shared_lock:
+        return any(entry[1] is df for entry in _shared.values())
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# --- SESSION DATASETS ---
+class SessionDataset:
+    """
+    One session's transaction frame, kept in memory or spilled to disk.
+
+    Kept in the session's state and created by `DatasetStore.open`. `get`
+    returns the frame wherever it lives, reading it back from disk if it was
+    spilled; callers never see the difference. The spill file is removed when
+    the session (and with it this object) goes away.
+    """
+
+    def __init__(self, store: "DatasetStore"):
+        self.id = uuid.uuid4().hex
+        self.path = os.path.join(store.directory, f"{self.id}.parquet")
+        self.shared = False
+        self.nbytes = 0
+        self.last_access = time.monotonic()
+        self._store = store
+        self._frame = None
+        # While spilled, a weak reference lets a rerun that still holds the
+        # frame keep getting the same object instead of a fresh copy
+        self._weak = None
+        self._fingerprint = None
+        self._on_disk = False
+        self._file_bytes = 0
+        self._lock = threading.Lock()
+        weakref.finalize(self, _remove_file, self.path)
+
+    @property
+    def resident(self) -> bool:
+        """True while the frame is held in memory."""
+        return self._frame is not None
+
+    @property
+    def spilled(self) -> bool:
+        """True while the frame lives only on disk."""
+        return self._frame is None and self._on_disk
+
+    def get(self):
+        """
+        Returns the session's frame, or None if it has none.
+
+        Returns:
+            pd.DataFrame | None: A normalized, read-only transaction frame.
+        """
+        with self._lock:
+            self.last_access = time.monotonic()
+            df = self._frame
+            if df is None and self._on_disk:
+                df = self._weak() if self._weak is not None else None
+                if df is None:
+                    df = self._reload()
+                self._frame = df
+        self._store.enforce(active=self)
+        return df
+
+    def set(self, df):
+        """
+        Replaces the session's frame and drops results cached for the old one.
+
+        Args:
+            df (pd.DataFrame | None): A normalized frame, or None to clear.
+        """
+        with self._lock:
+            old_fingerprint = None if self.shared else self._current_fingerprint()
+            self._frame = df
+            self._weak = None
+            self._fingerprint = None
+            self.shared = df is not None and _is_shared(df)
+            self.nbytes = 0 if df is None else _frame_bytes(df)
+            self.last_access = time.monotonic()
+            if self._on_disk:
+                _remove_file(self.path)
+                self._on_disk = False
+        if old_fingerprint is not None:
+            invalidate_fingerprint(old_fingerprint)
+        self._store.enforce(active=self)
+
+    def clear(self):
+        """Drops the session's frame."""
+        self.set(None)
+
+    def spill(self) -> bool:
+        """
+        Moves a private frame out of memory into the spill file.
+
+        The file is written once per frame; spilling a frame that was read
+        back and not replaced only drops it from memory.
+
+        Returns:
+            bool: True if memory was released.
+        """
+        with self._lock:
+            if self._frame is None or self.shared:
+                return False
+            if not self._on_disk:
+                partial = f"{self.path}.{uuid.uuid4().hex}.tmp"
+                save_parquet(self._frame, partial)
+                os.replace(partial, self.path)
+                self._file_bytes = os.path.getsize(self.path)
+                self._on_disk = True
+            self._fingerprint = dataset_fingerprint(self._frame)
+            self._weak = weakref.ref(self._frame)
+            self._frame = None
+        self._store.count("spills")
+        return True
+
+    def _reload(self) -> pd.DataFrame:
+        df = load_parquet(self.path)
+        # Results cached for this data stay valid; seeding the fingerprint
+        # lets them be found without hashing the reloaded frame again
+        set_derived(df, "fingerprint", self._fingerprint)
+        self._weak = weakref.ref(df)
+        self._store.count("reloads")
+        return df
+
+    def _current_fingerprint(self):
+        if self._frame is not None:
+            return dataset_fingerprint(self._frame)
+        return self._fingerprint if self._on_disk else None
+
+    def info(self) -> dict:
+        """Resident and spilled bytes of this session, for reporting."""
+        return {
+            "session": self.id[:8],
+            "resident_bytes": self.nbytes if self.resident else 0,
+            "spilled_bytes": self._file_bytes if self.spilled else 0,
+            "shared": self.shared,
+            "idle_seconds": time.monotonic() - self.last_access,
+        }
+
+
+class DatasetStore:
+    """
+    Tracks every session's dataset and keeps their memory within budget.
+
+    After each access, frames of other sessions are spilled when they have
+    been idle for `idle_seconds`, or for `large_idle_seconds` if they exceed
+    `session_budget`, and the least recently used ones while the private
+    frames held in memory exceed `global_budget`. The session being served
+    is never spilled. Shared frames are held once per process and are not
+    counted against either budget.
+
+    Spill files go to a new directory under `parent`, readable by the
+    process's user only and removed when the store goes away.
+    """
+
+    def __init__(self, parent: str = SPILL_DIR, session_budget: int = SESSION_MEMORY_BUDGET,
+                 global_budget: int = GLOBAL_MEMORY_BUDGET,
+                 idle_seconds: float = SPILL_IDLE_SECONDS,
+                 large_idle_seconds: float = LARGE_IDLE_SECONDS):
+        os.makedirs(parent, exist_ok=True)
+        # mkdtemp creates the directory with mode 0o700 under a random name
+        self.directory = tempfile.mkdtemp(prefix="finbot-spill-", dir=parent)
+        weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.idle_seconds = idle_seconds
+        self.large_idle_seconds = large_idle_seconds
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.spills = 0
+        self.reloads = 0
+
+    def open(self) -> SessionDataset:
+        """Creates the dataset slot of a new session."""
+        dataset = SessionDataset(self)
+        with self._lock:
+            self._sessions.add(dataset)
+        return dataset
+
+    def count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def enforce(self, active: SessionDataset = None) -> int:
+        """
+        Spills frames until idle time and both memory budgets are respected.
+
+        Args:
+            active (SessionDataset): The session being served; never spilled.
+
+        Returns:
+            int: The number of frames spilled.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                dataset for dataset in self._sessions
+                if dataset is not active and dataset.resident and not dataset.shared
+            ]
+        candidates.sort(key=lambda dataset: dataset.last_access)
+        resident = sum(dataset.nbytes for dataset in candidates)
+        if active is not None and active.resident and not active.shared:
+            resident += active.nbytes
+
+        spilled = 0
+        for dataset in candidates:
+            idle = now - dataset.last_access
+            if (resident <= self.global_budget
+                    and idle < self.idle_seconds
+                    and (dataset.nbytes <= self.session_budget
+                         or idle < self.large_idle_seconds)):
+                continue
+            if dataset.spill():
+                resident -= dataset.nbytes
+                spilled += 1
+        return spilled
+
+    def sessions(self) -> list:
+        """Returns `SessionDataset.info` for every open session."""
+        with self._lock:
+            datasets = list(self._sessions)
+        return [dataset.info() for dataset in datasets]
+
+    def stats(self) -> dict:
+        """Returns memory and spill figures for the metrics panel and exporter."""
+        sessions = self.sessions()
+        with _shared_lock:
+            shared_bytes = sum(_frame_bytes(entry[1]) for entry in _shared.values())
+        return {
+            "sessions": len(sessions),
+            "resident_bytes": sum(s["resident_bytes"] for s in sessions if not s["shared"]),
+            "shared_bytes": shared_bytes,
+            "spilled_sessions": sum(1 for s in sessions if s["spilled_bytes"]),
+            "spilled_bytes": sum(s["spilled_bytes"] for s in sessions),
+            "spills": self.spills,
+            "reloads": self.reloads,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_dataset_store() -> DatasetStore:
+    """Returns the process-wide dataset store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = DatasetStore()
+                register_collector(lambda: {
+                    f"finbot_dataset_{name}": value
+                    for name, value in store.stats().items()
+                })
+                _store = store
+    return _store
@@ -0,0 +1,110 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from finance.aggregates import build_spending_cube, get_spending_cube
+from finance.cache import dataset_fingerprint
+from finance.ingest import (
+    concat_transactions,
+    get_derived,
+    normalize_transactions,
+    set_derived,
+    transaction_keys,
+)
+
+
+def _sorted_keys(df: pd.DataFrame) -> np.ndarray:
+    """Sorted transaction keys of a normalized frame, computed once per frame."""
+    keys = get_derived(df, "keys")
+    if keys is None:
+        keys = np.sort(transaction_keys(df))
+        set_derived(df, "keys", keys)
+    return keys
+
+
+def _is_known(known: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Boolean mask of `keys` present in the sorted array `known`."""
+    if not len(known):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(known, keys), len(known) - 1)
+    return known[positions] == keys
+
+
+def merge_transactions(frames: list) -> tuple:
+    """
+    Combines several statements (e.g. one per account or year) into one frame.
+
+    A transaction that appears in more than one file, such as a card payment
+    exported by both the bank and the card issuer, is kept once. Repeats
+    within a single file are genuine and are kept.
+
+    Args:
+        frames (list): Transaction frames, in priority order.
+
+    Returns:
+        tuple: (merged frame, number of cross-file duplicates skipped).
+    """
+    frames = [normalize_transactions(df) for df in frames]
+    if len(frames) == 1:
+        return frames[0], 0
+
+    known = np.empty(0, dtype=np.uint64)
+    kept = []
+    skipped = 0
+    for df in frames:
+        keys = transaction_keys(df)
+        present = _is_known(known, keys)
+        skipped += int(present.sum())
+        kept.append(df[~present] if present.any() else df)
+        new_keys = np.unique(keys[~present])
+        known = np.insert(known, np.searchsorted(known, new_keys), new_keys)
+
+    merged = concat_transactions(kept)
+    set_derived(merged, "keys", known)
+    return merged, skipped
+
+
+def append_transactions(existing: pd.DataFrame, new: pd.DataFrame) -> tuple:
+    """
+    Merges newly uploaded transactions into an existing dataset.
+
+    Rows of `new` whose Date, Account, Amount and Note already occur in
+    `existing` are dropped. The merged frame inherits the existing
+    aggregates, updated with the new rows only, so the rollups cost
+    O(new rows) instead of a recompute over the whole history.
+
+    Args:
+        existing (pd.DataFrame): The current dataset (may be None).
+        new (pd.DataFrame): The transactions to add.
+
+    Returns:
+        tuple: (merged frame, number of rows added, number of duplicates skipped).
+    """
+    new = normalize_transactions(new)
+    if existing is None:
+        return new, len(new), 0
+    existing = normalize_transactions(existing)
+
+    known = _sorted_keys(existing)
+    new_keys = transaction_keys(new)
+    already_present = _is_known(known, new_keys)
+
+    added = new[~already_present]
+    duplicates = int(already_present.sum())
+    if added.empty:
+        return existing, 0, duplicates
+
+    merged = concat_transactions([existing, added])
+
+    # Carry the derived state forward instead of recomputing it from scratch
+    added_keys = np.sort(new_keys[~already_present])
+    set_derived(merged, "keys", np.insert(known, np.searchsorted(known, added_keys), added_keys))
+    set_derived(merged, "cube", get_spending_cube(existing).merge(build_spending_cube(added)))
+    # The added rows are hashed over every column: rows that share their
+    # de-duplication key can still differ in Category or Income/Expense
+    digest = hashlib.blake2b(dataset_fingerprint(existing).encode(), digest_size=16)
+    digest.update(dataset_fingerprint(added).encode())
+    set_derived(merged, "fingerprint", digest.hexdigest())
+
+    return merged, len(added), duplicates
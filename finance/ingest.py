@@ -0,0 +1,435 @@
+import csv
+import io
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# --- SCHEMA ---
+# Canonical columns of a normalized transaction frame and the dtype each one
+# is stored as. Columns not listed here are dropped at ingestion time.
+TRANSACTION_SCHEMA = {
+    "Date": "datetime64[ns]",
+    "Account": "category",
+    "Category": "category",
+    "Subcategory": "category",
+    "Note": "string",
+    "Income/Expense": "category",
+    "Amount": "float64",
+    "Currency": "category",
+}
+
+# Header spellings used by common bank and card exports, mapped to the schema
+# column they hold. Matching is case-insensitive.
+COLUMN_ALIASES = {
+    "transaction date": "Date",
+    "posted date": "Date",
+    "posting date": "Date",
+    "value date": "Date",
+    "account name": "Account",
+    "card": "Account",
+    "description": "Note",
+    "details": "Note",
+    "memo": "Note",
+    "narration": "Note",
+    "type": "Income/Expense",
+    "transaction type": "Income/Expense",
+    "sub category": "Subcategory",
+    "amount (inr)": "Amount",
+    "transaction amount": "Amount",
+}
+
+# Columns an uploaded file must provide for the analysis functions to work.
+REQUIRED_COLUMNS = ("Date", "Category", "Amount")
+
+# Derived integer column holding the exact amount in cents (minor units).
+CENTS_COLUMN = "AmountCents"
+
+# Columns identifying a transaction when de-duplicating appended statements.
+KEY_COLUMNS = ("Date", "Account", CENTS_COLUMN, "Note")
+
+# Rows read per chunk; keeps peak memory flat for large bank exports.
+DEFAULT_CHUNKSIZE = 100_000
+
+# String storage of normalized frames; unlike Arrow's, its buffer can be
+# made read-only.
+_LOCKABLE_STRING = pd.StringDtype("python")
+
+# Ids of the frames built by `_freeze`. Only these are known to be locked:
+# a copy or slice of one passes `is_normalized` but can be edited.
+_read_only = set()
+
+# Values derived from read-only frames, such as aggregates and fingerprints,
+# keyed by the frame's id and dropped when it is collected.
+_derived = {}
+
+
+def is_read_only(df: pd.DataFrame) -> bool:
+    """Returns True if `df` was built (and locked) by this module."""
+    return df is not None and id(df) in _read_only
+
+
+def get_derived(df: pd.DataFrame, name: str):
+    """Returns a value previously stored for `df` under `name`, or None."""
+    if not is_read_only(df):
+        return None
+    return _derived.get(id(df), {}).get(name)
+
+
+def set_derived(df: pd.DataFrame, name: str, value):
+    """
+    Remembers `value` for the lifetime of the read-only frame `df`.
+
+    Nothing is stored for other frames, since they may change afterwards.
+    """
+    if not is_read_only(df):
+        return
+    key = id(df)
+    entry = _derived.get(key)
+    if entry is None:
+        entry = _derived[key] = {}
+        weakref.finalize(df, _derived.pop, key, None)
+    entry[name] = value
+
+
+def clear_derived():
+    """Forgets every derived value (used by benchmarks to time cold paths)."""
+    for entry in _derived.values():
+        entry.clear()
+
+
+def _read_header(source) -> list:
+    """Returns the raw header row of a CSV path or file-like object."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            line = f.readline()
+    else:
+        position = source.tell()
+        line = source.readline()
+        source.seek(position)
+        if isinstance(line, bytes):
+            line = line.decode("utf-8-sig")
+    return next(csv.reader(io.StringIO(line)), [])
+
+
+def _canonical_name(name: str, schema: dict):
+    """Returns the schema column a header refers to, or None."""
+    name = name.strip()
+    if name in schema:
+        return name
+    folded = name.lower()
+    for column in schema:
+        if column.lower() == folded:
+            return column
+    alias = COLUMN_ALIASES.get(folded)
+    return alias if alias in schema else None
+
+
+def _select_columns(header: list, schema: dict) -> tuple:
+    """
+    Maps schema columns to their position in the file header.
+
+    Bank exports (including the demo file) sometimes repeat a header such as
+    `Note` or `Account`; only the first occurrence of each name is used so the
+    repeated copies never show up as mangled `Note.1` columns. Headers are
+    matched case-insensitively and through `COLUMN_ALIASES`; an exact schema
+    name takes precedence over an alias for the same column.
+    """
+    positions = {}
+    aliased = {}
+    for index, name in enumerate(header):
+        column = _canonical_name(name, schema)
+        if column is None:
+            continue
+        target = positions if name.strip() in schema else aliased
+        target.setdefault(column, index)
+    for column, index in aliased.items():
+        positions.setdefault(column, index)
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in positions]
+    if missing:
+        raise ValueError(
+            f"CSV must contain the following columns: {', '.join(REQUIRED_COLUMNS)}"
+        )
+
+    ordered = sorted(positions.items(), key=lambda item: item[1])
+    return [index for _, index in ordered], [name for name, _ in ordered]
+
+
+def _parse_dates(values: pd.Series, date_format) -> pd.Series:
+    """Parses the `Date` column exactly once, falling back to mixed formats."""
+    try:
+        return pd.to_datetime(values, format=date_format, cache=True)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, format="mixed", errors="coerce", cache=True)
+
+
+def _normalize_chunk(chunk: pd.DataFrame, date_format) -> pd.DataFrame:
+    """Parses dates and drops rows without a usable date or amount."""
+    chunk["Date"] = _parse_dates(chunk["Date"], date_format)
+    return chunk.dropna(subset=["Date", "Amount"])
+
+
+def _missing_column(dtype: str, length: int) -> pd.Series:
+    """An all-missing column of `dtype`, standing in for one a frame lacks."""
+    return pd.Series(index=range(length), dtype=dtype)
+
+
+def _union_categories(parts: list) -> pd.Categorical:
+    """Unions categorical parts, some of which may be entirely missing."""
+    parts = [part.astype("category").array for part in parts]
+    # An all-missing part has empty categories of another dtype (float or
+    # object), which union_categoricals rejects; align them to the dtype of
+    # the parts that have values
+    dtypes = [part.categories.dtype for part in parts if len(part.categories)]
+    target = dtypes[0] if dtypes else np.dtype(object)
+    parts = [
+        part if part.categories.dtype == target
+        else part.set_categories(part.categories.astype(target))
+        for part in parts
+    ]
+    return pd.api.types.union_categoricals(parts, sort_categories=True)
+
+
+def _concat_chunks(chunks: list, columns: list, schema: dict) -> dict:
+    """Concatenates normalized chunks into plain column arrays."""
+    columns_data = {}
+    for col in columns:
+        parts = [
+            chunk[col] if col in chunk.columns else _missing_column(schema[col], len(chunk))
+            for chunk in chunks
+        ]
+        if schema[col] == "category":
+            columns_data[col] = _union_categories(parts)
+        elif col == "Date":
+            columns_data[col] = np.concatenate(
+                [part.to_numpy(dtype="datetime64[ns]") for part in parts])
+        elif schema[col] == "string":
+            columns_data[col] = pd.array(
+                np.concatenate([part.to_numpy(dtype=object) for part in parts]),
+                dtype="string")
+        else:
+            columns_data[col] = np.concatenate(
+                [part.to_numpy(dtype=schema[col]) for part in parts])
+    return columns_data
+
+
+def _lock_buffer(values) -> bool:
+    """
+    Makes the numpy buffer behind `values` read-only.
+
+    Categorical codes and Python-backed strings are reached through pandas
+    internals (`_codes`, `_ndarray`), checked here rather than assumed so a
+    pandas upgrade that moves them leaves the column editable instead of
+    failing. Returns False when the buffer could not be locked.
+    """
+    if isinstance(values, pd.Categorical):
+        buffer = getattr(values, "_codes", None)
+    elif isinstance(values.dtype, pd.StringDtype):
+        buffer = getattr(values, "_ndarray", None)
+    else:
+        buffer = values
+    if not isinstance(buffer, np.ndarray):
+        return False
+    buffer.flags.writeable = False
+    return True
+
+
+def _freeze(columns_data: dict) -> pd.DataFrame:
+    """
+    Builds a frame whose buffers are all read-only.
+
+    Writing into the frame in place (`df.loc[0, "Category"] = ...`) raises
+    ValueError. Arrow-backed strings cannot be locked, so string columns are
+    kept as Python strings in a read-only object array. Adding or replacing
+    whole columns is still possible; code that needs to do so works on a
+    copy, which gets its own derived values.
+
+    The frame is only registered as read-only (enabling `set_derived`) when
+    every column was locked; otherwise it is returned as an ordinary frame.
+    """
+    locked = True
+    for col, values in columns_data.items():
+        if isinstance(values.dtype, pd.StringDtype) and values.dtype.storage != "python":
+            values = columns_data[col] = values.astype(_LOCKABLE_STRING)
+        locked &= _lock_buffer(values)
+    df = pd.DataFrame(columns_data, copy=False)
+    if locked:
+        _read_only.add(id(df))
+        weakref.finalize(df, _read_only.discard, id(df))
+    return df
+
+
+def normalize_transactions(df: pd.DataFrame, schema: dict = TRANSACTION_SCHEMA) -> pd.DataFrame:
+    """
+    Normalizes an already loaded DataFrame to the transaction schema.
+
+    Frames that are already normalized are returned unchanged, so every
+    analysis function can call this without paying for a second parse.
+
+    Args:
+        df (pd.DataFrame): DataFrame with financial transactions.
+        schema (dict): Mapping of column name to stored dtype.
+
+    Returns:
+        pd.DataFrame: A normalized, read-only transaction frame.
+    """
+    if is_normalized(df):
+        return df
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(
+            f"CSV must contain the following columns: {', '.join(REQUIRED_COLUMNS)}"
+        )
+
+    columns = [col for col in schema if col in df.columns]
+    chunk = df[columns].copy()
+    chunk["Amount"] = pd.to_numeric(chunk["Amount"], errors="coerce")
+    if not pd.api.types.is_datetime64_any_dtype(chunk["Date"]):
+        chunk = _normalize_chunk(chunk, None)
+    else:
+        chunk = chunk.dropna(subset=["Date", "Amount"])
+    return _finalize([chunk], columns, schema)
+
+
+def _finalize(chunks: list, columns: list, schema: dict) -> pd.DataFrame:
+    """Assembles chunks, adds the cents column and freezes the result."""
+    if not chunks:
+        chunks = [pd.DataFrame({col: pd.Series(dtype="object") for col in columns})]
+    columns_data = _concat_chunks(chunks, columns, schema)
+    columns_data[CENTS_COLUMN] = np.rint(
+        columns_data["Amount"] * 100).astype(np.int64)
+    return _freeze(columns_data)
+
+
+def is_normalized(df: pd.DataFrame) -> bool:
+    """Returns True if `df` was produced by this module."""
+    return (
+        df is not None
+        and CENTS_COLUMN in df.columns
+        and pd.api.types.is_datetime64_any_dtype(df["Date"])
+        and isinstance(df["Category"].dtype, pd.CategoricalDtype)
+    )
+
+
+def transaction_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns a stable 64-bit hash per transaction of Date, Account, Amount and Note.
+
+    The hash depends only on the values, not on row order or categorical
+    codes, so the same transaction hashes identically in different uploads.
+
+    Args:
+        df (pd.DataFrame): A normalized transaction frame.
+
+    Returns:
+        np.ndarray: uint64 keys, one per row.
+    """
+    # Always the same columns: a key column a file lacks hashes as missing,
+    # exactly like a missing value in a file that has it
+    keys = pd.DataFrame({
+        col: df[col].reset_index(drop=True) if col in df.columns
+        else _missing_column(TRANSACTION_SCHEMA[col], len(df))
+        for col in KEY_COLUMNS
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def concat_transactions(frames: list) -> pd.DataFrame:
+    """
+    Concatenates normalized frames into one normalized, read-only frame.
+
+    The result has every schema column found in any of the frames; rows from
+    a frame without one of them hold missing values there.
+    """
+    columns = [col for col in TRANSACTION_SCHEMA if any(col in f.columns for f in frames)]
+    return _finalize(frames, columns, TRANSACTION_SCHEMA)
+
+
+def load_transactions(
+    source,
+    schema: dict = TRANSACTION_SCHEMA,
+    date_format: str = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> pd.DataFrame:
+    """
+    Reads a transaction CSV once into a typed, normalized frame.
+
+    Only schema columns are read, dtypes are fixed up front instead of being
+    guessed, `Date` is parsed a single time and `Category`/`Account` are stored
+    as categoricals. Large files are read in chunks of `chunksize` rows.
+
+    Args:
+        source: A file path or a binary/text file-like object (e.g. an upload).
+        schema (dict): Mapping of column name to stored dtype.
+        date_format (str): Optional strptime format for the `Date` column.
+        chunksize (int): Number of rows parsed per chunk.
+
+    Returns:
+        pd.DataFrame: A normalized, read-only transaction frame.
+
+    Raises:
+        ValueError: If a required column is missing.
+    """
+    header = _read_header(source)
+    usecols, names = _select_columns(header, schema)
+
+    dtypes = {name: schema[name] for name in names if name != "Date"}
+    reader = pd.read_csv(
+        source,
+        header=0,
+        usecols=usecols,
+        names=names,
+        dtype=dtypes,
+        thousands=",",
+        skipinitialspace=True,
+        chunksize=chunksize,
+    )
+
+    chunks = []
+    with reader:
+        for chunk in reader:
+            chunks.append(_normalize_chunk(chunk, date_format))
+
+    return _finalize(chunks, names, schema)
+
+
+def save_parquet(df: pd.DataFrame, path: str):
+    """
+    Writes a normalized frame to a compressed Parquet file.
+
+    Args:
+        df (pd.DataFrame): A normalized transaction frame.
+        path (str): Destination file; replaced if it exists.
+    """
+    df.to_parquet(path, index=False, compression="zstd")
+
+
+def load_parquet(path: str, schema: dict = TRANSACTION_SCHEMA) -> pd.DataFrame:
+    """
+    Reads a frame written by `save_parquet` back into a normalized frame.
+
+    Parquet keeps categories and the exact column types, except for columns
+    that were entirely empty; those are cast back to the schema's dtype.
+
+    Args:
+        path (str): A file written by `save_parquet`.
+        schema (dict): Mapping of column name to stored dtype.
+
+    Returns:
+        pd.DataFrame: A normalized, read-only transaction frame.
+    """
+    df = pd.read_parquet(path)
+    columns_data = {}
+    for col in df.columns:
+        values = df[col]
+        dtype = schema.get(col)
+        if dtype is not None and str(values.dtype) != dtype:
+            values = values.astype(dtype)
+        if isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+            columns_data[col] = values.array
+        else:
+            columns_data[col] = values.to_numpy()
+    return _freeze(columns_data)
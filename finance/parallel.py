@@ -0,0 +1,107 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from finance.incremental import merge_transactions
+from finance.ingest import concat_transactions, load_transactions
+
+# --- CONFIGURATION ---
+# Worker processes used to parse several files at once; defaults to one per core.
+MAX_WORKERS = int(os.getenv("FINBOT_INGEST_WORKERS", "0")) or os.cpu_count() or 1
+
+# Below this many bytes in total, files are parsed in-process: starting
+# workers and shipping frames back costs more than parsing them.
+PARALLEL_MIN_BYTES = int(os.getenv("FINBOT_INGEST_PARALLEL_MIN_BYTES", str(8 * 1024 * 1024)))
+
+
+def _source_size(source) -> int:
+    """Returns the size in bytes of a path or in-memory upload."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    return getattr(source, "size", 0)
+
+
+def _source_name(source, position: int) -> str:
+    """Names a source in error messages: its path, upload name or position."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    return getattr(source, "name", None) or f"file {position}"
+
+
+def _portable(source):
+    """Converts a source into something that can be sent to a worker process."""
+    if isinstance(source, (str, os.PathLike, bytes, bytearray)):
+        return source
+    # File-like uploads (e.g. Streamlit's UploadedFile) are shipped as bytes
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    return source.read()
+
+
+def _load_one(source):
+    """Parses one file; runs inside a worker process."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return load_transactions(source)
+
+
+def _context():
+    # Forking a threaded server (Streamlit) is unsafe; forkserver children
+    # start from a clean single-threaded process instead.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def load_transaction_files(sources: list, max_workers: int = None,
+                           dedupe: bool = True) -> tuple:
+    """
+    Parses several transaction files in parallel and merges them.
+
+    Each file is parsed by `load_transactions` in its own worker process and
+    normalized to the common schema; headers from other banks are mapped via
+    `COLUMN_ALIASES`. Transactions exported in more than one file are kept once.
+
+    Args:
+        sources (list): Paths, raw CSV bytes or file-like uploads.
+        max_workers (int): Worker processes; defaults to `FINBOT_INGEST_WORKERS`
+            or the number of cores.
+        dedupe (bool): Drop transactions that repeat across files.
+
+    Returns:
+        tuple: (merged frame, number of cross-file duplicates skipped).
+
+    Raises:
+        ValueError: If a file lacks a required column; the message names the file.
+    """
+    sources = list(sources)
+    names = [_source_name(source, i) for i, source in enumerate(sources, start=1)]
+    workers = min(max_workers or MAX_WORKERS, len(sources))
+    parallel = workers > 1 and sum(map(_source_size, sources)) >= PARALLEL_MIN_BYTES
+
+    if parallel:
+        with ProcessPoolExecutor(workers, mp_context=_context()) as pool:
+            futures = [pool.submit(_load_one, _portable(s)) for s in sources]
+            frames = [_result(f, name) for f, name in zip(futures, names)]
+    else:
+        frames = []
+        for source, name in zip(sources, names):
+            try:
+                frames.append(_load_one(source))
+            except ValueError as e:
+                raise ValueError(f"{name}: {e}") from e
+
+    if not dedupe:
+        return concat_transactions(frames), 0
+    return merge_transactions(frames)
+
+
+def _result(future, name: str):
+    """Waits for a worker's frame, naming the file in any schema error."""
+    try:
+        return future.result()
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from e
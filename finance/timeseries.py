@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from finance.aggregates import get_spending_cube
+from finance.ingest import get_derived, normalize_transactions, set_derived
+
+# --- CONFIGURATION ---
+# Most points a time chart is sent; longer series are downsampled with LTTB.
+CHART_MAX_POINTS = int(os.getenv("FINBOT_CHART_MAX_POINTS", "500"))
+
+# A resolution is used while it has at most this many times the point budget
+# in the selected range; LTTB then keeps the visually important points. Past
+# that, the next coarser rollup is cheaper and loses less.
+OVERSAMPLE = 4
+
+# Rollup levels, finest first
+RESOLUTIONS = ("day", "week", "month", "year")
+
+
+class TimeSeriesPyramid:
+    """
+    Daily, weekly, monthly and yearly spending totals of one dataset.
+
+    Every level is derived from the spending cube's dense daily totals, so
+    building the pyramid costs O(days) regardless of the number of rows, and
+    a chart for any date range only slices an already aggregated level.
+    """
+
+    def __init__(self, levels: dict):
+        # resolution -> (bucket start dates as datetime64[D], totals)
+        self.levels = levels
+
+    def __len__(self) -> int:
+        return len(self.levels["day"][0])
+
+    @property
+    def first_day(self):
+        """First calendar day with data, or None for an empty dataset."""
+        return pd.Timestamp(self.levels["day"][0][0]) if len(self) else None
+
+    @property
+    def last_day(self):
+        """Last calendar day with data, or None for an empty dataset."""
+        return pd.Timestamp(self.levels["day"][0][-1]) if len(self) else None
+
+    def _slice(self, resolution: str, start, end) -> tuple:
+        """Buckets of `resolution` overlapping [start, end] (whole buckets)."""
+        starts, totals = self.levels[resolution]
+        lo = 0
+        hi = len(starts)
+        if start is not None:
+            # The bucket containing `start` begins at or before it
+            lo = max(int(np.searchsorted(starts, _to_day(start), side="right")) - 1, 0)
+        if end is not None:
+            hi = int(np.searchsorted(starts, _to_day(end), side="right"))
+        return starts[lo:hi], totals[lo:hi]
+
+    def choose_resolution(self, start=None, end=None,
+                          max_points: int = CHART_MAX_POINTS) -> str:
+        """
+        Picks the finest resolution that suits the date range and point budget.
+
+        Args:
+            start: First day of the range, or None for the start of the data.
+            end: Last day of the range, or None for the end of the data.
+            max_points (int): Point budget of the chart.
+
+        Returns:
+            str: One of `RESOLUTIONS`.
+        """
+        for resolution in RESOLUTIONS:
+            if len(self._slice(resolution, start, end)[0]) <= max_points * OVERSAMPLE:
+                return resolution
+        return RESOLUTIONS[-1]
+
+    def series(self, start=None, end=None, max_points: int = CHART_MAX_POINTS,
+               resolution: str = None) -> tuple:
+        """
+        Returns chart points for a date range, at most `max_points` of them.
+
+        Args:
+            start: First day of the range, or None for the start of the data.
+            end: Last day of the range, or None for the end of the data.
+            max_points (int): Point budget of the chart.
+            resolution (str): Force a level instead of choosing one.
+
+        Returns:
+            tuple: (pd.Series of totals indexed by bucket start, resolution).
+        """
+        resolution = resolution or self.choose_resolution(start, end, max_points)
+        starts, totals = self._slice(resolution, start, end)
+        if max_points and len(starts) > max_points:
+            keep = lttb(starts.astype(np.int64).astype(np.float64), totals, max_points)
+            starts, totals = starts[keep], totals[keep]
+        index = pd.DatetimeIndex(starts.astype("datetime64[ns]"), name="Date")
+        return pd.Series(totals, index=index, name="Amount"), resolution
+
+
+def _to_day(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def build_time_pyramid(df: pd.DataFrame) -> TimeSeriesPyramid:
+    """
+    Builds the day/week/month/year rollups of a transaction frame.
+
+    Args:
+        df (pd.DataFrame): DataFrame with financial transactions.
+
+    Returns:
+        TimeSeriesPyramid: The rollups, derived from the spending cube.
+    """
+    cube = get_spending_cube(df)
+    if not cube.count:
+        empty = (np.empty(0, dtype="datetime64[D]"), np.empty(0))
+        return TimeSeriesPyramid({resolution: empty for resolution in RESOLUTIONS})
+
+    day_totals = cube.day_totals
+    first_day = np.datetime64(cube.first_day.date(), "D")
+    days = first_day + np.arange(len(day_totals))
+    day_numbers = days.astype(np.int64)
+
+    # Weeks start on Monday; 1970-01-01 (day 0) was a Thursday
+    week_numbers = (day_numbers + 3) // 7
+    week_index = week_numbers - week_numbers[0]
+    weeks = (np.arange(week_numbers[0], week_numbers[-1] + 1) * 7 - 3).astype("datetime64[D]")
+    week_totals = np.bincount(week_index, weights=day_totals, minlength=len(weeks))
+
+    months = np.datetime64(cube.first_month.start_time.date(), "M") + np.arange(
+        len(cube.month_totals))
+    month_numbers = months.astype(np.int64)
+    year_numbers = month_numbers // 12
+    years = np.arange(year_numbers[0], year_numbers[-1] + 1).astype("datetime64[Y]")
+    year_totals = np.bincount(year_numbers - year_numbers[0], weights=cube.month_totals,
+                              minlength=len(years))
+
+    return TimeSeriesPyramid({
+        "day": (days, day_totals),
+        "week": (weeks, week_totals),
+        "month": (months.astype("datetime64[D]"), cube.month_totals),
+        "year": (years.astype("datetime64[D]"), year_totals),
+    })
+
+
+def get_time_pyramid(df: pd.DataFrame) -> TimeSeriesPyramid:
+    """Returns the pyramid for `df`, building it once per normalized frame."""
+    df = normalize_transactions(df)
+    pyramid = get_derived(df, "pyramid")
+    if pyramid is None:
+        pyramid = build_time_pyramid(df)
+        set_derived(df, "pyramid", pyramid)
+    return pyramid
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of `threshold - 2` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. Peaks and dips
+    survive, unlike with plain averaging or striding.
+
+    Args:
+        x (np.ndarray): Increasing x values.
+        y (np.ndarray): y values.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the points to keep.
+
+    Raises:
+        ValueError: If `threshold` is below 3 and the series is longer.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3 points")
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_lo, next_hi = hi, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[next_lo:next_hi].mean()
+        next_y = y[next_lo:next_hi].mean()
+        # Twice the triangle areas; the constant factor does not change argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (next_y - y[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        keep[bucket + 1] = previous
+    return keep
@@ -0,0 +1,327 @@
+import numpy as np
+import pandas as pd
+
+from finance.aggregates import get_spending_cube
+from finance.ingest import get_derived, normalize_transactions, set_derived
+
+# --- CONFIGURATION ---
+# Months of history each category's latest month is compared against
+ZSCORE_WINDOW = 6
+# How unusual a month must be, in standard deviations, to be reported
+ZSCORE_THRESHOLD = 2.5
+# Smallest month-over-month change worth mentioning, as a fraction
+MOM_MIN_CHANGE = 0.25
+
+# Recurring charges: name, and the range of mean gaps in days that qualifies
+RECURRING_PERIODS = (
+    ("weekly", 6, 8),
+    ("fortnightly", 13, 15),
+    ("monthly", 27, 33),
+    ("quarterly", 85, 95),
+    ("yearly", 355, 375),
+)
+RECURRING_MIN_OCCURRENCES = 3
+# Largest spread of the gaps (std / mean) still treated as regular
+RECURRING_MAX_JITTER = 0.2
+
+# All functions below work on arrays with any number of leading batch
+# dimensions, e.g. (users, categories, months), so many users can be scored
+# in one call once their matrices are stacked with `stack_category_months`.
+
+
+# --- MATRIX SIGNALS ---
+def month_over_month(matrix: np.ndarray) -> tuple:
+    """
+    Change between the last two months along the last axis.
+
+    Args:
+        matrix (np.ndarray): Totals of shape (..., months).
+
+    Returns:
+        tuple: (absolute change, relative change) of shape (...); the
+            relative change is NaN where the earlier month is zero.
+    """
+    previous, latest = matrix[..., -2], matrix[..., -1]
+    change = latest - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.where(previous != 0, change / np.abs(previous), np.nan)
+    return change, relative
+
+
+def rolling_zscore(matrix: np.ndarray, window: int = ZSCORE_WINDOW) -> np.ndarray:
+    """
+    Z-score of every month against the `window` months before it.
+
+    Computed from cumulative sums, so the cost is O(months) per series
+    whatever the window.
+
+    Args:
+        matrix (np.ndarray): Totals of shape (..., months).
+        window (int): Number of preceding months forming the baseline.
+
+    Returns:
+        np.ndarray: Same shape as `matrix`; NaN for the first `window`
+            months and where the baseline does not vary.
+    """
+    months = matrix.shape[-1]
+    scores = np.full(matrix.shape, np.nan)
+    if months <= window:
+        return scores
+
+    padding = [(0, 0)] * (matrix.ndim - 1) + [(1, 0)]
+    sums = np.cumsum(np.pad(matrix, padding), axis=-1)
+    squares = np.cumsum(np.pad(matrix * matrix, padding), axis=-1)
+    window_sum = sums[..., window:months] - sums[..., :months - window]
+    window_squares = squares[..., window:months] - squares[..., :months - window]
+    mean = window_sum / window
+    std = np.sqrt(np.maximum(window_squares / window - mean * mean, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores[..., window:] = np.where(
+            std > 1e-9 * np.maximum(np.abs(mean), 1.0),
+            (matrix[..., window:] - mean) / std, np.nan)
+    return scores
+
+
+def linear_trend(series: np.ndarray) -> tuple:
+    """
+    Least-squares line through each series, in closed form.
+
+    Args:
+        series (np.ndarray): Values of shape (..., periods), one per period.
+
+    Returns:
+        tuple: (slope per period, forecast for the next period), each of
+            shape (...).
+    """
+    periods = series.shape[-1]
+    x = np.arange(periods, dtype=np.float64)
+    x_centered = x - x.mean()
+    y_mean = series.mean(axis=-1)
+    slope = (series @ x_centered) / (x_centered @ x_centered)
+    forecast = y_mean + slope * (periods - x.mean())
+    return slope, forecast
+
+
+def stack_category_months(cubes: list, months: int, categories: pd.Index = None) -> tuple:
+    """
+    Aligns several users' complete months into one (users, categories, months) array.
+
+    Each user's most recent `months` complete months are right-aligned, so the
+    last column is every user's latest complete month; shorter histories are
+    zero-padded on the left.
+
+    Args:
+        cubes (list): One `SpendingCube` per user.
+        months (int): Number of months to keep.
+        categories (pd.Index): Category axis; defaults to the sorted union.
+
+    Returns:
+        tuple: (categories, array, months of history available per user).
+    """
+    if categories is None:
+        categories = pd.Index(sorted(set().union(*(cube.categories for cube in cubes))),
+                              name="Category")
+    stacked = np.zeros((len(cubes), len(categories), months))
+    available = np.zeros(len(cubes), dtype=np.int64)
+    for user, cube in enumerate(cubes):
+        complete = complete_months(cube)
+        matrix = cube.category_month[:, complete][:, -months:]
+        rows = categories.get_indexer(cube.categories)
+        present = rows >= 0
+        width = matrix.shape[1]
+        if width:
+            stacked[user, rows[present], months - width:] = matrix[present]
+        available[user] = width
+    return categories, stacked, available
+
+
+def complete_months(cube) -> slice:
+    """Slice of the cube's months that are covered from their first to last day."""
+    if not cube.count:
+        return slice(0, 0)
+    first_day = cube.first_day
+    last_day = first_day + pd.Timedelta(days=len(cube.day_totals) - 1)
+    start = 0 if first_day.is_month_start else 1
+    stop = len(cube.month_totals) - (0 if last_day.is_month_end else 1)
+    return slice(start, max(stop, start))
+
+
+# --- RECURRING CHARGES ---
+def find_recurring(dates, payees, cents, owners=None) -> pd.DataFrame:
+    """
+    Finds charges repeated to the same payee for the same amount at a regular interval.
+
+    Transactions are sorted once by (owner, payee, amount, date); the gaps
+    between consecutive charges of each group are then summarized with
+    bincounts, so there is no Python loop over groups.
+
+    Args:
+        dates (array-like): Transaction timestamps.
+        payees (array-like): Payee or note per transaction; missing values are ignored.
+        cents (array-like): Amount in cents per transaction.
+        owners (array-like): Optional user id per transaction, for batches.
+
+    Returns:
+        pd.DataFrame: One row per recurring charge with Owner, Payee, Amount,
+            Period, Occurrences, Last and Next columns.
+    """
+    payee_codes, payee_names = pd.factorize(pd.Series(payees), use_na_sentinel=True)
+    blank = payee_names.get_indexer([""])[0] if len(payee_names) else -1
+    if blank >= 0:
+        payee_codes = np.where(payee_codes == blank, -1, payee_codes)
+    owner_codes, owner_names = pd.factorize(
+        pd.Series(np.zeros(len(payee_codes), dtype=np.int64) if owners is None else owners))
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    cents = np.asarray(cents, dtype=np.int64)
+
+    keep = payee_codes >= 0
+    days, cents = days[keep], cents[keep]
+    payee_codes, owner_codes = payee_codes[keep], owner_codes[keep]
+
+    order = np.lexsort((days, cents, payee_codes, owner_codes))
+    days, cents = days[order], cents[order]
+    payee_codes, owner_codes = payee_codes[order], owner_codes[order]
+
+    starts = np.ones(len(days), dtype=bool)
+    starts[1:] = ((owner_codes[1:] != owner_codes[:-1])
+                  | (payee_codes[1:] != payee_codes[:-1])
+                  | (cents[1:] != cents[:-1]))
+    group = np.cumsum(starts) - 1
+    n_groups = int(group[-1]) + 1 if len(group) else 0
+
+    occurrences = np.bincount(group, minlength=n_groups)
+    within = ~starts[1:]
+    gap_group = group[1:][within]
+    gaps = np.diff(days)[within].astype(np.float64)
+    n_gaps = np.bincount(gap_group, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_gap = np.bincount(gap_group, weights=gaps, minlength=n_groups) / n_gaps
+        mean_square = np.bincount(gap_group, weights=gaps * gaps, minlength=n_groups) / n_gaps
+        jitter = np.sqrt(np.maximum(mean_square - mean_gap ** 2, 0.0)) / mean_gap
+
+    period = np.full(n_groups, "", dtype=object)
+    for name, low, high in RECURRING_PERIODS:
+        period[(mean_gap >= low) & (mean_gap <= high)] = name
+    recurring = ((occurrences >= RECURRING_MIN_OCCURRENCES) & (period != "")
+                 & (jitter <= RECURRING_MAX_JITTER))
+
+    first_row = np.flatnonzero(starts)[recurring]
+    last_row = first_row + occurrences[recurring] - 1
+    last_day = days[last_row]
+    next_day = last_day + np.rint(mean_gap[recurring]).astype(np.int64)
+    return pd.DataFrame({
+        "Owner": owner_names[owner_codes[first_row]],
+        "Payee": payee_names[payee_codes[first_row]],
+        "Amount": cents[first_row] / 100,
+        "Period": period[recurring],
+        "Occurrences": occurrences[recurring],
+        "Last": last_day.astype("datetime64[D]"),
+        "Next": next_day.astype("datetime64[D]"),
+    })
+
+
+# --- INSIGHTS ---
+def spending_signals(matrix: np.ndarray, window: int = ZSCORE_WINDOW) -> dict:
+    """
+    Computes every matrix-based signal for one or many users at once.
+
+    Args:
+        matrix (np.ndarray): Category x month totals of shape
+            (..., categories, months), complete months only.
+        window (int): Baseline length for the z-scores.
+
+    Returns:
+        dict: `mom_change`/`mom_relative` and `zscore` per category, and
+            `trend_slope`/`forecast` of the monthly totals.
+    """
+    signals = {}
+    months = matrix.shape[-1]
+    if months >= 2:
+        signals["mom_change"], signals["mom_relative"] = month_over_month(matrix)
+    if months > 3:
+        signals["zscore"] = rolling_zscore(matrix, min(window, months - 1))[..., -1]
+    if months >= 3:
+        signals["trend_slope"], signals["forecast"] = linear_trend(matrix.sum(axis=-2))
+    return signals
+
+
+def expense_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the rows of `df` marked as expenses, selected once per frame."""
+    df = normalize_transactions(df)
+    if "Income/Expense" not in df.columns:
+        return df
+    expenses = get_derived(df, "expenses")
+    if expenses is None:
+        # Rows without a type come from files lacking the column, which are
+        # treated as spending throughout
+        is_expense = (df["Income/Expense"] != "Income").to_numpy(dtype=bool, na_value=True)
+        # True stands for "every row": the memo must never hold `df` itself,
+        # or the strong reference would keep the frame alive forever
+        expenses = True if is_expense.all() else df[is_expense]
+        set_derived(df, "expenses", expenses)
+    return df if expenses is True else expenses
+
+
+def generate_trend_insights(df: pd.DataFrame, months: int = 24) -> list:
+    """
+    Describes month-over-month changes, unusual months, recurring charges and the trend.
+
+    Args:
+        df (pd.DataFrame): DataFrame with financial transactions.
+        months (int): Most recent complete months to analyse.
+
+    Returns:
+        list: Insight strings; empty if there is too little history.
+    """
+    # Income (e.g. a salary) would otherwise show up as swings in spending
+    df = expense_transactions(df)
+    cube = get_spending_cube(df)
+    insights = []
+    if not cube.count:
+        return insights
+
+    categories, stacked, available = stack_category_months([cube], months, cube.categories)
+    matrix = stacked[0, :, months - int(available[0]):]
+    signals = spending_signals(matrix)
+    month_names = cube.months[complete_months(cube)]
+
+    if "mom_relative" in signals:
+        relative = signals["mom_relative"]
+        candidates = np.where(np.abs(np.nan_to_num(relative)) >= MOM_MIN_CHANGE,
+                              np.abs(signals["mom_change"]), 0.0)
+        if candidates.any():
+            index = int(np.argmax(candidates))
+            latest, previous = month_names[-1], month_names[-2]
+            direction = "rose" if relative[index] > 0 else "fell"
+            insights.append(
+                f"Spending on **{categories[index]}** {direction} {abs(relative[index]):.0%} "
+                f"in {latest.strftime('%B')} compared with {previous.strftime('%B')} "
+                f"(${matrix[index, -2]:,.2f} → ${matrix[index, -1]:,.2f}).")
+
+    if "zscore" in signals:
+        zscores = np.nan_to_num(signals["zscore"], nan=0.0)
+        for index in np.argsort(-zscores)[:2]:
+            if zscores[index] >= ZSCORE_THRESHOLD:
+                insights.append(
+                    f"Unusual month: **{categories[index]}** spending in "
+                    f"{month_names[-1].strftime('%B %Y')} was {zscores[index]:.1f} standard "
+                    f"deviations above its recent average.")
+
+    if "Note" in df.columns:
+        recurring = find_recurring(df["Date"], df["Note"], df["AmountCents"])
+        if len(recurring):
+            recurring = recurring.sort_values(
+                ["Occurrences", "Amount"], ascending=False).head(3)
+            charges = ", ".join(
+                f"{row.Payee} ${row.Amount:,.2f} {row.Period}"
+                for row in recurring.itertuples())
+            insights.append(f"Recurring charges detected: {charges}.")
+
+    if "forecast" in signals:
+        slope, forecast = float(signals["trend_slope"]), float(signals["forecast"])
+        direction = "rising" if slope > 0 else "falling"
+        insights.append(
+            f"At your current trend ({direction} ${abs(slope):,.2f} per month), next month's "
+            f"spending would be about ${max(forecast, 0.0):,.2f}.")
+
+    return insights
@@ -1,68 +1,174 @@
-def get_financial_advice(query: str, user_type: str) -> str:
+import time
+
+from nlp.intents import classify_intent
+from nlp.response_cache import get_response_cache
+from nlp.retrieval import retrieve_advice
+from nlp.streaming import iter_chunks
+from utils.metrics import timed
+
+# --- RESPONSE TABLE ---
+# Built-in answers keyed by (intent, user_type); intents come from
+# `nlp.intents`. A user_type of None applies to every demographic.
+RESPONSES = {
+    ("greeting", None): "Hello! I'm FinBot. How can I help you with your financial questions today?",
+    ("save_money", "Student"): (
+        "As a student, saving can be powerful, even in small amounts. Here are a few tips:\n"
+        "- **Automate Savings:** Set up an automatic transfer of a small amount (even $10) to a savings account each week.\n"
+        "- **Use Student Discounts:** Always ask for student discounts on food, tech, and entertainment.\n"
+        "- **Budget for Fun:** Allocate a specific amount for social activities so you don't overspend."
+    ),
+    ("investing", "Student"): (
+        "That's a great question for a student! Starting early is key.\n"
+        "- **Consider a Roth IRA:** If you have any part-time income, a Roth IRA is a fantastic way to start investing for retirement with tax-free growth.\n"
+        "- **Low-Cost Index Funds:** You can start with a small amount in a broad-market index fund (like one tracking the S&P 500). It's a simple way to get diversified exposure to the stock market.\n"
+        "- **Learn First:** Use this time to learn about different investment types. Don't invest in anything you don't understand."
+    ),
+    ("taxes", "Student"): (
+        "For students, taxes can be straightforward. If you have a part-time job, your employer will likely withhold taxes. You may be able to claim education credits like the American Opportunity Tax Credit if you or your parents are paying for tuition. It's often beneficial for your parents to claim you as a dependent."
+    ),
+    ("save_money", "Professional"): (
+        "For professionals, optimizing savings is key to achieving long-term goals. Let's look at some strategies:\n"
+        "- **Maximize 401(k) Match:** Ensure you are contributing enough to your employer's 401(k) to get the full company match. It's free money!\n"
+        "- **High-Yield Savings Account (HYSA):** Don't let your emergency fund sit in a low-interest account. An HYSA will give you a much better return.\n"
+        "- **Review Major Expenses:** Periodically review your biggest expenses (housing, transportation) to see if there are opportunities to reduce costs."
+    ),
+    ("investing", "Professional"): (
+        "As a professional, your investment strategy should align with your career stage and risk tolerance.\n"
+        "- **Diversification is Crucial:** Beyond your 401(k), consider a diversified portfolio of stocks and bonds through ETFs or mutual funds. \n"
+        "- **Tax-Advantaged Accounts:** After your 401(k), look into a Roth or Traditional IRA, and potentially a Health Savings Account (HSA) if you have a high-deductible health plan.\n"
+        "- **Consider Your Goals:** Are you investing for retirement, a down payment, or another major purchase? The timeline for your goal should dictate your investment choices."
+    ),
+    ("taxes", "Professional"): (
+        "For professionals, tax planning is crucial. Beyond standard deductions, consider:\n"
+        "- **Tax-Loss Harvesting:** If you have a brokerage account, you can sell investments at a loss to offset gains.\n"
+        "- **Itemizing Deductions:** If you have significant expenses like mortgage interest or state and local taxes, itemizing might be better than taking the standard deduction.\n"
+        "- **Consult a Professional:** As your income grows, it's often wise to consult with a Certified Public Accountant (CPA) to create a personalized tax strategy."
+    ),
+}
+
+# Snippets at least this similar to the question are used as the answer (or,
+# with a model, as grounding); below it the built-in responses apply.
+RETRIEVAL_MIN_SCORE = 0.2
+RETRIEVAL_TOP_K = 3
+
+FALLBACK_RESPONSE = "I can provide guidance on topics like saving money, investing, and taxes. Please ask me about one of those areas, and I'll do my best to provide a tailored response."
+
+
+SYSTEM_PROMPT = (
+    "You are FinBot, a friendly personal finance advisor. The user is a {user_type}. "
+    "Give concise, practical guidance on savings, taxes and investments, adapted "
+    "to their situation. Do not give legal or individualized tax advice."
+)
+
+
+def build_prompt(query: str, user_type: str, snippets: list = None,
+                 context: tuple = None) -> str:
+    """
+    Formats a user question as a Granite instruct prompt.
+
+    Args:
+        query (str): The user's financial question.
+        user_type (str): The user's demographic ('Student' or 'Professional').
+        snippets (list): Optional knowledge-base snippets to ground the answer in.
+        context (tuple): Optional (summary, turns) of the earlier conversation,
+            from `nlp.history.ChatHistory.context`.
+
+    Returns:
+        str: The prompt text to send to the model.
     """
-    Simulates a call to an IBM Granite model on HuggingFace.
+    system = SYSTEM_PROMPT.format(user_type=user_type or "user")
+    if snippets:
+        guidance = "\n".join(f"- {s['title']}: {s['text']}" for s in snippets)
+        system += f"\nBase your answer on this guidance where relevant:\n{guidance}"
+    summary, turns = context or ("", [])
+    if summary:
+        system += f"\n{summary}"
+    earlier = "".join(f"<|{turn['role']}|>\n{turn['content']}\n" for turn in turns)
+    return f"<|system|>\n{system}\n{earlier}<|user|>\n{query}\n<|assistant|>\n"
 
-    This function provides canned responses tailored to the user's demographic
-    to demonstrate the personalized advice capability of the application.
-    In a real-world scenario, this would make an API call.
+
+def find_snippets(query: str, user_type: str) -> list:
+    """Returns the knowledge-base snippets relevant enough to answer `query`."""
+    return [
+        snippet for score, snippet in retrieve_advice(query, user_type, RETRIEVAL_TOP_K)
+        if score >= RETRIEVAL_MIN_SCORE
+    ]
+
+
+@timed(kind="chat")
+def get_financial_advice(query: str, user_type: str, worker=None, stream: bool = False,
+                         context: tuple = None):
+    """
+    Answers a financial question, using the IBM Granite model when available.
+
+    Relevant snippets are looked up in the local advice index first. When an
+    inference worker is passed the question is queued on it, grounded in
+    those snippets and in the recent conversation, and generated in a batch
+    with other sessions' prompts, streamed or not. Answers are cached, so a
+    repeated question skips generation. Without a worker the snippets
+    themselves form the answer, falling back to the built-in responses when
+    nothing relevant is found.
 
     Args:
         query (str): The user's financial question.
         user_type (str): The user's demographic ('Student' or 'Professional').
+        worker (InferenceWorker): Optional shared worker from
+            `nlp.inference.get_inference_worker`.
+        stream (bool): If True, return an iterator of text chunks that are
+            yielded as soon as they are produced instead of a full string.
+        context (tuple): Optional (summary, turns) of the earlier
+            conversation, from `nlp.history.ChatHistory.context`; only used
+            in the model prompt.
 
     Returns:
-        str: A tailored financial advice response.
+        str | Iterator[str]: A tailored financial advice response.
     """
-    query = query.lower()
-
-    # Generic Welcome
-    if "hello" in query or "hi" in query:
-        return "Hello! I'm FinBot. How can I help you with your financial questions today?"
-
-    # --- Student-Specific Logic ---
-    if user_type == "Student":
-        if "save money" in query:
-            return (
-                "As a student, saving can be powerful, even in small amounts. Here are a few tips:\n"
-                "- **Automate Savings:** Set up an automatic transfer of a small amount (even $10) to a savings account each week.\n"
-                "- **Use Student Discounts:** Always ask for student discounts on food, tech, and entertainment.\n"
-                "- **Budget for Fun:** Allocate a specific amount for social activities so you don't overspend."
-            )
-        elif "investment" in query or "investing" in query:
-            return (
-                "That's a great question for a student! Starting early is key.\n"
-                "- **Consider a Roth IRA:** If you have any part-time income, a Roth IRA is a fantastic way to start investing for retirement with tax-free growth.\n"
-                "- **Low-Cost Index Funds:** You can start with a small amount in a broad-market index fund (like one tracking the S&P 500). It's a simple way to get diversified exposure to the stock market.\n"
-                "- **Learn First:** Use this time to learn about different investment types. Don't invest in anything you don't understand."
-            )
-        elif "taxes" in query:
-            return (
-                "For students, taxes can be straightforward. If you have a part-time job, your employer will likely withhold taxes. You may be able to claim education credits like the American Opportunity Tax Credit if you or your parents are paying for tuition. It's often beneficial for your parents to claim you as a dependent."
-            )
-
-    # --- Professional-Specific Logic ---
-    elif user_type == "Professional":
-        if "save money" in query:
-            return (
-                "For professionals, optimizing savings is key to achieving long-term goals. Let's look at some strategies:\n"
-                "- **Maximize 401(k) Match:** Ensure you are contributing enough to your employer's 401(k) to get the full company match. It's free money!\n"
-                "- **High-Yield Savings Account (HYSA):** Don't let your emergency fund sit in a low-interest account. An HYSA will give you a much better return.\n"
-                "- **Review Major Expenses:** Periodically review your biggest expenses (housing, transportation) to see if there are opportunities to reduce costs."
-            )
-        elif "investment" in query or "investing" in query:
-            return (
-                "As a professional, your investment strategy should align with your career stage and risk tolerance.\n"
-                "- **Diversification is Crucial:** Beyond your 401(k), consider a diversified portfolio of stocks and bonds through ETFs or mutual funds. \n"
-                "- **Tax-Advantaged Accounts:** After your 401(k), look into a Roth or Traditional IRA, and potentially a Health Savings Account (HSA) if you have a high-deductible health plan.\n"
-                "- **Consider Your Goals:** Are you investing for retirement, a down payment, or another major purchase? The timeline for your goal should dictate your investment choices."
-            )
-        elif "taxes" in query:
-            return (
-                "For professionals, tax planning is crucial. Beyond standard deductions, consider:\n"
-                "- **Tax-Loss Harvesting:** If you have a brokerage account, you can sell investments at a loss to offset gains.\n"
-                "- **Itemizing Deductions:** If you have significant expenses like mortgage interest or state and local taxes, itemizing might be better than taking the standard deduction.\n"
-                "- **Consult a Professional:** As your income grows, it's often wise to consult with a Certified Public Accountant (CPA) to create a personalized tax strategy."
-            )
-
-    # Default fallback response
-    return "I can provide guidance on topics like saving money, investing, and taxes. Please ask me about one of those areas, and I'll do my best to provide a tailored response."
+    if worker is not None:
+        # Generations are cached per model, user type and normalized question;
+        # answers to follow-up questions only for the same earlier turns
+        cache = get_response_cache()
+        key = cache.key(query, user_type, getattr(worker.backend, "model", "model"), context)
+        cached = cache.get(key)
+        if cached is not None:
+            return iter_chunks(cached) if stream else cached
+
+    intent = classify_intent(query)
+    snippets = [] if intent == "greeting" else find_snippets(query, user_type)
+
+    if worker is not None:
+        prompt = build_prompt(query, user_type, snippets, context)
+        if stream:
+            return _cache_when_complete(worker.stream(prompt), cache, key)
+        started = time.perf_counter()
+        response = worker.generate(prompt)
+        cache.set(key, response, time.perf_counter() - started)
+        return response
+
+    response = _retrieved_advice(snippets, user_type) or _canned_advice(intent, user_type)
+    return iter_chunks(response) if stream else response
+
+
+def _cache_when_complete(chunks, cache, key: str):
+    """Passes chunks through and caches the full response once the stream ends."""
+    started = time.perf_counter()
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    # Not reached if the reader stops early, so partial answers are never cached
+    cache.set(key, "".join(parts), time.perf_counter() - started)
+
+
+def _retrieved_advice(snippets: list, user_type: str) -> str:
+    """Formats retrieved snippets as an answer; empty if there are none."""
+    if not snippets:
+        return ""
+    audience = f"a {user_type.lower()}" if user_type else "you"
+    tips = "\n".join(f"- **{s['title']}:** {s['text']}" for s in snippets)
+    return f"Here are a few pointers for {audience}:\n{tips}"
+
+
+def _canned_advice(intent: str, user_type: str) -> str:
+    """Returns the built-in response for an intent when nothing was retrieved."""
+    response = RESPONSES.get((intent, user_type)) or RESPONSES.get((intent, None))
+    return response or FALLBACK_RESPONSE
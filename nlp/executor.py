@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nlp.inference import REQUEST_TIMEOUT_SECONDS
+from utils.metrics import register_collector
+
+# --- CONFIGURATION ---
+# Threads producing chat answers for all sessions of the process.
+CHAT_WORKERS = int(os.getenv("FINBOT_CHAT_WORKERS", "4"))
+# Queued plus running chat requests the process accepts; more are refused.
+MAX_ACTIVE_JOBS = int(os.getenv("FINBOT_CHAT_MAX_JOBS", "16"))
+# Seconds a chat request may take, queueing included.
+CHAT_TIMEOUT = float(os.getenv("FINBOT_CHAT_TIMEOUT", str(REQUEST_TIMEOUT_SECONDS)))
+# Seconds between refreshes of an answer being generated.
+POLL_INTERVAL = float(os.getenv("FINBOT_CHAT_POLL_SECONDS", "0.5"))
+
+# Job states; every state but the first two is final
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMED_OUT = (
+    "queued", "running", "done", "failed", "cancelled", "timed_out")
+
+
+class ChatJob:
+    """
+    Handle of one chat answer being produced in the background.
+
+    Kept in the session's state across reruns; the page reads `text` as it
+    grows. Cancelling, or running past the deadline, stops the producer at
+    its next chunk and closes it, so a model stream is abandoned as well.
+    """
+
+    def __init__(self, query: str, timeout: float):
+        self.query = query
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.error = None
+        self.time_to_first_token = None
+        self.total_time = None
+        self._status = QUEUED
+        self._parts = []
+        self._cancelled = threading.Event()
+        self._future = None
+
+    @property
+    def status(self) -> str:
+        """The job's state; a job past its deadline reads as timed out."""
+        if self._status in (QUEUED, RUNNING) and time.monotonic() > self.deadline:
+            # The producer may be blocked; it notices at its next chunk
+            self._cancelled.set()
+            return TIMED_OUT
+        return self._status
+
+    @property
+    def done(self) -> bool:
+        """True once the job has stopped, for whatever reason."""
+        return self.status not in (QUEUED, RUNNING)
+
+    @property
+    def text(self) -> str:
+        """The answer received so far."""
+        return "".join(self._parts)
+
+    def cancel(self):
+        """Stops the job; a queued job never starts."""
+        self._cancelled.set()
+        if self._future is not None and self._future.cancel():
+            self._status = CANCELLED
+
+    def metrics(self) -> dict:
+        """Returns the latency figures recorded for this answer."""
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_time": self.total_time,
+            "chunks": len(self._parts),
+        }
+
+    def _run(self, fn, args, kwargs) -> str:
+        """Consumes the chunks produced by `fn`; runs on an executor thread."""
+        if self._cancelled.is_set():
+            self._status = CANCELLED
+            return self._status
+        self._status = RUNNING
+        chunks = None
+        try:
+            chunks = iter(fn(*args, **kwargs))
+            for chunk in chunks:
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.monotonic() - self.started
+                self._parts.append(chunk)
+                if self._cancelled.is_set() or time.monotonic() > self.deadline:
+                    break
+            else:
+                self.total_time = time.monotonic() - self.started
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = self.total_time
+                self._status = DONE
+                return self._status
+            self._status = TIMED_OUT if time.monotonic() > self.deadline else CANCELLED
+        except TimeoutError as e:
+            self.error = e
+            self._status = TIMED_OUT
+        except Exception as e:
+            self.error = e
+            self._status = FAILED
+        finally:
+            # Closing a generator runs its cleanup, e.g. abandoning a model stream
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+        return self._status
+
+
+class ChatExecutor:
+    """
+    Runs chat answers for every session on a shared, bounded thread pool.
+
+    At most `max_workers` answers are produced at once and `max_jobs` are
+    accepted (queued or running); further requests are refused until some
+    finish, so a burst of users cannot pile unbounded work onto the process.
+    """
+
+    def __init__(self, max_workers: int = CHAT_WORKERS, max_jobs: int = MAX_ACTIVE_JOBS,
+                 timeout: float = CHAT_TIMEOUT):
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="finbot-chat")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._counts = {"submitted": 0, "rejected": 0, DONE: 0, FAILED: 0,
+                        CANCELLED: 0, TIMED_OUT: 0}
+
+    def submit(self, query: str, fn, *args, **kwargs) -> ChatJob:
+        """
+        Starts producing an answer in the background.
+
+        Args:
+            query (str): The question being answered, kept on the handle.
+            fn: Callable returning an iterable of text chunks, e.g.
+                `get_financial_advice` with `stream=True`.
+            *args, **kwargs: Passed to `fn` on the executor thread.
+
+        Returns:
+            ChatJob: The handle to poll, read and cancel.
+
+        Raises:
+            RuntimeError: If `max_jobs` requests are already in progress.
+        """
+        with self._lock:
+            if self._active >= self.max_jobs:
+                self._counts["rejected"] += 1
+                raise RuntimeError("FinBot is busy answering other questions; "
+                                   "please try again in a moment.")
+            self._active += 1
+            self._counts["submitted"] += 1
+        job = ChatJob(query, self.timeout)
+        job._future = self._pool.submit(job._run, fn, args, kwargs)
+        job._future.add_done_callback(self._finished)
+        return job
+
+    def _finished(self, future):
+        status = CANCELLED if future.cancelled() else future.result()
+        with self._lock:
+            self._active -= 1
+            self._counts[status] += 1
+
+    def stats(self) -> dict:
+        """Returns the number of active jobs and of jobs per outcome."""
+        with self._lock:
+            return {"active": self._active, **self._counts}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_chat_executor() -> ChatExecutor:
+    """Returns the process-wide chat executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                executor = ChatExecutor()
+                register_collector(lambda: {
+                    f"finbot_chat_{name}": value
+                    for name, value in executor.stats().items()
+                })
+                _executor = executor
+    return _executor
@@ -0,0 +1,214 @@
+import atexit
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from array import array
+from collections import deque
+
+# --- CONFIGURATION ---
+# Messages held in memory per session; older ones are moved to the archive.
+HISTORY_SIZE = int(os.getenv("FINBOT_CHAT_HISTORY_SIZE", "50"))
+# Messages rendered per page of history; "Load earlier" adds another page.
+RENDER_WINDOW = int(os.getenv("FINBOT_CHAT_RENDER_WINDOW", "20"))
+# Tokens of earlier conversation included in a model prompt.
+CONTEXT_TOKENS = int(os.getenv("FINBOT_CONTEXT_TOKENS", "768"))
+# Parent of the archive directory. Archived messages are users' questions,
+# so each process writes them, one JSON Lines file per session, to its own
+# directory that only its user can read.
+ARCHIVE_DIR = os.getenv("FINBOT_CHAT_ARCHIVE_DIR") or tempfile.gettempdir()
+
+# Earlier questions listed in the summary of turns that no longer fit the
+# context, the words kept of each, and the summary's largest share of the
+# context budget (1/SUMMARY_SHARE).
+SUMMARY_QUESTIONS = 8
+SUMMARY_WORDS = 12
+SUMMARY_SHARE = 4
+
+# English text averages about four characters per token with the Granite
+# (and most BPE) tokenizers; close enough to budget a prompt.
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PREFIX = "Earlier the user asked: "
+
+
+def estimate_tokens(text: str) -> int:
+    """Returns an estimate of the number of model tokens in `text`."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _shorten(text: str, words: int = SUMMARY_WORDS) -> str:
+    parts = text.split()
+    return " ".join(parts[:words]) + (" …" if len(parts) > words else "")
+
+
+def _summarize(questions: list, budget: int) -> str:
+    """Lists the most recent earlier questions that fit in `budget` tokens."""
+    kept = []
+    used = estimate_tokens(SUMMARY_PREFIX)
+    for question in reversed(questions[-SUMMARY_QUESTIONS:]):
+        used += estimate_tokens(question) + 1
+        if used > budget:
+            break
+        kept.append(question)
+    return SUMMARY_PREFIX + "; ".join(reversed(kept)) if kept else ""
+
+
+_archive_directories = {}
+_archive_lock = threading.Lock()
+
+
+def _archive_directory(parent: str) -> str:
+    """Returns this process's private archive directory under `parent`."""
+    with _archive_lock:
+        directory = _archive_directories.get(parent)
+        if directory is None or not os.path.isdir(directory):
+            os.makedirs(parent, exist_ok=True)
+            # mkdtemp creates the directory with mode 0o700 under a random name
+            directory = _archive_directories[parent] = tempfile.mkdtemp(
+                prefix="finbot-chat-", dir=parent)
+            atexit.register(shutil.rmtree, directory, ignore_errors=True)
+        return directory
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ChatHistory:
+    """
+    A session's chat messages: a bounded ring buffer plus an on-disk archive.
+
+    The newest `maxlen` messages stay in memory; older ones are appended to
+    a JSON Lines archive and read back by byte offset only when the user
+    asks for earlier messages. The questions of archived turns are also
+    folded into a bounded summary, so building the model context never
+    touches the archive. Every operation on the recent turns costs the same
+    however long the conversation gets.
+    """
+
+    def __init__(self, maxlen: int = HISTORY_SIZE, directory: str = ARCHIVE_DIR):
+        self.path = os.path.join(_archive_directory(directory), f"{uuid.uuid4().hex}.jsonl")
+        self._recent = deque()
+        self._maxlen = maxlen
+        # Byte offset of every archived message, in order
+        self._offsets = array("q")
+        self._archived_questions = deque(maxlen=SUMMARY_QUESTIONS)
+        self._lock = threading.Lock()
+        weakref.finalize(self, _remove_file, self.path)
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self._recent)
+
+    @property
+    def archived(self) -> int:
+        """Number of messages moved out of memory."""
+        return len(self._offsets)
+
+    def append(self, message: dict):
+        """
+        Adds a message, archiving the oldest one once the buffer is full.
+
+        Args:
+            message (dict): A chat message with `role` and `content`; any
+                other JSON-serializable fields (e.g. latency figures) are kept.
+        """
+        with self._lock:
+            self._recent.append(message)
+            if len(self._recent) > self._maxlen:
+                self._archive(self._recent.popleft())
+
+    def _archive(self, message: dict):
+        with open(self.path, "ab") as f:
+            self._offsets.append(f.tell())
+            f.write(json.dumps(message).encode() + b"\n")
+        if message["role"] == "user":
+            self._archived_questions.append(_shorten(message["content"]))
+
+    def recent(self, count: int) -> list:
+        """
+        Returns the last `count` messages, oldest first.
+
+        Messages beyond the in-memory buffer are read from the archive.
+
+        Args:
+            count (int): Number of messages to return.
+
+        Returns:
+            list: Message dicts.
+        """
+        with self._lock:
+            recent = list(self._recent)
+            from_archive = min(max(count - len(recent), 0), len(self._offsets))
+            first = len(self._offsets) - from_archive
+            offset = self._offsets[first] if from_archive else 0
+        older = []
+        if from_archive:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                older = [json.loads(f.readline()) for _ in range(from_archive)]
+        return (older + recent)[-count:] if count else []
+
+    def context(self, budget: int = CONTEXT_TOKENS) -> tuple:
+        """
+        Selects earlier conversation to include in a model prompt.
+
+        The newest turns are kept verbatim while they fit `budget` tokens;
+        the questions of older turns, including archived ones, are condensed
+        into a one-line summary of at most a quarter of the budget.
+
+        Args:
+            budget (int): Token budget for the verbatim turns and summary.
+
+        Returns:
+            tuple: (summary string, possibly empty; list of message dicts
+                with `role` and `content`, oldest first).
+        """
+        with self._lock:
+            recent = list(self._recent)
+            questions = list(self._archived_questions)
+
+        turns = []
+        used = 0
+        cut = 0
+        for position in range(len(recent) - 1, -1, -1):
+            message = recent[position]
+            tokens = estimate_tokens(message["content"])
+            if used + tokens > budget:
+                cut = position + 1
+                break
+            used += tokens
+            turns.append({"role": message["role"], "content": message["content"]})
+        turns.reverse()
+        # A reply without its question would be confusing; drop it too
+        if turns and turns[0]["role"] == "assistant":
+            used -= estimate_tokens(turns.pop(0)["content"])
+            cut += 1
+
+        questions.extend(_shorten(message["content"])
+                         for message in recent[:cut] if message["role"] == "user")
+        summary = _summarize(questions, budget // SUMMARY_SHARE)
+        while summary and turns and used + estimate_tokens(summary) > budget:
+            # Make room for the summary at the expense of the oldest exchange
+            dropped = turns.pop(0)
+            used -= estimate_tokens(dropped["content"])
+            questions.append(_shorten(dropped["content"]))
+            while turns and turns[0]["role"] == "assistant":
+                used -= estimate_tokens(turns.pop(0)["content"])
+            summary = _summarize(questions, budget // SUMMARY_SHARE)
+        return summary, turns
+
+    def clear(self):
+        """Forgets every message and deletes the archive."""
+        with self._lock:
+            self._recent.clear()
+            self._offsets = array("q")
+            self._archived_questions.clear()
+            _remove_file(self.path)
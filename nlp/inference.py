@@ -0,0 +1,518 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError
+
+from utils.metrics import register_collector
+from utils.startup import lazy_import
+
+# --- CONFIGURATION ---
+# The worker is only started when a model is configured; without one the
+# chatbot keeps answering from its built-in responses.
+DEFAULT_MODEL = "ibm-granite/granite-3b-instruct"
+MAX_BATCH_SIZE = int(os.getenv("FINBOT_MAX_BATCH_SIZE", "8"))
+MAX_WAIT_SECONDS = float(os.getenv("FINBOT_MAX_WAIT_MS", "20")) / 1000
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("FINBOT_REQUEST_TIMEOUT", "120"))
+MAX_NEW_TOKENS = int(os.getenv("FINBOT_MAX_NEW_TOKENS", "256"))
+
+# Marks the end of a streamed response in a chunk queue
+_END_OF_STREAM = object()
+
+
+class PipelineBackend:
+    """Runs a HuggingFace text-generation pipeline on CPU."""
+
+    def __init__(self, model: str = DEFAULT_MODEL, token: str = None,
+                 max_new_tokens: int = MAX_NEW_TOKENS):
+        # transformers (and torch) are only imported once a model is needed
+        transformers = lazy_import("transformers")
+
+        self.model = model
+        self.max_new_tokens = max_new_tokens
+        self.pipeline = transformers.pipeline(
+            "text-generation",
+            model=model,
+            token=token,
+            device="cpu",
+        )
+        # Decoder-only models need left padding and a pad token to batch
+        tokenizer = self.pipeline.tokenizer
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token_id = tokenizer.eos_token_id
+
+    def generate(self, prompts: list) -> list:
+        """Generates one completion per prompt in a single batched call."""
+        outputs = self.pipeline(
+            prompts,
+            batch_size=len(prompts),
+            max_new_tokens=self.max_new_tokens,
+            return_full_text=False,
+        )
+        return [output[0]["generated_text"].strip() for output in outputs]
+
+    def stream_batch(self, prompts: list, stop):
+        """
+        Generates completions for several prompts at once, yielding text as it is decoded.
+
+        Args:
+            prompts (list): The prompts, generated together in one batch.
+            stop: Callable taking a row index and returning True once that
+                row's reader is gone or out of time; generation of the row
+                ends at the next step and the batch ends when every row has.
+
+        Yields:
+            tuple: (row index, text chunk).
+        """
+        transformers = lazy_import("transformers")
+        torch = lazy_import("torch")
+        tokenizer = self.pipeline.tokenizer
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+        streamer = _BatchStreamer(tokenizer, len(prompts))
+
+        class StopRows(transformers.StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return torch.tensor([stop(row) for row in range(len(prompts))],
+                                    dtype=torch.bool, device=input_ids.device)
+
+        def run():
+            try:
+                self.pipeline.model.generate(
+                    **inputs,
+                    streamer=streamer,
+                    stopping_criteria=transformers.StoppingCriteriaList([StopRows()]),
+                    max_new_tokens=self.max_new_tokens,
+                    pad_token_id=tokenizer.pad_token_id,
+                )
+            except Exception as e:
+                streamer.fail(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            yield from streamer
+        finally:
+            # Generation has ended (or every row was stopped) before the
+            # worker moves on, so two batches never compete for the CPU
+            thread.join()
+
+
+class _BatchStreamer:
+    """
+    Streamer for `generate` that decodes each row of a batch separately.
+
+    transformers' own streamers only support a batch of one. `generate`
+    calls `put` with the prompt ids first and then with one new token per
+    row at every step; each row's text is re-decoded and only the new part
+    is passed on.
+    """
+
+    def __init__(self, tokenizer, rows: int):
+        self.tokenizer = tokenizer
+        self._tokens = [[] for _ in range(rows)]
+        self._sent = [0] * rows
+        self._finished = [False] * rows
+        self._queue = queue.Queue()
+        self._prompt_seen = False
+
+    def put(self, value):
+        if not self._prompt_seen:
+            self._prompt_seen = True
+            return
+        for row, token in enumerate(value.reshape(len(self._tokens), -1)[:, -1].tolist()):
+            if self._finished[row]:
+                continue
+            if token == self.tokenizer.eos_token_id:
+                self._finished[row] = True
+                continue
+            self._tokens[row].append(token)
+            text = self.tokenizer.decode(self._tokens[row], skip_special_tokens=True)
+            # A trailing replacement character is an incomplete multi-byte
+            # character; wait for the next token
+            if len(text) > self._sent[row] and not text.endswith("\ufffd"):
+                self._queue.put((row, text[self._sent[row]:]))
+                self._sent[row] = len(text)
+
+    def end(self):
+        self._queue.put(_END_OF_STREAM)
+
+    def fail(self, error: BaseException):
+        self._queue.put(error)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+class FakeGenerator:
+    """
+    Deterministic stand-in for a model backend, used for tests and benchmarks.
+
+    Each call sleeps for a fixed overhead plus a per-prompt cost, which mimics
+    how a real forward pass amortizes over a batch.
+    """
+
+    model = "fake"
+
+    def __init__(self, call_latency: float = 0.05, prompt_latency: float = 0.005):
+        self.call_latency = call_latency
+        self.prompt_latency = prompt_latency
+        self.calls = 0
+
+    def generate(self, prompts: list) -> list:
+        """Returns a canned completion for every prompt."""
+        self.calls += 1
+        time.sleep(self.call_latency + self.prompt_latency * len(prompts))
+        return [f"Echo: {prompt[-40:]}" for prompt in prompts]
+
+    def stream_batch(self, prompts: list, stop):
+        """Yields the canned completions word by word, one step for the whole batch."""
+        self.calls += 1
+        time.sleep(self.call_latency)
+        words = [f"Echo: {prompt[-40:]}".split(" ") for prompt in prompts]
+        for step in range(max(len(row) for row in words)):
+            if all(stop(row) for row in range(len(prompts))):
+                return
+            time.sleep(self.prompt_latency)
+            for row, row_words in enumerate(words):
+                if step < len(row_words) and not stop(row):
+                    yield row, row_words[step] + " "
+
+
+class _Request:
+    """A queued prompt together with its result future and deadline."""
+
+    __slots__ = ("prompt", "future", "deadline", "enqueued_at", "chunks", "abandoned")
+
+    def __init__(self, prompt: str, timeout: float, stream: bool = False):
+        self.prompt = prompt
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        self.deadline = self.enqueued_at + timeout
+        self.chunks = queue.Queue() if stream else None
+        self.abandoned = threading.Event()
+
+
+class InferenceWorker:
+    """
+    Owns a generation backend and serves prompts from every session.
+
+    Prompts are queued and picked up by a single background thread that groups
+    them into batches of up to `max_batch_size`, waiting at most `max_wait`
+    seconds for a batch to fill. Results are delivered through futures.
+    Streamed requests that arrive together are generated as one batch as
+    well, after the non-streamed ones; each row stops as soon as its reader
+    goes away or its deadline passes.
+    """
+
+    def __init__(self, backend, max_batch_size: int = MAX_BATCH_SIZE,
+                 max_wait: float = MAX_WAIT_SECONDS,
+                 request_timeout: float = REQUEST_TIMEOUT_SECONDS):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.request_timeout = request_timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "completed": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+            "failed": 0,
+            "batches": 0,
+            "batched_prompts": 0,
+            "streamed": 0,
+            "max_queue_depth": 0,
+            "queue_wait_seconds": 0.0,
+            "generation_seconds": 0.0,
+        }
+
+    def start(self):
+        """Starts the background batching thread (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="finbot-inference", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Stops the batching thread after the current batch finishes."""
+        self._stopping.set()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, prompt: str, timeout: float = None) -> Future:
+        """
+        Queues a prompt for generation.
+
+        Args:
+            prompt (str): The full prompt to complete.
+            timeout (float): Seconds the request may wait and run before it is
+                abandoned. Defaults to the worker's `request_timeout`.
+
+        Returns:
+            Future: Resolves to the generated text, or raises TimeoutError.
+        """
+        return self._enqueue(_Request(prompt, timeout or self.request_timeout)).future
+
+    def _enqueue(self, request: _Request) -> _Request:
+        self._queue.put(request)
+        with self._lock:
+            self._metrics["requests"] += 1
+            depth = self._queue.qsize()
+            if depth > self._metrics["max_queue_depth"]:
+                self._metrics["max_queue_depth"] = depth
+        return request
+
+    def generate(self, prompt: str, timeout: float = None) -> str:
+        """Submits a prompt and blocks until its completion is ready."""
+        timeout = timeout or self.request_timeout
+        future = self.submit(prompt, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stream(self, prompt: str, timeout: float = None):
+        """
+        Queues a prompt and yields text chunks as the backend produces them.
+
+        Args:
+            prompt (str): The full prompt to complete.
+            timeout (float): Seconds allowed for the whole response.
+
+        Yields:
+            str: Successive chunks of the completion.
+
+        Raises:
+            TimeoutError: If the response is not finished within `timeout`.
+        """
+        request = self._enqueue(
+            _Request(prompt, timeout or self.request_timeout, stream=True))
+        try:
+            while True:
+                remaining = request.deadline - time.monotonic()
+                try:
+                    chunk = request.chunks.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    raise TimeoutError("Streaming response timed out") from None
+                if chunk is _END_OF_STREAM:
+                    break
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield chunk
+        finally:
+            # Stops generation early if the reader gave up or was closed
+            request.abandoned.set()
+            request.future.cancel()
+
+    def metrics(self) -> dict:
+        """Returns a snapshot of queue depth, batching and latency counters."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot["queue_depth"] = self._queue.qsize()
+        batches = snapshot["batches"]
+        snapshot["mean_batch_size"] = snapshot["batched_prompts"] / batches if batches else 0.0
+        return snapshot
+
+    # --- BATCHING LOOP ---
+    def _collect_batch(self, first: _Request) -> list:
+        """Gathers requests until the batch is full or `max_wait` has passed."""
+        batch = [first]
+        flush_at = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = flush_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._stopping.set()
+                break
+            batch.append(request)
+        return batch
+
+    def _claim(self, batch: list) -> list:
+        """Drops cancelled and expired requests and marks the rest running."""
+        now = time.monotonic()
+        live = []
+        for request in batch:
+            if now > request.deadline:
+                if request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(
+                        TimeoutError("Request expired before generation started"))
+                with self._lock:
+                    self._metrics["timed_out"] += 1
+            elif request.future.set_running_or_notify_cancel():
+                live.append(request)
+        return live
+
+    def _run(self):
+        while not self._stopping.is_set():
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._claim(self._collect_batch(first))
+            streamed = [r for r in batch if r.chunks is not None]
+            batch = [r for r in batch if r.chunks is None]
+            if batch:
+                self._generate_batch(batch)
+            if streamed:
+                self._stream_batch(streamed)
+
+    def _generate_batch(self, batch: list):
+        started = time.monotonic()
+        try:
+            outputs = self.backend.generate([r.prompt for r in batch])
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            with self._lock:
+                self._metrics["failed"] += len(batch)
+            return
+        finished = time.monotonic()
+
+        for request, output in zip(batch, outputs):
+            request.future.set_result(output)
+        with self._lock:
+            self._metrics["batches"] += 1
+            self._metrics["batched_prompts"] += len(batch)
+            self._metrics["completed"] += len(batch)
+            self._metrics["generation_seconds"] += finished - started
+            self._metrics["queue_wait_seconds"] += sum(
+                started - r.enqueued_at for r in batch)
+
+    def _stream_batch(self, batch: list):
+        started = time.monotonic()
+
+        # Why each row stopped early, recorded when it is first noticed
+        stopped = [None] * len(batch)
+
+        def stop(row):
+            if stopped[row] is None:
+                # The deadline comes first: a reader that timed out has
+                # also abandoned the stream
+                request = batch[row]
+                if time.monotonic() > request.deadline:
+                    stopped[row] = "timed_out"
+                elif request.abandoned.is_set():
+                    stopped[row] = "cancelled"
+            return stopped[row] is not None
+
+        parts = [[] for _ in batch]
+        try:
+            for row, chunk in self.backend.stream_batch([r.prompt for r in batch], stop):
+                if not stop(row):
+                    parts[row].append(chunk)
+                    batch[row].chunks.put(chunk)
+        except Exception as e:
+            for request in batch:
+                request.chunks.put(e)
+                request.future.set_exception(e)
+            with self._lock:
+                self._metrics["failed"] += len(batch)
+            return
+        finished = time.monotonic()
+
+        outcomes = {"completed": 0, "timed_out": 0, "cancelled": 0}
+        for row, (request, request_parts) in enumerate(zip(batch, parts)):
+            stop(row)
+            if stopped[row] == "cancelled":
+                outcomes["cancelled"] += 1
+                request.future.set_exception(CancelledError())
+            elif stopped[row] == "timed_out":
+                outcomes["timed_out"] += 1
+                error = TimeoutError("Streaming response timed out")
+                request.chunks.put(error)
+                request.future.set_exception(error)
+            else:
+                outcomes["completed"] += 1
+                request.chunks.put(_END_OF_STREAM)
+                request.future.set_result("".join(request_parts))
+        with self._lock:
+            self._metrics["batches"] += 1
+            self._metrics["batched_prompts"] += len(batch)
+            self._metrics["streamed"] += outcomes["completed"]
+            for name, count in outcomes.items():
+                self._metrics[name] += count
+            self._metrics["generation_seconds"] += finished - started
+            self._metrics["queue_wait_seconds"] += sum(
+                started - r.enqueued_at for r in batch)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_inference_worker():
+    """
+    Returns the process-wide inference worker, creating it on first use.
+
+    The model is taken from the `FINBOT_MODEL` environment variable; when it
+    is unset no model is loaded and None is returned.
+
+    Returns:
+        InferenceWorker | None: The shared worker, or None if disabled.
+    """
+    global _worker
+    if _worker is not None:
+        return _worker
+    lazy_import("dotenv").load_dotenv()
+    model = os.getenv("FINBOT_MODEL")
+    if not model:
+        return None
+    with _worker_lock:
+        if _worker is None:
+            backend = PipelineBackend(model, token=os.getenv("HF_API_KEY"))
+            _worker = InferenceWorker(backend).start()
+            register_collector(lambda: {
+                f"finbot_inference_{name}": value
+                for name, value in _worker.metrics().items()
+            })
+    return _worker
+
+
+def current_inference_worker():
+    """
+    Returns the process-wide inference worker if one has been created.
+
+    Unlike `get_inference_worker` this never loads a model, so it is cheap
+    enough for status displays.
+
+    Returns:
+        InferenceWorker | None: The shared worker, or None if not loaded yet.
+    """
+    return _worker
+
+
+def start_warm_up():
+    """
+    Loads the model in a background thread so the first chat reply is fast.
+
+    Only runs when `FINBOT_WARMUP=1`; otherwise the model is loaded by the
+    first chat request that needs it.
+
+    Returns:
+        threading.Thread | None: The warm-up thread, if one was started.
+    """
+    if os.getenv("FINBOT_WARMUP") != "1" or _worker is not None:
+        return None
+    thread = threading.Thread(
+        target=get_inference_worker, name="finbot-warm-up", daemon=True)
+    thread.start()
+    return thread
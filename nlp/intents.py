@@ -0,0 +1,142 @@
+import re
+from collections import deque
+
+# --- INTENT TABLE ---
+# Each intent lists the keyword phrases that trigger it. Phrases match whole
+# words only, so "hi" no longer fires on "this" or "which". When several
+# intents match, the highest priority wins, then the longest phrase, then the
+# one that appears first in the query.
+INTENTS = [
+    {
+        "name": "greeting",
+        "priority": 0,
+        "keywords": ["hello", "hi", "hey", "good morning", "good evening"],
+    },
+    {
+        "name": "save_money",
+        "priority": 10,
+        "keywords": ["save money", "saving money", "save more", "savings", "budgeting"],
+    },
+    {
+        "name": "investing",
+        "priority": 10,
+        "keywords": ["investment", "investments", "investing", "invest", "stocks",
+                     "index fund", "index funds", "roth ira"],
+    },
+    {
+        "name": "taxes",
+        "priority": 10,
+        "keywords": ["taxes", "tax", "tax return", "deductions", "deduction"],
+    },
+]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> list:
+    """Lowercases `text` and splits it into word tokens."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class IntentMatcher:
+    """
+    Aho-Corasick automaton over word tokens for a table of intents.
+
+    The automaton is built once; classifying a query is then a single pass
+    over its tokens, independent of how many intents or keywords exist.
+    """
+
+    def __init__(self, intents: list):
+        # Node 0 is the root. `_goto[n]` maps a token to the next node,
+        # `_outputs[n]` holds (priority, length, intent) for phrases ending at n.
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for intent in intents:
+            for phrase in intent["keywords"]:
+                tokens = tokenize(phrase)
+                if tokens:
+                    self._add(tokens, (intent["priority"], len(tokens), intent["name"]))
+        self._link()
+
+    def _add(self, tokens: list, output: tuple):
+        node = 0
+        for token in tokens:
+            next_node = self._goto[node].get(token)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[node][token] = next_node
+            node = next_node
+        self._outputs[node].append(output)
+
+    def _link(self):
+        """Computes failure links breadth-first and merges suffix outputs."""
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for token, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+                pending.append(child)
+
+    def matches(self, query: str) -> list:
+        """
+        Returns every keyword hit in `query`.
+
+        Args:
+            query (str): The user's question.
+
+        Returns:
+            list: (priority, length, intent, token_position) tuples in order
+                of appearance.
+        """
+        hits = []
+        node = 0
+        for position, token in enumerate(tokenize(query)):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for priority, length, name in self._outputs[node]:
+                hits.append((priority, length, name, position - length + 1))
+        return hits
+
+    def classify(self, query: str):
+        """
+        Returns the name of the best matching intent, or None.
+
+        Args:
+            query (str): The user's question.
+
+        Returns:
+            str | None: The winning intent name.
+        """
+        best = None
+        for priority, length, name, start in self.matches(query):
+            rank = (priority, length, -start)
+            if best is None or rank > best[0]:
+                best = (rank, name)
+        return best[1] if best else None
+
+
+# Compiled once at import; shared by every session.
+_matcher = IntentMatcher(INTENTS)
+
+
+def classify_intent(query: str):
+    """
+    Classifies a user query against the built-in intent table.
+
+    Args:
+        query (str): The user's question.
+
+    Returns:
+        str | None: The intent name, or None if no keyword matched.
+    """
+    return _matcher.classify(query)
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from nlp.intents import tokenize
+from nlp.retrieval import STOPWORDS
+from utils.cache import LRUCache
+from utils.metrics import register_collector
+from utils.user_store import ConnectionPool
+
+# --- CONFIGURATION ---
+RESPONSE_CACHE_SIZE = int(os.getenv("FINBOT_RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("FINBOT_RESPONSE_CACHE_TTL", str(24 * 3600)))
+# SQLite file for the on-disk tier; unset keeps the cache in memory only
+RESPONSE_CACHE_PATH = os.getenv("FINBOT_RESPONSE_CACHE_PATH")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key                TEXT PRIMARY KEY,
+    response           TEXT NOT NULL,
+    generation_seconds REAL NOT NULL,
+    expires_at         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses(expires_at);
+"""
+
+
+# Words that change what is being asked ("why should I invest?" is not
+# "when should I invest?"); retrieval ignores them but the cache key keeps them.
+QUESTION_WORDS = frozenset("how what when where which who why can should will".split())
+_KEY_STOPWORDS = STOPWORDS - QUESTION_WORDS
+
+
+def normalize_query(query: str) -> str:
+    """
+    Folds a question to the form used as cache key.
+
+    Case, punctuation and whitespace are folded and stopwords other than
+    `QUESTION_WORDS` dropped, so "How do I save money?" and "how to save
+    money" share an entry but "Why should I invest?" and "When should I
+    invest?" do not.
+    """
+    return " ".join(token for token in tokenize(query) if token not in _KEY_STOPWORDS)
+
+
+class ResponseCache:
+    """
+    Caches generated chat responses by model, user type and normalized question.
+
+    The first tier is an in-process LRU with a per-entry TTL. An optional
+    SQLite tier keeps responses across restarts; disk hits are promoted to
+    memory. Every hit adds the generation time it avoided to `latency_saved`.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 path: str = RESPONSE_CACHE_PATH):
+        self.ttl = ttl
+        self._memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._pool = None
+        if path:
+            self._pool = ConnectionPool(path, size=2)
+            with self._pool.connection() as conn:
+                conn.executescript(SCHEMA)
+            self.purge_expired()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    @staticmethod
+    def key(query: str, user_type: str, model: str, context: tuple = None) -> str:
+        """
+        Builds the cache key; empty if the question has no content words.
+
+        Args:
+            query (str): The user's question.
+            user_type (str): The user's demographic.
+            model (str): Name of the model generating the answer.
+            context (tuple): Optional (summary, turns) of earlier conversation
+                included in the prompt; answers given with context are only
+                reused for the same context.
+
+        Returns:
+            str: The cache key.
+        """
+        normalized = normalize_query(query)
+        if not normalized:
+            return ""
+        key = f"{model}\x1f{user_type or ''}\x1f{normalized}"
+        summary, turns = context or ("", [])
+        if summary or turns:
+            digest = hashlib.blake2b(json.dumps([summary, turns]).encode(), digest_size=16)
+            key += f"\x1f{digest.hexdigest()}"
+        return key
+
+    def get(self, key: str):
+        """
+        Returns the cached response for `key`, or None.
+
+        Args:
+            key (str): A key from `ResponseCache.key`.
+
+        Returns:
+            str | None: The response, if cached and not expired.
+        """
+        if not key:
+            return None
+        entry = self._memory.get(key)
+        from_disk = False
+        if entry is None and self._pool is not None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                from_disk = True
+                self._memory.set(key, entry[:2], ttl=entry[2] - time.time())
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += from_disk
+            self.latency_saved += entry[1]
+        return entry[0]
+
+    def set(self, key: str, response: str, generation_seconds: float):
+        """Stores a generated response and how long it took to generate."""
+        if not key or not response:
+            return
+        self._memory.set(key, (response, generation_seconds))
+        if self._pool is not None:
+            with self._pool.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, response, generation_seconds, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, response, generation_seconds, time.time() + self.ttl),
+                )
+
+    def _read_disk(self, key: str):
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT response, generation_seconds, expires_at FROM responses "
+                "WHERE key = ? AND expires_at > ?", (key, time.time()),
+            ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def purge_expired(self) -> int:
+        """Deletes expired rows from the disk tier; returns how many."""
+        if self._pool is None:
+            return 0
+        with self._pool.connection() as conn:
+            return conn.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self):
+        """Drops every cached response from both tiers."""
+        self._memory.clear()
+        if self._pool is not None:
+            with self._pool.connection() as conn:
+                conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """Returns hit rate, latency saved and tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "latency_saved_seconds": self.latency_saved,
+            }
+        memory = self._memory.stats()
+        stats["entries"] = memory["entries"]
+        stats["evictions"] = memory["evictions"]
+        stats["expirations"] = memory["expirations"]
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide response cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = ResponseCache()
+                register_collector(lambda: {
+                    f"finbot_response_cache_{name}": value
+                    for name, value in cache.stats().items()
+                })
+                _cache = cache
+    return _cache
@@ -0,0 +1,410 @@
+"""
+Local retrieval of advice snippets for the chatbot.
+
+Snippets live in a JSON Lines knowledge base tagged by `user_type` and topic.
+Their embeddings are computed offline into a float32 `.npy` matrix that is
+memory-mapped at query time, so loading costs milliseconds and no copy of the
+matrix is made. Lookups are a dot product plus `argpartition`; large corpora
+are split into an inverted-file (IVF) layout and only the closest partitions
+are scanned. Everything runs offline.
+
+Run `python -m nlp.retrieval build` to (re)build the index, or
+`python -m nlp.retrieval query "how do I invest" --user-type Student`.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from nlp.intents import tokenize
+
+# --- CONFIGURATION ---
+KNOWLEDGE_BASE_PATH = os.getenv("FINBOT_KB_PATH", "data/advice_snippets.jsonl")
+INDEX_DIR = os.getenv("FINBOT_INDEX_DIR", "data/index")
+EMBEDDING_DIM = 512
+# Corpora with at least this many snippets get an IVF layout
+IVF_MIN_ROWS = int(os.getenv("FINBOT_IVF_MIN_ROWS", "50000"))
+# Partitions scanned per query in IVF mode
+IVF_NPROBE = int(os.getenv("FINBOT_IVF_NPROBE", "8"))
+
+_VECTORS_FILE = "vectors.npy"
+_USER_TYPES_FILE = "user_types.npy"
+_TOPICS_FILE = "topics.npy"
+_SNIPPETS_FILE = "snippets.jsonl"
+_SNIPPET_OFFSETS_FILE = "snippet_offsets.npy"
+_CENTROIDS_FILE = "centroids.npy"
+_PARTITIONS_FILE = "partitions.npy"
+_META_FILE = "meta.json"
+
+STOPWORDS = frozenset(
+    "a an and are as at be can do does for from how i i'm in is it my of on or "
+    "should so that the this to what when where which who why will with you your "
+    "me we our about any some".split()
+)
+_SUFFIXES = ("ments", "ment", "ings", "ing", "ies", "es", "ed", "s")
+
+
+def _stem(token: str) -> str:
+    """Strips common English suffixes so 'saving', 'saves' and 'save' match."""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)] + ("y" if suffix == "ies" else "")
+            break
+    if token.endswith("e") and len(token) > 3:
+        token = token[:-1]
+    return token
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder based on feature hashing.
+
+    Stemmed words and word pairs are hashed (with blake2b, so results do not
+    depend on the interpreter's hash seed) into a fixed number of signed
+    buckets and L2-normalized. It needs no model download, which makes it the
+    default for offline use and a stable stand-in in tests; any object with
+    `name`, `dim` and `embed(texts)` can replace it.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._buckets = {}
+
+    def features(self, text: str) -> list:
+        """Returns the hashed features of `text`: stems and adjacent stem pairs."""
+        stems = [_stem(token) for token in tokenize(text) if token not in STOPWORDS]
+        return stems + [f"{a} {b}" for a, b in zip(stems, stems[1:])]
+
+    def _bucket(self, feature: str) -> tuple:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            digest = int.from_bytes(
+                hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            bucket = self._buckets[feature] = (digest % self.dim,
+                                               1.0 if digest >> 63 else -1.0)
+        return bucket
+
+    def embed(self, texts: list) -> np.ndarray:
+        """
+        Embeds texts into unit-length float32 vectors.
+
+        Args:
+            texts (list): Strings to embed.
+
+        Returns:
+            np.ndarray: Array of shape (len(texts), dim).
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self.features(text):
+                column, sign = self._bucket(feature)
+                vectors[row, column] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def load_snippets(path: str = KNOWLEDGE_BASE_PATH) -> list:
+    """Reads the knowledge base: dicts with id, user_type, topic, title and text."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _snippet_text(snippet: dict) -> str:
+    """Text that is embedded for a snippet: its title, topic and body."""
+    return f"{snippet['title']}. {snippet['topic'].replace('_', ' ')}. {snippet['text']}"
+
+
+# --- IVF PARTITIONING ---
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Index of the most similar centroid for every row, in chunks."""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        labels[start:start + chunk] = np.argmax(
+            vectors[start:start + chunk] @ centroids.T, axis=1)
+    return labels
+
+
+def train_partitions(vectors: np.ndarray, n_lists: int, iterations: int = 10,
+                     seed: int = 0) -> tuple:
+    """
+    Spherical k-means over unit vectors.
+
+    Args:
+        vectors (np.ndarray): Unit-length rows to partition.
+        n_lists (int): Number of partitions.
+        iterations (int): Lloyd iterations.
+        seed (int): Seed for the initial centroids.
+
+    Returns:
+        tuple: (centroids, partition label per row).
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        sums[empty] = centroids[empty]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids, _assign(vectors, centroids)
+
+
+def build_index(kb_path: str = KNOWLEDGE_BASE_PATH, directory: str = INDEX_DIR,
+                embedder=None, ivf_min_rows: int = IVF_MIN_ROWS) -> str:
+    """
+    Embeds the knowledge base and writes the index files.
+
+    Vectors are stored as a float32 `.npy` matrix. For an IVF layout, rows are
+    ordered by partition so each partition is one contiguous slice of the
+    memory-mapped matrix. Files are written to temporaries and renamed, so a
+    running process never sees a half-written index.
+
+    Args:
+        kb_path (str): JSON Lines knowledge base.
+        directory (str): Output directory.
+        embedder: Embedder to use; defaults to `HashingEmbedder`.
+        ivf_min_rows (int): Build IVF partitions from this many snippets on.
+
+    Returns:
+        str: The index directory.
+    """
+    embedder = embedder or HashingEmbedder()
+    snippets = load_snippets(kb_path)
+    vectors = embedder.embed([_snippet_text(s) for s in snippets])
+
+    arrays = {}
+    ivf = len(snippets) >= ivf_min_rows
+    if ivf:
+        centroids, labels = train_partitions(vectors, int(np.sqrt(len(vectors))))
+        order = np.argsort(labels, kind="stable")
+        vectors = vectors[order]
+        snippets = [snippets[i] for i in order]
+        arrays[_CENTROIDS_FILE] = centroids
+        arrays[_PARTITIONS_FILE] = np.searchsorted(
+            labels[order], np.arange(len(centroids) + 1))
+    arrays[_VECTORS_FILE] = vectors
+
+    # Tags are stored as small integer codes so filtering never parses JSON
+    user_types = sorted({s.get("user_type") or "" for s in snippets})
+    topics = sorted({s.get("topic") or "" for s in snippets})
+    arrays[_USER_TYPES_FILE] = np.array(
+        [user_types.index(s.get("user_type") or "") for s in snippets], dtype=np.int16)
+    arrays[_TOPICS_FILE] = np.array(
+        [topics.index(s.get("topic") or "") for s in snippets], dtype=np.int16)
+
+    # Snippet bodies are only read for the winning rows, via byte offsets
+    lines = [(json.dumps(s) + "\n").encode("utf-8") for s in snippets]
+    arrays[_SNIPPET_OFFSETS_FILE] = np.concatenate(
+        [[0], np.cumsum([len(line) for line in lines])]).astype(np.int64)
+
+    os.makedirs(directory, exist_ok=True)
+    _write_atomic(directory, _SNIPPETS_FILE, lambda f: f.writelines(lines))
+    for name, array in arrays.items():
+        _write_atomic(directory, name, lambda f, a=array: np.save(f, np.ascontiguousarray(a)))
+    meta = {
+        "embedder": embedder.name,
+        "dim": embedder.dim,
+        "source": _file_digest(kb_path),
+        "count": len(snippets),
+        "ivf": ivf,
+        "user_types": user_types,
+        "topics": topics,
+    }
+    # The metadata goes last: it is what marks the index as complete
+    _write_atomic(directory, _META_FILE, lambda f: f.write(json.dumps(meta).encode()))
+    return directory
+
+
+def _write_atomic(directory: str, name: str, write):
+    # A unique temporary per writer, so processes building the index at the
+    # same time never truncate or rename each other's half-written files
+    f = tempfile.NamedTemporaryFile(dir=directory, prefix=f".{name}.", suffix=".tmp",
+                                    delete=False)
+    try:
+        with f:
+            write(f)
+        os.replace(f.name, os.path.join(directory, name))
+    except BaseException:
+        if os.path.exists(f.name):
+            os.remove(f.name)
+        raise
+
+
+class AdviceIndex:
+    """
+    A memory-mapped snippet index answering top-k similarity queries.
+
+    Opening an index reads only a small metadata file; vectors, tags and
+    snippet offsets are memory-mapped, and snippet bodies are read for the
+    returned rows only, so load time does not grow with the corpus.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, _META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        def array(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        self.vectors = array(_VECTORS_FILE)
+        self._user_types = array(_USER_TYPES_FILE)
+        self._topics = array(_TOPICS_FILE)
+        self._offsets = array(_SNIPPET_OFFSETS_FILE)
+        self.centroids = self.partitions = None
+        if self.meta["ivf"]:
+            self.centroids = np.load(os.path.join(directory, _CENTROIDS_FILE))
+            self.partitions = np.load(os.path.join(directory, _PARTITIONS_FILE))
+        self._snippets_path = os.path.join(directory, _SNIPPETS_FILE)
+
+    @classmethod
+    def load(cls, directory: str = INDEX_DIR) -> "AdviceIndex":
+        """Opens an index without reading the vectors into memory."""
+        return cls(directory)
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def snippets(self, rows) -> list:
+        """Reads the snippet dicts of the given rows."""
+        found = []
+        with open(self._snippets_path, "rb") as f:
+            for row in rows:
+                f.seek(int(self._offsets[row]))
+                found.append(json.loads(f.read(int(self._offsets[row + 1] - self._offsets[row]))))
+        return found
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> tuple:
+        """Returns (row ids, scores) of the rows that are scanned for `query`."""
+        if self.centroids is None:
+            return np.arange(len(self.vectors)), self.vectors @ query
+        nprobe = min(nprobe, len(self.centroids))
+        bounds = self.partitions
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([np.arange(bounds[i], bounds[i + 1]) for i in lists])
+        scores = np.concatenate([self.vectors[bounds[i]:bounds[i + 1]] @ query for i in lists])
+        return rows, scores
+
+    def search(self, query: np.ndarray, k: int = 3, user_type: str = None,
+               topic: str = None, nprobe: int = IVF_NPROBE) -> list:
+        """
+        Finds the snippets most similar to an embedded query.
+
+        Args:
+            query (np.ndarray): Unit-length query vector.
+            k (int): Number of results.
+            user_type (str): Keep snippets for this user type or for everyone.
+            topic (str): Keep only snippets with this topic.
+            nprobe (int): Partitions scanned when the index is IVF.
+
+        Returns:
+            list: (score, snippet) pairs, best first.
+        """
+        rows, scores = self._candidates(np.asarray(query, dtype=np.float32), nprobe)
+        if user_type is not None:
+            allowed = [self._code("user_types", ""), self._code("user_types", user_type)]
+            scores = np.where(np.isin(self._user_types[rows], allowed), scores, -np.inf)
+        if topic is not None:
+            scores = np.where(self._topics[rows] == self._code("topics", topic), scores, -np.inf)
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return list(zip(scores[top].tolist(), self.snippets(rows[top])))
+
+    def _code(self, tag: str, value: str) -> int:
+        """Integer code of a tag value, or -1 if no snippet carries it."""
+        labels = self.meta[tag]
+        return labels.index(value) if value in labels else -1
+
+
+_index = None
+_embedder = None
+_index_lock = threading.Lock()
+
+
+def get_advice_index(directory: str = INDEX_DIR, kb_path: str = KNOWLEDGE_BASE_PATH):
+    """
+    Returns the process-wide index, building it first if missing or stale.
+
+    The index is rebuilt when the knowledge base file or the embedder changed
+    since it was written.
+
+    Returns:
+        tuple: (AdviceIndex, embedder used to build it).
+    """
+    global _index, _embedder
+    if _index is not None:
+        return _index, _embedder
+    with _index_lock:
+        if _index is None:
+            embedder = HashingEmbedder()
+            meta_path = os.path.join(directory, _META_FILE)
+            stale = True
+            if os.path.exists(meta_path):
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                stale = (meta.get("source") != _file_digest(kb_path)
+                         or meta.get("embedder") != embedder.name
+                         or meta.get("dim") != embedder.dim)
+            if stale:
+                build_index(kb_path, directory, embedder)
+            _index, _embedder = AdviceIndex.load(directory), embedder
+    return _index, _embedder
+
+
+def retrieve_advice(query: str, user_type: str = None, k: int = 3) -> list:
+    """
+    Finds knowledge-base snippets relevant to a question.
+
+    Args:
+        query (str): The user's question.
+        user_type (str): The user's demographic ('Student' or 'Professional').
+        k (int): Number of snippets to return.
+
+    Returns:
+        list: (score, snippet) pairs, best first; scores are cosine similarities.
+    """
+    index, embedder = get_advice_index()
+    query_vector = embedder.embed([query])[0]
+    if not query_vector.any():
+        return []
+    return index.search(query_vector, k, user_type=user_type)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build or query the advice index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="Embed the knowledge base and write the index")
+    query_parser = commands.add_parser("query", help="Show the best snippets for a question")
+    query_parser.add_argument("text")
+    query_parser.add_argument("--user-type", choices=["Student", "Professional"])
+    query_parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        build_index()
+        print(f"built {INDEX_DIR} in {time.perf_counter() - started:.2f}s")
+    else:
+        for score, snippet in retrieve_advice(args.text, args.user_type, args.k):
+            print(f"{score:.3f}  [{snippet['topic']}] {snippet['title']}: {snippet['text']}")
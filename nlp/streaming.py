@@ -0,0 +1,23 @@
+import re
+
+# Splits text into word-sized chunks, keeping the trailing whitespace so the
+# chunks concatenate back to the original text.
+_CHUNK_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def iter_chunks(text: str):
+    """
+    Yields a complete response in word-sized chunks.
+
+    Used to stream responses that are available all at once (canned answers,
+    cache hits) through the same incremental rendering path as model output.
+
+    Args:
+        text (str): The full response text.
+
+    Yields:
+        str: Successive chunks of `text`.
+    """
+    for match in _CHUNK_PATTERN.finditer(text):
+        yield match.group(0)
+
@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+from finance.aggregates import get_spending_cube
+from finance.analysis import prepare_chart_data
+from finance.ingest import is_read_only, load_transactions
+
+DEMO = "data/expense_data_1.csv"
+
+
+@pytest.fixture
+def demo():
+    return load_transactions(DEMO)
+
+
+def test_cube_is_memoized_for_read_only_frames(demo):
+    assert is_read_only(demo)
+    assert get_spending_cube(demo) is get_spending_cube(demo)
+
+
+@pytest.mark.parametrize("derive", [
+    lambda df: df.copy(),
+    lambda df: df[df["Amount"] > 0],
+])
+def test_edited_copies_and_slices_are_aggregated_afresh(demo, derive):
+    frame = derive(demo)
+    assert not is_read_only(frame)
+    before = get_spending_cube(frame).total
+    frame.loc[frame.index[0], "Amount"] += 1_000_000
+    assert get_spending_cube(frame).total == pytest.approx(before + 1_000_000)
+
+
+def test_empty_frame_gives_empty_rollups():
+    empty = load_transactions(io.BytesIO(b"Date,Category,Amount\n"))
+    chart = prepare_chart_data(empty, "Date")
+    assert list(chart.columns) == ["Date", "Amount"]
+    assert chart.empty
+    cube = get_spending_cube(empty)
+    assert cube.by_month().empty
+    assert cube.category_by_month().empty
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from utils import auth, user_store
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    user_store.use_database(str(tmp_path / "finbot.db"))
+    monkeypatch.setattr(auth, "SCRYPT_N", 2 ** 4)
+    monkeypatch.setattr(auth, "_verified_tokens", auth.LRUCache(maxsize=100, ttl=0.2))
+    auth.create_user("alice", "secret", "Student")
+    yield
+    user_store.use_database(user_store.DB_PATH)
+
+
+def test_exchanged_token_works_once(database):
+    token = auth.create_session("alice", "Student")
+    assert auth.verify_session(token)["sub"] == "alice"
+
+    fresh = auth.exchange_session(token)
+    claims = auth.verify_session(fresh)
+    assert (claims["sub"], claims["type"]) == ("alice", "Student")
+    assert auth.verify_session(token) is None
+    assert auth.exchange_session(token) is None
+
+
+def test_revocation_elsewhere_is_noticed_after_the_recheck_interval(database):
+    token = auth.create_session("alice", "Student")
+    claims = auth.verify_session(token)
+    # Another process logs the session out; this one still trusts its cache
+    user_store.delete_session(claims["sid"])
+    assert auth.verify_session(token) is not None
+
+    time.sleep(0.3)
+    assert auth.verify_session(token) is None
+
+
+def test_malformed_tokens_are_rejected(database):
+    for token in ("abc.déf", "é.abc", "no-dot", "a.b.c", ""):
+        assert auth.verify_session(token) is None
+        assert auth.exchange_session(token) is None
@@ -0,0 +1,41 @@
+import json
+import shutil
+
+import numpy as np
+
+from finance import batch
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_non_finite_numbers_are_written_as_null():
+    record = {"summary": {"ratio": np.float64("nan"), "total": np.int64(3),
+                          "rates": [float("inf"), 0.5]}}
+    text = json.dumps(batch._jsonable(record), allow_nan=False)
+    assert json.loads(text) == {"summary": {"ratio": None, "total": 3,
+                                            "rates": [None, 0.5]}}
+
+
+def test_rerun_keeps_one_line_per_user(tmp_path):
+    shutil.copy("data/expense_data_1.csv", tmp_path / "good.csv")
+    (tmp_path / "broken.csv").write_text("not,a\ntransaction,file\n")
+    output = tmp_path / "results.jsonl"
+    jobs = batch.jobs_from_directory(str(tmp_path), "Student")
+
+    first = batch.run_batch(jobs, str(output), workers=1)
+    second = batch.run_batch(jobs, str(output), workers=1)
+
+    assert first == {"processed": 2, "failed": 1, "skipped": 0}
+    assert second == {"processed": 1, "failed": 1, "skipped": 1}
+    records = _lines(output)
+    assert sorted(record["user_id"] for record in records) == ["broken", "good"]
+    assert "error" in next(r for r in records if r["user_id"] == "broken")
+
+
+def test_checkpoint_drops_a_torn_final_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"user_id": "a", "rows": 1}\n{"user_id": "b", "er')
+    assert batch.read_checkpoint(str(output)) == {"a"}
+    assert output.read_text() == '{"user_id": "a", "rows": 1}\n'
@@ -0,0 +1,22 @@
+from finance.analysis import generate_budget_summary
+from finance.cache import dataset_fingerprint
+from finance.ingest import load_transactions
+
+
+def test_edited_copy_is_not_served_stale_results():
+    demo = load_transactions("data/expense_data_1.csv")
+    copy = demo.copy()
+    before = generate_budget_summary(copy)
+    fingerprint = dataset_fingerprint(copy)
+
+    copy.loc[0, "Amount"] = 1e6
+    assert dataset_fingerprint(copy) != fingerprint
+    assert generate_budget_summary(copy) != before
+    assert generate_budget_summary(demo) == before
+
+
+def test_fingerprint_depends_on_content_not_identity():
+    first = load_transactions("data/expense_data_1.csv")
+    second = load_transactions("data/expense_data_1.csv")
+    assert first is not second
+    assert dataset_fingerprint(first) == dataset_fingerprint(second)
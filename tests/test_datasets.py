@@ -0,0 +1,89 @@
+import os
+import stat
+
+import pytest
+
+from finance.cache import dataset_fingerprint
+from finance.datasets import DatasetStore
+from finance.ingest import get_derived, load_transactions
+
+DEMO = "data/expense_data_1.csv"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path), session_budget=10 ** 9, global_budget=10 ** 9,
+                        idle_seconds=600, large_idle_seconds=30)
+
+
+@pytest.fixture
+def frame():
+    return load_transactions(DEMO)
+
+
+def test_spill_directory_is_private(store, tmp_path):
+    assert os.path.dirname(store.directory) == str(tmp_path)
+    assert stat.S_IMODE(os.stat(store.directory).st_mode) == 0o700
+
+
+def test_spilled_frame_reloads_with_its_fingerprint(store):
+    # Not the fixture, which would keep the frame alive after the spill
+    frame = load_transactions(DEMO)
+    dataset = store.open()
+    dataset.set(frame)
+    fingerprint = dataset_fingerprint(frame)
+    assert dataset.spill()
+    assert dataset.spilled and os.path.exists(dataset.path)
+
+    del frame
+    reloaded = dataset.get()
+    assert dataset.resident and store.reloads == 1
+    assert get_derived(reloaded, "fingerprint") == fingerprint
+    assert dataset_fingerprint(reloaded) == dataset_fingerprint(load_transactions(DEMO))
+
+
+def test_active_session_keeps_a_large_frame_across_reruns(store, frame):
+    store.session_budget = 1
+    dataset = store.open()
+    dataset.set(frame)
+    for _ in range(3):
+        assert dataset.get() is frame
+    assert store.spills == store.reloads == 0
+
+
+def test_enforce_spills_idle_and_over_budget_sessions(store, frame):
+    idle, large, active = store.open(), store.open(), store.open()
+    for dataset in (idle, large, active):
+        dataset.set(frame.copy())
+    store.session_budget = idle.nbytes - 1
+    idle.last_access -= 601
+    large.last_access -= 31
+    active.last_access -= 10 ** 4
+
+    assert store.enforce(active=active) == 2
+    assert idle.spilled and large.spilled and active.resident
+
+
+def test_enforce_keeps_recent_large_frames_until_over_global_budget(store, frame):
+    older, newer, active = store.open(), store.open(), store.open()
+    for dataset in (older, newer, active):
+        dataset.set(frame.copy())
+    store.session_budget = 1
+    older.last_access -= 5
+    assert store.enforce(active=active) == 0
+
+    store.global_budget = 2 * active.nbytes
+    assert store.enforce(active=active) == 1
+    assert older.spilled and newer.resident
+
+
+def test_replacing_the_frame_drops_the_spill_file(store, frame):
+    dataset = store.open()
+    dataset.set(frame.copy())
+    dataset.spill()
+    path = dataset.path
+    dataset.set(frame)
+    assert not os.path.exists(path)
+    assert dataset.shared is False and dataset.resident
+    dataset.clear()
+    assert dataset.get() is None
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from nlp.executor import CANCELLED, DONE, FAILED, TIMED_OUT, ChatExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = ChatExecutor(max_workers=1, max_jobs=2, timeout=5)
+    yield executor
+    executor._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _wait(job, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+def _chunks(words, delay=0.0, closed=None):
+    try:
+        for word in words:
+            time.sleep(delay)
+            yield word
+    finally:
+        if closed is not None:
+            closed.set()
+
+
+def test_job_collects_chunks_and_latency(executor):
+    job = executor.submit("q", _chunks, ["a", "b", "c"])
+    assert _wait(job) == DONE
+    assert job.text == "abc"
+    metrics = job.metrics()
+    assert metrics["chunks"] == 3
+    assert 0 <= metrics["time_to_first_token"] <= metrics["total_time"]
+
+
+def test_cancel_stops_and_closes_the_producer(executor):
+    closed = threading.Event()
+    job = executor.submit("q", _chunks, ["x"] * 1000, 0.01, closed)
+    time.sleep(0.05)
+    job.cancel()
+    assert _wait(job) == CANCELLED
+    assert closed.wait(1)
+    assert len(job.text) < 1000
+
+
+def test_queued_job_cancelled_before_it_starts(executor):
+    gate = threading.Event()
+    blocker = executor.submit("q", lambda: iter([gate.wait(5) and "done"]))
+    queued = executor.submit("q", _chunks, ["never"])
+    queued.cancel()
+    gate.set()
+    assert _wait(blocker) == DONE
+    assert _wait(queued) == CANCELLED
+    assert queued.text == ""
+
+
+def test_job_past_its_deadline_times_out():
+    executor = ChatExecutor(max_workers=1, max_jobs=2, timeout=0.1)
+    closed = threading.Event()
+    job = executor.submit("q", _chunks, ["x"] * 1000, 0.02, closed)
+    assert _wait(job) == TIMED_OUT
+    assert closed.wait(1)
+    executor._pool.shutdown(wait=True)
+    assert executor.stats()[TIMED_OUT] == 1
+
+
+def test_producer_errors_are_reported(executor):
+    def broken():
+        yield "partial"
+        raise ValueError("model crashed")
+
+    job = executor.submit("q", broken)
+    assert _wait(job) == FAILED
+    assert isinstance(job.error, ValueError)
+    assert job.text == "partial"
+
+
+def test_requests_beyond_max_jobs_are_refused(executor):
+    gate = threading.Event()
+    jobs = [executor.submit("q", lambda: iter([gate.wait(5) and "ok"])) for _ in range(2)]
+    with pytest.raises(RuntimeError):
+        executor.submit("q", _chunks, ["x"])
+    assert executor.stats()["rejected"] == 1
+
+    gate.set()
+    for job in jobs:
+        assert _wait(job) == DONE
+    executor._pool.shutdown(wait=True)
+    assert executor.stats()["active"] == 0
+    assert executor.stats()[DONE] == 2
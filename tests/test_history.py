@@ -0,0 +1,77 @@
+import os
+import stat
+
+import pytest
+
+from nlp.history import SUMMARY_PREFIX, SUMMARY_SHARE, ChatHistory, estimate_tokens
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ChatHistory(maxlen=6, directory=str(tmp_path))
+
+
+def _converse(history, turns, words=10):
+    for turn in range(turns):
+        history.append({"role": "user", "content": f"question {turn} " + "q " * words})
+        history.append({"role": "assistant", "content": f"answer {turn} " + "a " * words})
+
+
+def _tokens(summary, turns):
+    return estimate_tokens(summary) + sum(estimate_tokens(t["content"]) for t in turns)
+
+
+def test_old_messages_are_archived_and_read_back_in_order(history):
+    _converse(history, 10)
+    assert len(history) == 20
+    assert history.archived == 14
+    recent = history.recent(9)
+    assert [m["content"].split()[:2] for m in recent[:2]] == [
+        ["answer", "5"], ["question", "6"]]
+    assert len(recent) == 9
+    assert [m["content"] for m in history.recent(20)] == [
+        m["content"] for m in history.recent(100)]
+
+
+def test_context_fits_the_budget_and_starts_with_a_question(history):
+    _converse(history, 10)
+    for budget in (20, 40, 80, 400):
+        summary, turns = history.context(budget)
+        assert _tokens(summary, turns) <= budget
+        assert not turns or turns[0]["role"] == "user"
+        assert all(set(turn) == {"role", "content"} for turn in turns)
+
+
+def test_summary_lists_earlier_questions_within_its_share(history):
+    _converse(history, 10)
+    budget = 80
+    summary, turns = history.context(budget)
+    assert summary.startswith(SUMMARY_PREFIX)
+    assert estimate_tokens(summary) <= budget // SUMMARY_SHARE
+    # The newest question that was left out is the last one summarized
+    first_kept = int(turns[0]["content"].split()[1])
+    assert f"question {first_kept - 1}" in summary
+    assert "question 0" not in summary
+
+
+def test_short_conversation_needs_no_summary(history):
+    _converse(history, 2)
+    summary, turns = history.context(1000)
+    assert summary == ""
+    assert len(turns) == 4
+
+
+def test_clear_deletes_the_archive(history):
+    _converse(history, 5)
+    assert os.path.exists(history.path)
+    history.clear()
+    assert len(history) == 0
+    assert not os.path.exists(history.path)
+    assert history.context() == ("", [])
+
+
+def test_archive_directory_is_private(history, tmp_path):
+    _converse(history, 5)
+    directory = os.path.dirname(history.path)
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
@@ -0,0 +1,99 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance.aggregates import build_spending_cube, get_spending_cube
+from finance.analysis import generate_spending_insights
+from finance.cache import dataset_fingerprint
+from finance.incremental import append_transactions
+from finance.ingest import concat_transactions, load_transactions, transaction_keys
+
+DEMO = "data/expense_data_1.csv"
+MINIMAL = b"Date,Category,Amount\n2022-03-05,Food,12.5\n2022-03-06,Rent,500\n"
+
+
+@pytest.fixture
+def demo():
+    return load_transactions(DEMO)
+
+
+@pytest.fixture
+def minimal():
+    return load_transactions(io.BytesIO(MINIMAL))
+
+
+def assert_same_cube(actual, expected):
+    assert list(actual.categories) == list(expected.categories)
+    np.testing.assert_allclose(actual.category_totals, expected.category_totals)
+    np.testing.assert_array_equal(actual.category_counts, expected.category_counts)
+    assert actual.first_month == expected.first_month
+    np.testing.assert_allclose(actual.category_month, expected.category_month)
+    np.testing.assert_allclose(actual.month_totals, expected.month_totals)
+    assert actual.first_day == expected.first_day
+    np.testing.assert_allclose(actual.day_totals, expected.day_totals)
+    assert actual.total == pytest.approx(expected.total)
+    assert actual.count == expected.count
+
+
+def test_concat_keeps_columns_missing_from_some_frames(demo, minimal):
+    merged = concat_transactions([demo, minimal])
+    assert list(merged.columns) == list(demo.columns)
+    assert merged["Note"].iloc[-2:].isna().all()
+    assert merged["Account"].iloc[:len(demo)].equals(demo["Account"])
+
+
+def test_keys_do_not_depend_on_missing_columns(minimal):
+    filled = concat_transactions([minimal, load_transactions(io.BytesIO(
+        b"Date,Account,Category,Amount,Note\n2022-01-01,Card,Food,1,x\n"))]).iloc[:2]
+    np.testing.assert_array_equal(transaction_keys(minimal), transaction_keys(filled))
+
+
+def test_append_minimal_file_keeps_history_columns(demo, minimal):
+    merged, added, duplicates = append_transactions(demo, minimal)
+    assert (added, duplicates) == (2, 0)
+    assert list(merged.columns) == list(demo.columns)
+    assert merged["Account"].iloc[:len(demo)].equals(demo["Account"])
+
+    again, added, duplicates = append_transactions(merged, minimal)
+    assert (added, duplicates) == (0, 2)
+    assert again is merged
+
+
+def test_append_skips_transactions_already_present(demo):
+    merged, added, duplicates = append_transactions(demo, demo.iloc[:10])
+    assert (added, duplicates) == (0, 10)
+    assert merged is demo
+
+
+def test_merged_cube_matches_rebuild(demo, minimal):
+    later = demo.iloc[200:]
+    merged, _, _ = append_transactions(demo.iloc[:200], concat_transactions([later, minimal]))
+    assert_same_cube(get_spending_cube(merged), build_spending_cube(merged))
+
+
+def test_cube_merge_matches_rebuild_over_disjoint_ranges(demo):
+    first, second = demo.iloc[:100], demo.iloc[100:]
+    merged = build_spending_cube(first).merge(build_spending_cube(second))
+    assert_same_cube(merged, build_spending_cube(concat_transactions([first, second])))
+
+
+def test_dates_outside_demo_range_extend_cube():
+    df = pd.DataFrame({"Date": ["2020-01-01", "2020-03-01"], "Category": ["A", "B"],
+                       "Amount": [1.0, 2.0]})
+    early = load_transactions(io.StringIO(df.to_csv(index=False)))
+    late = load_transactions(io.BytesIO(MINIMAL))
+    merged = build_spending_cube(late).merge(build_spending_cube(early))
+    assert_same_cube(merged, build_spending_cube(concat_transactions([late, early])))
+
+
+def test_appends_differing_only_in_category_are_cached_apart(demo):
+    rows = "Date,Category,Amount\n2022-03-05,{},99999\n"
+    food, _, _ = append_transactions(demo, load_transactions(io.BytesIO(
+        rows.format("Food").encode())))
+    travel, _, _ = append_transactions(demo, load_transactions(io.BytesIO(
+        rows.format("Travel").encode())))
+    assert dataset_fingerprint(food) != dataset_fingerprint(travel)
+    assert generate_spending_insights(food, "Student")[0] != \
+        generate_spending_insights(travel, "Student")[0]
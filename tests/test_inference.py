@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from nlp.inference import FakeGenerator, InferenceWorker
+
+
+@pytest.fixture
+def worker():
+    worker = InferenceWorker(FakeGenerator(call_latency=0.1, prompt_latency=0.02),
+                             max_batch_size=8, max_wait=0.05).start()
+    yield worker
+    worker.stop(timeout=5)
+
+
+def _concurrently(count, func):
+    results = [None] * count
+
+    def run(index):
+        results[index] = func(index)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_prompts_are_batched(worker):
+    results = _concurrently(4, lambda i: worker.generate(f"prompt {i}"))
+    assert results == [f"Echo: prompt {i}" for i in range(4)]
+    metrics = worker.metrics()
+    assert metrics["completed"] == 4
+    assert metrics["batches"] < 4
+    assert worker.backend.calls == metrics["batches"]
+
+
+def test_expired_request_times_out(worker):
+    with pytest.raises(TimeoutError):
+        worker.generate("too slow", timeout=0.01)
+
+
+def test_concurrent_streams_are_batched(worker):
+    started = time.monotonic()
+    texts = _concurrently(4, lambda i: "".join(worker.stream(f"stream {i}")))
+    elapsed = time.monotonic() - started
+    assert [text.strip() for text in texts] == [f"Echo: stream {i}" for i in range(4)]
+    metrics = worker.metrics()
+    assert metrics["streamed"] == 4
+    assert metrics["batches"] == 1
+    # Serial streaming would take four times the single-stream latency
+    assert elapsed < 2 * (0.1 + 3 * 0.02) + 0.1
+
+
+def test_abandoned_stream_stops_generation(worker):
+    chunks = worker.stream("a long answer " * 20)
+    next(chunks)
+    chunks.close()
+    deadline = time.monotonic() + 2
+    while worker.metrics()["cancelled"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    metrics = worker.metrics()
+    assert metrics["cancelled"] == 1
+    assert metrics["streamed"] == metrics["completed"] == 0
+
+
+def test_stream_timeout_is_counted(worker):
+    with pytest.raises(TimeoutError):
+        list(worker.stream("slow " * 30, timeout=0.15))
+    deadline = time.monotonic() + 2
+    while worker.metrics()["timed_out"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert worker.metrics()["timed_out"] == 1
+    assert worker.metrics()["completed"] == 0
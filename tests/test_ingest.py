@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from finance import ingest
+from finance.ingest import (
+    get_derived,
+    is_read_only,
+    load_parquet,
+    load_transactions,
+    save_parquet,
+    set_derived,
+)
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return load_transactions("data/expense_data_1.csv")
+
+
+@pytest.mark.parametrize("column, value", [
+    ("Amount", 1.0),
+    ("Category", "Food"),
+    ("Note", "edited"),
+])
+def test_normalized_frames_reject_in_place_edits(frame, column, value):
+    with pytest.raises(ValueError):
+        frame.loc[0, column] = value
+
+
+def test_reloaded_frames_are_read_only_too(frame, tmp_path):
+    path = str(tmp_path / "frame.parquet")
+    save_parquet(frame, path)
+    reloaded = load_parquet(path)
+    with pytest.raises(ValueError):
+        reloaded.loc[0, "Note"] = "edited"
+    assert reloaded.equals(frame)
+
+
+def test_copies_can_be_edited(frame):
+    copy = frame.copy()
+    copy.loc[0, "Category"] = "Food"
+    copy.loc[0, "Note"] = "edited"
+    assert copy.loc[0, "Note"] == "edited"
+    assert frame.loc[0, "Note"] != "edited"
+
+
+def test_normalized_frames_are_registered_read_only(frame):
+    assert is_read_only(frame)
+    assert not is_read_only(frame.copy())
+
+
+def test_frames_that_cannot_be_locked_are_not_memoized(monkeypatch):
+    # Stands in for a pandas release that no longer exposes `_codes`
+    monkeypatch.setattr(ingest, "_lock_buffer",
+                        lambda values: not isinstance(values, pd.Categorical))
+    df = load_transactions("data/expense_data_1.csv")
+    assert not is_read_only(df)
+    set_derived(df, "marker", 1)
+    assert get_derived(df, "marker") is None
@@ -0,0 +1,53 @@
+import pytest
+
+from nlp.intents import IntentMatcher, classify_intent
+
+
+@pytest.mark.parametrize("query", [
+    "Is this worth it?",
+    "which card has the lowest fee",
+    "my shipping costs",
+    "chili recipes",
+])
+def test_greeting_does_not_fire_inside_other_words(query):
+    assert classify_intent(query) is None
+
+
+def test_greeting_matches_whole_words():
+    assert classify_intent("Hi!") == "greeting"
+    assert classify_intent("good morning FinBot") == "greeting"
+
+
+def test_topic_outranks_greeting():
+    assert classify_intent("hi, how should I invest?") == "investing"
+    assert classify_intent("hello, this is about my tax return") == "taxes"
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("How do I save money on groceries?", "save_money"),
+    ("are index funds a good idea", "investing"),
+    ("should I open a Roth IRA", "investing"),
+    ("when is my tax return due", "taxes"),
+])
+def test_multi_token_phrases(query, intent):
+    assert classify_intent(query) == intent
+
+
+def test_longest_phrase_then_earliest_wins():
+    matcher = IntentMatcher([
+        {"name": "short", "priority": 1, "keywords": ["credit"]},
+        {"name": "long", "priority": 1, "keywords": ["credit card debt"]},
+        {"name": "other", "priority": 1, "keywords": ["loan"]},
+    ])
+    assert matcher.classify("my credit card debt") == "long"
+    assert matcher.classify("credit card bill") == "short"
+    assert matcher.classify("loan or credit") == "other"
+
+
+def test_overlapping_phrases_are_all_reported():
+    matcher = IntentMatcher([
+        {"name": "a", "priority": 0, "keywords": ["card debt"]},
+        {"name": "b", "priority": 0, "keywords": ["credit card"]},
+    ])
+    names = {name for _, _, name, _ in matcher.matches("credit card debt")}
+    assert names == {"a", "b"}
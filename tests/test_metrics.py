@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+
+from utils import metrics
+
+
+def test_concurrent_file_exports_do_not_collide(tmp_path):
+    path = tmp_path / "metrics.prom"
+    metrics.observe("page", 0.1, kind="test")
+    errors = []
+
+    def write():
+        try:
+            for _ in range(100):
+                metrics.write_prometheus(str(path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(tmp_path) == ["metrics.prom"]
+    assert "finbot_duration_seconds" in path.read_text()
+
+
+def test_file_export_is_throttled(tmp_path, monkeypatch):
+    path = tmp_path / "metrics.prom"
+    monkeypatch.setenv("FINBOT_METRICS_FILE", str(path))
+    monkeypatch.setattr(metrics, "_last_file_export", float("-inf"))
+    metrics.export_configured()
+    assert path.exists()
+    path.unlink()
+    metrics.export_configured()
+    assert not path.exists()
+
+
+def test_streamed_results_are_timed_until_consumed(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(metrics, "observe", lambda name, seconds, kind: recorded.append(seconds))
+
+    @metrics.timed(kind="test")
+    def produce():
+        for chunk in ("a", "b"):
+            time.sleep(0.05)
+            yield chunk
+
+    chunks = produce()
+    assert recorded == []
+    assert list(chunks) == ["a", "b"]
+    assert len(recorded) == 1 and recorded[0] >= 0.1
+
+
+def test_failed_metrics_server_is_not_retried(monkeypatch, capsys):
+    attempts = []
+
+    def refuse(*args):
+        attempts.append(args)
+        raise OSError("address in use")
+
+    monkeypatch.setattr(metrics, "ThreadingHTTPServer", refuse)
+    monkeypatch.setattr(metrics, "_server", None)
+    monkeypatch.setattr(metrics, "_server_failed", False)
+    monkeypatch.setenv("FINBOT_METRICS_PORT", "9")
+    monkeypatch.delenv("FINBOT_METRICS_FILE", raising=False)
+    metrics.export_configured()
+    metrics.export_configured()
+    assert len(attempts) == 1
+    assert "address in use" in capsys.readouterr().err
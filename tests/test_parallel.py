@@ -0,0 +1,37 @@
+import pytest
+
+from finance import parallel
+from finance.parallel import load_transaction_files
+
+DEMO = "data/expense_data_1.csv"
+MINIMAL = b"Transaction Date,Category,Amount\n2022-03-05,Food,12.5\n2022-03-06,Rent,500\n"
+
+
+@pytest.fixture(params=["serial", "parallel"])
+def mode(request, monkeypatch):
+    if request.param == "parallel":
+        monkeypatch.setattr(parallel, "PARALLEL_MIN_BYTES", 0)
+    return request.param
+
+
+def test_mixed_schema_files_keep_all_columns(mode):
+    with open(DEMO, "rb") as f:
+        demo = f.read()
+    df, skipped = load_transaction_files([demo, MINIMAL], max_workers=2)
+    assert skipped == 0
+    assert len(df) == 277 + 2
+    for column in ("Account", "Note", "Subcategory", "Income/Expense", "Currency"):
+        assert column in df.columns
+    assert df["Account"].iloc[:277].notna().all()
+    assert df["Account"].iloc[277:].isna().all()
+
+
+def test_transactions_repeated_across_files_are_kept_once(mode):
+    df, skipped = load_transaction_files([DEMO, MINIMAL, DEMO, MINIMAL], max_workers=2)
+    assert skipped == 277 + 2
+    assert len(df) == 277 + 2
+
+
+def test_schema_error_names_the_file(mode):
+    with pytest.raises(ValueError, match="file 2"):
+        load_transaction_files([MINIMAL, b"Date,Amount\n2022-01-01,1\n"], max_workers=2)
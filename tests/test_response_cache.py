@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from nlp.response_cache import ResponseCache, normalize_query
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(maxsize=16, ttl=60, path=None)
+
+
+def test_different_questions_get_different_keys():
+    questions = ["Why should I invest?", "When should I invest?", "How should I invest?",
+                 "Should I invest?", "What should I invest in?", "Can I invest?"]
+    keys = {ResponseCache.key(q, "Student", "model") for q in questions}
+    assert len(keys) == len(questions)
+
+
+def test_rephrasings_share_a_key():
+    assert normalize_query("How do I save money?") == normalize_query("how to save   money")
+    assert (ResponseCache.key("How do I save money?", "Student", "m")
+            == ResponseCache.key("HOW DO I SAVE MONEY", "Student", "m"))
+
+
+def test_key_depends_on_user_type_model_and_context():
+    base = ResponseCache.key("How do I budget?", "Student", "m")
+    assert base != ResponseCache.key("How do I budget?", "Professional", "m")
+    assert base != ResponseCache.key("How do I budget?", "Student", "other")
+    context = ("", [{"role": "user", "content": "I earn 3000 a month"}])
+    assert base != ResponseCache.key("How do I budget?", "Student", "m", context)
+    assert base == ResponseCache.key("How do I budget?", "Student", "m", ("", []))
+
+
+def test_questions_without_content_are_not_cached(cache):
+    key = ResponseCache.key("the a an", "Student", "m")
+    assert key == ""
+    cache.set(key, "answer", 1.0)
+    assert cache.get(key) is None
+
+
+def test_hits_count_saved_latency(cache):
+    key = ResponseCache.key("How do I save money?", "Student", "m")
+    assert cache.get(key) is None
+    cache.set(key, "Save early.", 2.5)
+    assert cache.get(key) == "Save early."
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["latency_saved_seconds"] == pytest.approx(2.5)
+
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(ttl=0.1, path=None)
+    cache.set("key", "answer", 1.0)
+    assert cache.get("key") == "answer"
+    time.sleep(0.2)
+    assert cache.get("key") is None
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "responses.db")
+    ResponseCache(ttl=60, path=path).set("key", "answer", 3.0)
+
+    restarted = ResponseCache(ttl=60, path=path)
+    assert restarted.get("key") == "answer"
+    assert restarted.stats()["disk_hits"] == 1
+    # Promoted to memory: the second hit does not touch the disk
+    assert restarted.get("key") == "answer"
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_drops_expired_rows(tmp_path):
+    path = str(tmp_path / "responses.db")
+    ResponseCache(ttl=0.1, path=path).set("key", "answer", 3.0)
+    time.sleep(0.2)
+    restarted = ResponseCache(ttl=60, path=path)
+    assert restarted.get("key") is None
+    assert restarted.purge_expired() == 0
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from nlp.retrieval import (
+    AdviceIndex,
+    HashingEmbedder,
+    _snippet_text,
+    build_index,
+    load_snippets,
+    train_partitions,
+)
+
+TOPICS = ["save_money", "budgeting", "investing", "taxes", "debt"]
+USER_TYPES = ["Student", "Professional", None]
+
+
+@pytest.fixture(scope="module")
+def knowledge_base(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    words = [f"word{i}" for i in range(300)]
+    path = tmp_path_factory.mktemp("kb") / "snippets.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(400):
+            f.write(json.dumps({
+                "id": f"s{i}",
+                "user_type": USER_TYPES[i % 3],
+                "topic": TOPICS[i % 5],
+                "title": f"Tip {i}",
+                "text": " ".join(rng.choice(words, 12)),
+            }) + "\n")
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def flat(knowledge_base, tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("flat"))
+    return AdviceIndex.load(build_index(knowledge_base, directory, ivf_min_rows=10 ** 6))
+
+
+@pytest.fixture(scope="module")
+def ivf(knowledge_base, tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("ivf"))
+    return AdviceIndex.load(build_index(knowledge_base, directory, ivf_min_rows=0))
+
+
+def _query(text):
+    return HashingEmbedder().embed([text])[0]
+
+
+def test_flat_top_k_matches_brute_force(knowledge_base, flat):
+    snippets = load_snippets(knowledge_base)
+    vectors = HashingEmbedder().embed([_snippet_text(s) for s in snippets])
+    query = _query("word1 word2 word3 word40")
+    brute = dict(zip((s["id"] for s in snippets), (vectors @ query).tolist()))
+
+    results = flat.search(query, k=5)
+    # Ties may come back in any order; the scores may not
+    scores = [score for score, _ in results]
+    assert scores == pytest.approx(sorted(brute.values(), reverse=True)[:5])
+    for score, snippet in results:
+        assert score == pytest.approx(brute[snippet["id"]])
+
+
+def test_filters_keep_matching_and_shared_snippets(flat):
+    results = flat.search(_query("word7 word8"), k=20, user_type="Student", topic="taxes")
+    assert results
+    for _, snippet in results:
+        assert snippet["user_type"] in ("Student", None)
+        assert snippet["topic"] == "taxes"
+    assert flat.search(_query("word7"), k=3, topic="no_such_topic") == []
+
+
+def test_ivf_partitions_are_contiguous_and_complete(ivf):
+    assert ivf.meta["ivf"]
+    assert ivf.partitions[0] == 0 and ivf.partitions[-1] == len(ivf)
+    assert np.all(np.diff(ivf.partitions) >= 0)
+    np.testing.assert_allclose(np.linalg.norm(ivf.centroids, axis=1), 1.0, rtol=1e-5)
+
+
+def test_ivf_probing_every_partition_equals_flat_search(flat, ivf):
+    query = _query("word11 word12 word13")
+    exhaustive = ivf.search(query, k=5, nprobe=len(ivf.centroids))
+    expected = flat.search(query, k=5)
+    assert [score for score, _ in exhaustive] == pytest.approx(
+        [score for score, _ in expected])
+
+
+def test_ivf_finds_a_snippet_from_its_own_text(knowledge_base, ivf):
+    # A snippet's own partition is the one whose centroid is closest to it
+    for snippet in load_snippets(knowledge_base)[:25]:
+        (_, found), = ivf.search(_query(_snippet_text(snippet)), k=1, nprobe=1)
+        assert found["id"] == snippet["id"]
+
+
+def test_train_partitions_assigns_rows_to_their_nearest_centroid():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    centroids, labels = train_partitions(vectors, 10)
+    assert centroids.shape == (10, 16)
+    np.testing.assert_array_equal(labels, np.argmax(vectors @ centroids.T, axis=1))
+
+
+def test_concurrent_builds_leave_a_complete_index(knowledge_base, tmp_path):
+    directory = str(tmp_path / "index")
+    errors = []
+
+    def build():
+        try:
+            build_index(knowledge_base, directory, ivf_min_rows=10 ** 6)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    index = AdviceIndex.load(directory)
+    assert len(index) == 400 and index.search(_query("word1"), k=1)
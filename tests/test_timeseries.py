@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance.aggregates import get_spending_cube
+from finance.ingest import load_transactions
+from finance.timeseries import RESOLUTIONS, build_time_pyramid, lttb
+
+
+@pytest.fixture
+def long_history():
+    # Two and a half years of daily spending, crossing week, month and year edges
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2021-11-29", "2024-05-03", freq="D")
+    rows = pd.DataFrame({
+        "Date": days.strftime("%Y-%m-%d"),
+        "Category": rng.choice(["Food", "Rent", "Travel"], len(days)),
+        "Amount": rng.uniform(1, 200, len(days)).round(2),
+    })
+    return load_transactions(io.BytesIO(rows.to_csv(index=False).encode()))
+
+
+def test_lttb_keeps_endpoints_and_threshold_points():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 20)
+    keep = lttb(x, y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[437] = 100.0
+    assert 437 in lttb(np.arange(1000, dtype=np.float64), y, 20)
+
+
+def test_lttb_short_series_and_small_threshold():
+    x = np.arange(5, dtype=np.float64)
+    np.testing.assert_array_equal(lttb(x, x, 10), np.arange(5))
+    with pytest.raises(ValueError):
+        lttb(x, x, 2)
+
+
+def test_every_level_adds_up_to_the_daily_total(long_history):
+    pyramid = build_time_pyramid(long_history)
+    expected = get_spending_cube(long_history).day_totals.sum()
+    for resolution in RESOLUTIONS:
+        starts, totals = pyramid.levels[resolution]
+        assert totals.sum() == pytest.approx(expected)
+        assert np.all(np.diff(starts.astype(np.int64)) > 0)
+    # Weeks start on Monday, years on January 1st
+    assert pd.Timestamp(pyramid.levels["week"][0][0]).day_name() == "Monday"
+    assert pd.Timestamp(pyramid.levels["year"][0][1]) == pd.Timestamp("2022-01-01")
+
+
+def test_series_respects_the_point_budget(long_history):
+    pyramid = build_time_pyramid(long_history)
+    # 887 days are over four times the budget; 127 weeks are downsampled
+    series, resolution = pyramid.series(max_points=100)
+    assert resolution == "week"
+    assert len(series) == 100
+    series, resolution = pyramid.series(max_points=10)
+    assert resolution == "month"
+    assert len(series) == 10
+    series, resolution = pyramid.series("2023-02-01", "2023-02-28", max_points=100)
+    assert len(series) == 28
+    assert series.sum() == pytest.approx(
+        get_spending_cube(long_history).by_day()["2023-02"].sum())
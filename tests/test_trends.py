@@ -0,0 +1,37 @@
+import gc
+import weakref
+
+import pandas as pd
+
+from finance.cache import result_cache
+from finance.ingest import normalize_transactions
+from finance.trends import expense_transactions, generate_trend_insights
+
+
+def _frame(kinds):
+    n = len(kinds)
+    return normalize_transactions(pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "Category": ["Food"] * n,
+        "Amount": [10.0] * n,
+        "Income/Expense": kinds,
+    }))
+
+
+def test_expense_transactions_selects_expenses():
+    df = _frame(["Expense", "Income", "Expense"])
+    expenses = expense_transactions(df)
+    assert len(expenses) == 2
+    assert expense_transactions(df) is expenses
+
+
+def test_all_expense_frame_is_not_kept_alive():
+    df = _frame(["Expense"] * 120)
+    generate_trend_insights(df)
+    assert expense_transactions(df) is df
+
+    ref = weakref.ref(df)
+    del df
+    result_cache.clear()
+    gc.collect()
+    assert ref() is None
@@ -1,10 +1,128 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+from utils import user_store
+from utils.cache import LRUCache
+
+# --- PASSWORD HASHING ---
+# scrypt is memory-hard: each hash needs roughly 128 * N * r bytes of RAM.
+# Raise N to make offline guessing costlier, at the price of slower logins.
+SCRYPT_N = int(os.getenv("FINBOT_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("FINBOT_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("FINBOT_SCRYPT_P", "1"))
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+# --- SESSION TOKENS ---
+# Tokens travel in the page URL, where browser history, proxies and logs can
+# see them, so they are short-lived and exchanged for a new one on each use.
+SESSION_TTL_SECONDS = int(os.getenv("FINBOT_SESSION_TTL", str(12 * 3600)))
+# Seconds a verified token is trusted before the database is asked again
+# whether it was revoked, e.g. by a logout served by another process.
+SESSION_RECHECK_SECONDS = float(os.getenv("FINBOT_SESSION_RECHECK_SECONDS", "30"))
+
+# Tokens verified recently; a hit skips both the HMAC and the database lookup.
+_verified_tokens = LRUCache(maxsize=10_000, ttl=SESSION_RECHECK_SECONDS)
+
+# Demo accounts created in an empty database, matching the README
+DEMO_USERS = [
+    ("student", "pass123", "Student"),
+    ("professional", "pass456", "Professional"),
+]
+
+_secret_key = None
+_seed_lock = threading.Lock()
+_seeded = False
+
+# Hash of a random password, checked for unknown usernames so that a failed
+# login takes as long whether or not the account exists.
+_dummy_hash = None
+
+
+def hash_password(password: str, n: int = None, r: int = None, p: int = None) -> str:
+    """
+    Hashes a password with a random salt using scrypt.
+
+    Args:
+        password (str): The plaintext password.
+        n (int): CPU/memory cost; defaults to `SCRYPT_N`.
+        r (int): Block size; defaults to `SCRYPT_R`.
+        p (int): Parallelism; defaults to `SCRYPT_P`.
+
+    Returns:
+        str: An encoded hash of the form `scrypt$n$r$p$salt$hash`.
+    """
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                            maxmem=256 * n * r + 1024 * 1024, dklen=HASH_BYTES)
+    return "$".join([
+        "scrypt", str(n), str(r), str(p),
+        base64.b64encode(salt).decode(), base64.b64encode(digest).decode(),
+    ])
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Checks a password against a hash produced by `hash_password`."""
+    try:
+        _, n, r, p, salt, expected = encoded.split("$")
+        n, r, p = int(n), int(r), int(p)
+    except ValueError:
+        return False
+    digest = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt), n=n, r=r, p=p,
+                            maxmem=256 * n * r + 1024 * 1024, dklen=HASH_BYTES)
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+def _needs_rehash(encoded: str) -> bool:
+    """True if a stored hash was made with different cost parameters."""
+    return encoded.split("$")[1:4] != [str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+
+
+def _ensure_seeded():
+    """Creates the demo accounts the first time an empty store is used."""
+    global _seeded, _dummy_hash
+    if _seeded:
+        return
+    with _seed_lock:
+        if _seeded:
+            return
+        if user_store.count_users() == 0:
+            for username, password, user_type in DEMO_USERS:
+                create_user(username, password, user_type)
+        _dummy_hash = hash_password(secrets.token_urlsafe())
+        _seeded = True
+
+
+def create_user(username: str, password: str, user_type: str = None,
+                role: str = "user") -> bool:
+    """
+    Registers a new user with a hashed password.
+
+    Args:
+        username (str): The login name.
+        password (str): The plaintext password; only its hash is stored.
+        user_type (str): The user's demographic ('Student' or 'Professional').
+        role (str): 'user' or 'admin'.
+
+    Returns:
+        bool: False if the username is already taken.
+    """
+    return user_store.insert_user(username, hash_password(password), user_type, role)
+
+
 def login_user(username: str, password: str) -> bool:
     """
-    Simulates a user login process.
+    Checks a user's credentials against the user store.
 
-    In a real application, this would involve hashing the password and
-    checking against a database of users. For this demo, we'll use
-    hardcoded credentials.
+    This is the only place the (deliberately slow) password hash runs; later
+    reruns are authenticated with the session token from `create_session`.
 
     Args:
         username (str): The user's entered username.
@@ -13,15 +131,169 @@ def login_user(username: str, password: str) -> bool:
     Returns:
         bool: True if login is successful, False otherwise.
     """
-    # Simple validation: checks if username and password are not empty
-    # and match our "database"
     if not username or not password:
         return False
 
-    # Dummy users for demonstration
-    valid_users = {
-        "student": "pass123",
-        "professional": "pass456"
-    }
+    _ensure_seeded()
+    user = user_store.get_user(username)
+    if user is None:
+        verify_password(password, _dummy_hash)
+        return False
+    if not verify_password(password, user["password_hash"]):
+        return False
+
+    # Upgrade hashes made with older cost settings while we have the password
+    if _needs_rehash(user["password_hash"]):
+        user_store.update_password_hash(username, hash_password(password))
+    return True
+
+
+def get_user_role(username: str) -> str:
+    """Returns the user's role ('user' or 'admin'), or None if unknown."""
+    user = user_store.get_user(username)
+    return user["role"] if user else None
+
+
+def _get_secret_key() -> bytes:
+    """Returns the token signing key, persisted in the database if not set."""
+    global _secret_key
+    if _secret_key is None:
+        configured = os.getenv("FINBOT_SECRET_KEY")
+        if configured:
+            _secret_key = configured.encode()
+        else:
+            _secret_key = user_store.set_meta_default(
+                "secret_key", secrets.token_urlsafe(32)).encode()
+    return _secret_key
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64(hmac.new(_get_secret_key(), payload.encode(), hashlib.sha256).digest())
+
+
+def create_session(username: str, user_type: str = None) -> str:
+    """
+    Issues a signed session token for a logged-in user.
+
+    Args:
+        username (str): The authenticated user.
+        user_type (str): The demographic chosen for this session.
+
+    Returns:
+        str: An opaque token to keep on the client.
+    """
+    now = time.time()
+    session_id = secrets.token_urlsafe(16)
+    expires_at = now + SESSION_TTL_SECONDS
+    user_store.delete_expired_sessions(now)
+    user_store.insert_session(session_id, username, expires_at)
+
+    payload = _b64(json.dumps(
+        {"sid": session_id, "sub": username, "type": user_type, "exp": expires_at},
+        separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_session(token: str):
+    """
+    Validates a session token.
+
+    Verified tokens are cached, so the common case on each rerun is a single
+    dictionary lookup and an expiry check. Cached tokens are looked up in the
+    database again every `SESSION_RECHECK_SECONDS`, so a revocation reaches
+    every process within that time.
+
+    Args:
+        token (str): A token from `create_session`.
+
+    Returns:
+        dict | None: The session claims (`sub`, `type`, `exp`, `sid`), or
+            None if the token is invalid, expired or revoked.
+    """
+    if not token:
+        return None
+    claims = _verified_tokens.get(token)
+    if claims is None:
+        claims = _verify_uncached(token)
+        if claims is None:
+            return None
+        _verified_tokens.set(token, claims)
+    if claims["exp"] < time.time():
+        _verified_tokens.discard(token)
+        return None
+    return claims
+
+
+def _verify_uncached(token: str):
+    try:
+        payload, signature = token.split(".")
+    except ValueError:
+        return None
+    # Compared as bytes: the token comes from the URL and may hold any text,
+    # which compare_digest rejects for non-ASCII strings
+    if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        return None
+    try:
+        claims = json.loads(_unb64(payload))
+    except ValueError:
+        return None
+    if claims["exp"] < time.time() or not user_store.session_exists(claims["sid"]):
+        return None
+    return claims
+
+
+def exchange_session(token: str):
+    """
+    Replaces a session token with a new one, revoking the old.
+
+    Used when a token from the URL restores a session, so that a copy of the
+    link (in browser history, a proxy log or a shared screenshot) works at
+    most once. When two requests race to exchange the same token only one
+    gets a new token.
+
+    Args:
+        token (str): A token from `create_session`.
+
+    Returns:
+        str | None: A new token for the same user, or None if `token` is
+            invalid, expired or revoked.
+    """
+    claims = verify_session(token)
+    _verified_tokens.discard(token)
+    if claims is None or not user_store.delete_session(claims["sid"]):
+        return None
+    return create_session(claims["sub"], claims["type"])
+
+
+def revoke_session(token: str):
+    """Invalidates a session token, e.g. on logout."""
+    claims = verify_session(token)
+    _verified_tokens.discard(token)
+    if claims is not None:
+        user_store.delete_session(claims["sid"])
+
+
+if __name__ == "__main__":
+    import argparse
+    import getpass
+
+    parser = argparse.ArgumentParser(description="Create a FinBot user account.")
+    parser.add_argument("username")
+    parser.add_argument("--user-type", choices=["Student", "Professional"])
+    parser.add_argument("--admin", action="store_true", help="Grant access to the metrics panel")
+    args = parser.parse_args()
 
-    return username in valid_users and valid_users[username] == password
+    password = getpass.getpass("Password: ")
+    role = "admin" if args.admin else "user"
+    if create_user(args.username, password, args.user_type, role):
+        print(f"Created {role} '{args.username}'.")
+    else:
+        raise SystemExit(f"User '{args.username}' already exists.")
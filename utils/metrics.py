@@ -0,0 +1,263 @@
+import functools
+import inspect
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Samples kept per timer for the rolling percentiles
+WINDOW_SIZE = int(os.getenv("FINBOT_METRICS_WINDOW", "1024"))
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_NAME = "finbot_duration_seconds"
+# Seconds between rewrites of FINBOT_METRICS_FILE
+FILE_EXPORT_INTERVAL = float(os.getenv("FINBOT_METRICS_FILE_INTERVAL", "10"))
+
+
+class _Timer:
+    """Call count, total time and a rolling window of recent durations."""
+
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=WINDOW_SIZE)
+
+
+_timers = {}
+_collectors = []
+_lock = threading.Lock()
+_server = None
+_server_failed = False
+_last_file_export = float("-inf")
+
+
+def observe(name: str, seconds: float, kind: str = "function"):
+    """
+    Records one duration.
+
+    Args:
+        name (str): What was timed, e.g. a page title or function name.
+        seconds (float): The measured wall time.
+        kind (str): Grouping label: 'page', 'analysis', 'chat', ...
+    """
+    key = (kind, name)
+    with _lock:
+        timer = _timers.get(key)
+        if timer is None:
+            timer = _timers[key] = _Timer()
+        timer.count += 1
+        timer.total += seconds
+        timer.samples.append(seconds)
+
+
+@contextmanager
+def timer(name: str, kind: str = "function"):
+    """Times the enclosed block and records it under `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, kind)
+
+
+def timed(kind: str = "function", name: str = None):
+    """
+    Decorator that records the wall time of every call.
+
+    When the call returns a generator, e.g. a streamed chat answer, the time
+    is recorded once the generator is exhausted or closed, so it covers the
+    work done while the result is consumed.
+
+    Args:
+        kind (str): Grouping label for the exported metric.
+        name (str): Metric name; defaults to `module.function`.
+    """
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        def consume(result, started):
+            try:
+                return (yield from result)
+            finally:
+                observe(label, time.perf_counter() - started, kind)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            streaming = False
+            try:
+                result = func(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    streaming = True
+                    return consume(result, started)
+                return result
+            finally:
+                if not streaming:
+                    observe(label, time.perf_counter() - started, kind)
+
+        return wrapper
+
+    return decorator
+
+
+def register_collector(collect):
+    """
+    Adds a callable returning extra gauges to export as `{name: value}`.
+
+    Used for counters that live elsewhere, such as cache hit rates.
+    """
+    with _lock:
+        _collectors.append(collect)
+
+
+def _quantile(ordered: list, q: float) -> float:
+    """Nearest-rank quantile of an already sorted list."""
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def snapshot() -> list:
+    """
+    Returns the current figures for every timer.
+
+    Returns:
+        list: Dicts with kind, name, count, total and p50/p95/p99 seconds.
+    """
+    with _lock:
+        items = [(key, t.count, t.total, sorted(t.samples)) for key, t in _timers.items()]
+    rows = []
+    for (kind, name), count, total, ordered in sorted(items):
+        row = {"kind": kind, "name": name, "count": count, "total": total}
+        for q in QUANTILES:
+            row[f"p{int(q * 100)}"] = _quantile(ordered, q) if ordered else 0.0
+        rows.append(row)
+    return rows
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """Formats all timers and collected gauges in Prometheus text format."""
+    lines = [
+        f"# HELP {METRIC_NAME} Wall time of page renders, analysis and chat calls.",
+        f"# TYPE {METRIC_NAME} summary",
+    ]
+    for row in snapshot():
+        labels = f'kind="{_escape(row["kind"])}",name="{_escape(row["name"])}"'
+        for q in QUANTILES:
+            lines.append(
+                f'{METRIC_NAME}{{{labels},quantile="{q}"}} {row[f"p{int(q * 100)}"]:.6f}')
+        lines.append(f"{METRIC_NAME}_sum{{{labels}}} {row['total']:.6f}")
+        lines.append(f"{METRIC_NAME}_count{{{labels}}} {row['count']}")
+
+    with _lock:
+        collectors = list(_collectors)
+    for collect in collectors:
+        for gauge, value in collect().items():
+            lines.append(f"# TYPE {gauge} gauge")
+            lines.append(f"{gauge} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str):
+    """Writes the Prometheus export to `path` atomically."""
+    # A unique temporary file per call, so concurrent writers never share one
+    fd, temporary = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(render_prometheus())
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _file_export_due() -> bool:
+    """True at most once per `FILE_EXPORT_INTERVAL` across all threads."""
+    global _last_file_export
+    with _lock:
+        now = time.monotonic()
+        if now - _last_file_export < FILE_EXPORT_INTERVAL:
+            return False
+        _last_file_export = now
+        return True
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """
+    Serves `/metrics` on a local port from a daemon thread (once per process).
+
+    The bind is attempted once: if it fails, the error is raised and later
+    calls return None instead of trying again.
+
+    Args:
+        port (int): TCP port to listen on.
+        host (str): Interface to bind; local-only by default.
+
+    Returns:
+        ThreadingHTTPServer | None: The running server, or None if starting
+            it failed earlier.
+
+    Raises:
+        OSError: If the port cannot be bound on the first attempt.
+    """
+    global _server, _server_failed
+    with _lock:
+        if _server is None and not _server_failed:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                _server_failed = True
+                raise
+            threading.Thread(
+                target=_server.serve_forever, name="finbot-metrics", daemon=True).start()
+    return _server
+
+
+def export_configured():
+    """
+    Exports metrics as configured by the environment.
+
+    `FINBOT_METRICS_PORT` starts the local HTTP endpoint and
+    `FINBOT_METRICS_FILE` rewrites a text file, at most every
+    `FINBOT_METRICS_FILE_INTERVAL` seconds; call once per rerun.
+    """
+    port = os.getenv("FINBOT_METRICS_PORT")
+    if port:
+        try:
+            start_metrics_server(int(port))
+        except OSError as e:
+            # Reported once; the page keeps working without the endpoint
+            print(f"FinBot metrics endpoint not started on port {port}: {e}",
+                  file=sys.stderr)
+    path = os.getenv("FINBOT_METRICS_FILE")
+    if path and _file_export_due():
+        write_prometheus(path)
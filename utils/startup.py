@@ -0,0 +1,146 @@
+"""
+Cold-start timing for the Streamlit app.
+
+Records how long each module import and each page's first render takes in
+the current process. Run `python -m utils.startup` to measure the import
+cost of the app's dependencies in fresh interpreters.
+"""
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Taken when this module is first imported, i.e. at the top of app.py
+PROCESS_START = time.perf_counter()
+
+# Modules whose import cost matters for cold start, lightest path first
+STARTUP_MODULES = [
+    "streamlit",
+    "pandas",
+    "numpy",
+    "finance.analysis",
+    "nlp.chatbot",
+    "utils.auth",
+    "dotenv",
+    "huggingface_hub",
+    "torch",
+    "transformers",
+]
+
+_import_times = {}
+_first_render_times = {}
+_reported = False
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed_import(label: str):
+    """Records the time spent importing `label` the first time it runs."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _import_times.setdefault(label, time.perf_counter() - started)
+
+
+def lazy_import(name: str):
+    """
+    Imports a module on first use and records how long the import took.
+
+    Args:
+        name (str): Dotted module name.
+
+    Returns:
+        module: The imported module.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with timed_import(name):
+        return importlib.import_module(name)
+
+
+@contextmanager
+def first_render(page: str):
+    """Records how long a page takes to render the first time in this process."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _first_render_times.setdefault(page, {
+                "seconds": time.perf_counter() - started,
+                "since_start": time.perf_counter() - PROCESS_START,
+            })
+
+
+def startup_report() -> list:
+    """
+    Returns the import and first-render timings recorded in this process.
+
+    Returns:
+        list: Dicts with `kind`, `name` and `seconds`, slowest first within
+            each kind.
+    """
+    with _lock:
+        imports = [
+            {"kind": "import", "name": name, "seconds": seconds}
+            for name, seconds in _import_times.items()
+        ]
+        renders = [
+            {"kind": "first_render", "name": page, **timing}
+            for page, timing in _first_render_times.items()
+        ]
+    imports.sort(key=lambda row: row["seconds"], reverse=True)
+    renders.sort(key=lambda row: row.get("since_start", 0))
+    return imports + renders
+
+
+def format_startup_report(rows: list = None) -> str:
+    """Formats `startup_report()` rows as a plain-text table."""
+    rows = startup_report() if rows is None else rows
+    lines = [f"{'kind':<14}{'name':<36}{'ms':>10}"]
+    for row in rows:
+        lines.append(f"{row['kind']:<14}{row['name']:<36}{row['seconds'] * 1000:>10.1f}")
+    return "\n".join(lines)
+
+
+def report_once():
+    """Prints the startup report to stderr once per process if enabled."""
+    global _reported
+    if _reported or os.getenv("FINBOT_STARTUP_REPORT") != "1":
+        return
+    _reported = True
+    print(format_startup_report(), file=sys.stderr)
+
+
+def measure_cold_imports(modules: list = STARTUP_MODULES) -> list:
+    """
+    Times each module's import in a fresh interpreter.
+
+    Args:
+        modules (list): Dotted module names to import.
+
+    Returns:
+        list: Report rows; modules that are not installed are skipped.
+    """
+    script = (
+        "import time, importlib, sys; t = time.perf_counter(); "
+        "importlib.import_module(sys.argv[1]); print(time.perf_counter() - t)"
+    )
+    rows = []
+    for name in modules:
+        result = subprocess.run(
+            [sys.executable, "-c", script, name], capture_output=True, text=True)
+        if result.returncode == 0:
+            rows.append({"kind": "cold_import", "name": name,
+                         "seconds": float(result.stdout.strip())})
+    return rows
+
+
+if __name__ == "__main__":
+    print(format_startup_report(measure_cold_imports()))
@@ -0,0 +1,196 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Location of the SQLite database holding users and sessions
+DB_PATH = os.getenv("FINBOT_DB_PATH", "data/finbot.db")
+POOL_SIZE = int(os.getenv("FINBOT_DB_POOL_SIZE", "4"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username      TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    user_type     TEXT,
+    role          TEXT NOT NULL DEFAULT 'user',
+    created_at    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    username   TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_username ON sessions(username);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ConnectionPool:
+    """
+    A small fixed-size pool of SQLite connections shared across threads.
+
+    Streamlit serves every session from its own thread; handing out pooled
+    connections avoids opening a new one on every rerun while keeping each
+    connection used by one thread at a time.
+    """
+
+    def __init__(self, path: str = DB_PATH, size: int = POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._size = size
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Yields a pooled connection inside a transaction."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self._size
+                if can_create:
+                    self._created += 1
+            conn = self._connect() if can_create else self._idle.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_db_path = DB_PATH
+
+
+def use_database(path: str):
+    """Points the store at another database file (used by benchmarks)."""
+    global _pool, _db_path
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool, _db_path = None, path
+
+
+def get_pool() -> ConnectionPool:
+    """Returns the process-wide connection pool, creating the schema once."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(_db_path)
+                with pool.connection() as conn:
+                    conn.executescript(SCHEMA)
+                _pool = pool
+    return _pool
+
+
+def get_user(username: str):
+    """
+    Fetches a user record.
+
+    Args:
+        username (str): The user's login name.
+
+    Returns:
+        sqlite3.Row | None: The user's row, or None if unknown.
+    """
+    with get_pool().connection() as conn:
+        return conn.execute(
+            "SELECT username, password_hash, user_type, role FROM users WHERE username = ?",
+            (username,),
+        ).fetchone()
+
+
+def insert_user(username: str, password_hash: str, user_type: str = None,
+                role: str = "user") -> bool:
+    """Adds a user; returns False if the username is already taken."""
+    try:
+        with get_pool().connection() as conn:
+            conn.execute(
+                "INSERT INTO users (username, password_hash, user_type, role, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (username, password_hash, user_type, role, time.time()),
+            )
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+
+def update_password_hash(username: str, password_hash: str):
+    """Replaces a user's stored password hash."""
+    with get_pool().connection() as conn:
+        conn.execute(
+            "UPDATE users SET password_hash = ? WHERE username = ?",
+            (password_hash, username),
+        )
+
+
+def count_users() -> int:
+    """Returns the number of registered users."""
+    with get_pool().connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def insert_session(session_id: str, username: str, expires_at: float):
+    """Records an issued session so it can be revoked later."""
+    with get_pool().connection() as conn:
+        conn.execute(
+            "INSERT INTO sessions (session_id, username, expires_at) VALUES (?, ?, ?)",
+            (session_id, username, expires_at),
+        )
+
+
+def session_exists(session_id: str) -> bool:
+    """Returns True if the session has not been revoked."""
+    with get_pool().connection() as conn:
+        return conn.execute(
+            "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone() is not None
+
+
+def delete_session(session_id: str) -> bool:
+    """Revokes a session; returns False if it was already gone."""
+    with get_pool().connection() as conn:
+        return conn.execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+
+def delete_expired_sessions(now: float) -> int:
+    """Removes sessions that expired before `now`; returns how many."""
+    with get_pool().connection() as conn:
+        return conn.execute(
+            "DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+
+
+def set_meta_default(key: str, value: str) -> str:
+    """Stores `value` under `key` unless one exists; returns the stored value."""
+    with get_pool().connection() as conn:
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        return conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()["value"]